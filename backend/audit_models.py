@@ -3,11 +3,16 @@
 Model comparison audit: Haiku vs Sonnet vs Opus on the same food logs.
 Extracts only the core macros for each item for easy comparison.
 """
-import anthropic
 import json
 import os
+import sys
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Run as a script from anywhere: make the backend package importable
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.cassette import make_client
+
+client = make_client(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
 MODELS = {
     "haiku": "claude-3-haiku-20240307",
@@ -2,10 +2,16 @@
 """
 Audit V2: Compare OLD prompt (Haiku) vs NEW prompt (Sonnet) for today's entries.
 """
-import anthropic
 import json
+import os
+import sys
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Run as a script from anywhere: make the backend package importable
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.cassette import make_client
+
+client = make_client(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
 ENTRIES = [
     {"label": "Bengali Lunch", "raw": "1.5 katori aloo jhinge posto,1 katori cooked rice, 2 roti, 1 katori cooked masoor dal at 2 pm"},
@@ -0,0 +1,52 @@
+import argparse
+from backend.database import SessionLocal
+from backend import models, llm, catalog, nutrients
+
+def backfill(names=None, batch_size=llm.ESTIMATE_BATCH_SIZE, dry_run=False):
+    """
+    Re-estimate catalog foods whose estimate failed (stored as all-zero
+    macros), or the given foods, using batched estimate calls.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(models.FoodItem)
+        if names:
+            query = query.filter(models.FoodItem.name_normalized.in_([catalog.normalize_food_name(n) for n in names]))
+        else:
+            query = query.filter(models.FoodItem.calories_per_100 == 0,
+                                 models.FoodItem.protein_per_100 == 0,
+                                 models.FoodItem.carbs_per_100 == 0,
+                                 models.FoodItem.fats_per_100 == 0)
+        items = query.all()
+        print(f"{len(items)} foods to re-estimate.")
+        if dry_run or not items:
+            return
+
+        profiles = llm.estimate_many([item.name for item in items], batch_size=batch_size)
+        updated = 0
+        for item, profile in zip(items, profiles):
+            if not any(profile[key] for key in llm.MACRO_KEYS):
+                print(f"Still no estimate for {item.name}, skipping.")
+                continue
+            for key in llm.MACRO_KEYS:
+                setattr(item, key, profile[key])
+            item.default_unit = profile.get("default_unit", "g")
+            item.micros = profile.get("micros", {})
+            item.micros_packed = nutrients.pack(item.micros)
+            updated += 1
+        db.commit()
+        catalog.food_cache.invalidate()
+        print(f"Updated {updated} foods.")
+    except Exception as e:
+        db.rollback()
+        print(f"Backfill failed: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-estimate food catalog macros with batched LLM calls.")
+    parser.add_argument("names", nargs="*", help="foods to re-estimate, default: every all-zero food")
+    parser.add_argument("--batch-size", type=int, default=llm.ESTIMATE_BATCH_SIZE, help="foods per LLM call")
+    parser.add_argument("--dry-run", action="store_true", help="only list how many foods would be re-estimated")
+    args = parser.parse_args()
+    backfill(args.names, args.batch_size, args.dry_run)
@@ -0,0 +1,103 @@
+"""
+Compare per-item food resolution (one query per item, one commit per learned
+food) with the batched path (one IN query, one commit per entry) on multi-item
+logs. The LLM is stubbed out, so the numbers are pure database cost.
+
+    python -m backend.benchmarks.bench_batch_resolution --logs 200 --items 6 --new 3
+"""
+import argparse
+import time
+from sqlalchemy import event
+from backend import llm, models, services, catalog
+from backend.benchmarks.common import scratch_db, drop_db
+
+STUB_STATS = {"calories_per_100": 120, "protein_per_100": 6, "carbs_per_100": 18, "fats_per_100": 3,
+              "default_unit": "g", "micros": {"fiber_g": 2.0, "iron_mg": 1.1}}
+KNOWN_FOODS = ["Rice", "Roti", "Arhar Dal", "Curd", "Salad", "Pickle", "Papad", "Ghee"]
+
+def make_logs(n_logs, n_items, n_new):
+    """Each log mixes known catalog foods with never-seen-before ones."""
+    logs = []
+    for i in range(n_logs):
+        known = [KNOWN_FOODS[(i + j) % len(KNOWN_FOODS)] for j in range(n_items - n_new)]
+        new = [f"Bench Food {i}-{j}" for j in range(n_new)]
+        logs.append([{"name": name, "quantity": "1 katori", "note": ""} for name in known + new])
+    return logs
+
+def legacy_entry(items, db):
+    """The old path: get_food_item per item, create_food_item commits per new food."""
+    foods = {}
+    for item in items:
+        food = db.query(models.FoodItem).filter(models.FoodItem.name.ilike(item["name"])).first()
+        if not food:
+            stats = dict(llm.estimate_metric_macros(item["name"]), name=item["name"])
+            food = models.FoodItem(name=stats["name"], name_normalized=catalog.normalize_food_name(stats["name"]),
+                                   calories_per_100=stats["calories_per_100"], protein_per_100=stats["protein_per_100"],
+                                   carbs_per_100=stats["carbs_per_100"], fats_per_100=stats["fats_per_100"],
+                                   micros=stats["micros"], source="llm_check")
+            db.add(food)
+            db.commit()
+            db.refresh(food)
+        foods[catalog.normalize_food_name(item["name"])] = catalog.snapshot(food)
+    data = services.build_entry_data(items, foods, None, db)
+    db.add(models.Entry(raw_text="bench", macros={"calories": data["total_macros"]["calories"]}))
+    db.commit()
+
+def batched_entry(items, db):
+    """The new path: one IN query, new foods and the entry in one commit."""
+    foods = services.resolve_food_items(db, [item["name"] for item in items])
+    data = services.build_entry_data(items, foods, None, db)
+    db.add(models.Entry(raw_text="bench", macros={"calories": data["total_macros"]["calories"]}))
+    db.commit()
+
+def measure(fn, logs):
+    engine, SessionLocal, path = scratch_db()
+    statements = []
+    commits = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+    event.listen(engine, "commit", lambda *args: commits.append(1))
+    db = SessionLocal()
+    try:
+        for name in KNOWN_FOODS:
+            services.create_food_item(db, dict(STUB_STATS, name=name), source="seed")
+        services.resolve_weight("1 katori", db)  # load the portion index up front
+        catalog.food_cache.invalidate()
+        statements.clear()
+        commits.clear()
+
+        t0 = time.perf_counter()
+        for items in logs:
+            fn(items, db)
+        elapsed = (time.perf_counter() - t0) * 1000
+    finally:
+        db.close()
+        drop_db(engine, path)
+    return {
+        "ms_per_log": round(elapsed / len(logs), 3),
+        "statements_per_log": round(len(statements) / len(logs), 2),
+        "commits_per_log": round(len(commits) / len(logs), 2)
+    }
+
+def run(n_logs, n_items, n_new):
+    llm.estimate_metric_macros = lambda name: dict(STUB_STATS, micros=dict(STUB_STATS["micros"]))
+    llm.log_trace = lambda *args, **kwargs: None
+    logs = make_logs(n_logs, n_items, n_new)
+
+    results = {
+        "per_item": measure(legacy_entry, logs),
+        "batched": measure(batched_entry, logs)
+    }
+    print(f"{n_logs} logs x {n_items} items ({n_new} new per log)")
+    print(f"{'path':>9} | {'ms/log':>8} | {'SQL stmts/log':>13} | {'commits/log':>11}")
+    print("-" * 52)
+    for path, r in results.items():
+        print(f"{path:>9} | {r['ms_per_log']:>8.3f} | {r['statements_per_log']:>13.2f} | {r['commits_per_log']:>11.2f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=200)
+    parser.add_argument("--items", type=int, default=6)
+    parser.add_argument("--new", type=int, default=3, help="unknown foods per log")
+    args = parser.parse_args()
+    run(args.logs, args.items, args.new)
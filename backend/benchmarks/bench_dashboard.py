@@ -0,0 +1,50 @@
+"""
+Benchmark GET /dashboard against a growing history.
+
+The target day always holds the same number of entries; only the rest of the
+history grows. With the indexed range query the latency should stay flat.
+
+    python -m backend.benchmarks.bench_dashboard --sizes 1000 10000 100000 1000000
+    python -m backend.benchmarks.bench_dashboard --legacy   # also time the old full scan
+"""
+import argparse
+from backend import main, models
+from backend.benchmarks.common import BENCH_DATE, scratch_db, drop_db, fill_entries, time_call
+
+def legacy_scan(db, date):
+    """The pre-index query path: load every entry and filter in Python."""
+    return [e for e in db.query(models.Entry).all()
+            if e.ingested_at and e.ingested_at.strftime("%Y-%m-%d") == date]
+
+def run(sizes, repeat, legacy):
+    print(f"{'entries':>10} | {'dashboard median':>17} | {'p95':>9} | {'legacy scan':>12}")
+    print("-" * 60)
+    results = []
+    for n in sizes:
+        engine, SessionLocal, path = scratch_db()
+        try:
+            fill_entries(engine, n)
+            db = SessionLocal()
+            try:
+                stats = time_call(lambda: main.read_dashboard(date=BENCH_DATE, db=db), repeat=repeat)
+                # Sanity check: only the target day's rows are returned
+                assert len(main.read_dashboard(date=BENCH_DATE, db=db)["entries"]) > 0
+                legacy_ms = None
+                if legacy and n <= 100_000:
+                    legacy_ms = time_call(lambda: legacy_scan(db, BENCH_DATE), repeat=3, warmup=0)["median_ms"]
+            finally:
+                db.close()
+        finally:
+            drop_db(engine, path)
+        legacy_col = f"{legacy_ms:>9.2f} ms" if legacy_ms is not None else f"{'-':>12}"
+        print(f"{n:>10} | {stats['median_ms']:>14.3f} ms | {stats['p95_ms']:>6.3f} ms | {legacy_col}")
+        results.append({"entries": n, **stats, "legacy_median_ms": legacy_ms})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--legacy", action="store_true", help="also time the old full-table scan (<=100k only)")
+    args = parser.parse_args()
+    run(args.sizes, args.repeat, args.legacy)
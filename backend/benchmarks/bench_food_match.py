@@ -0,0 +1,71 @@
+"""
+Fuzzy food-name lookups against a large synthetic catalog.
+
+Builds a FoodNameIndex of N made-up Indian dish names and times best_match
+for misspelt catalog names (hits) and unrelated names (misses).
+
+    python -m backend.benchmarks.bench_food_match --sizes 1000 10000 100000
+"""
+import argparse
+import random
+import time
+from backend import food_index
+from backend.benchmarks.common import time_call
+
+PREFIXES = ["aloo", "paneer", "chicken", "mutton", "palak", "masoor", "moong", "arhar", "chana", "rajma",
+            "gobi", "baingan", "bhindi", "matar", "methi", "egg", "fish", "prawn", "soya", "mushroom"]
+DISHES = ["curry", "masala", "tikka", "biryani", "pulao", "dal", "sabzi", "paratha", "korma", "fry",
+          "kebab", "bhurji", "kofta", "handi", "do pyaza", "makhani", "roll", "chaat", "pakora", "soup"]
+STYLES = ["", "punjabi", "hyderabadi", "bengali", "kerala", "chettinad", "goan", "dhaba", "lucknowi", "amritsari"]
+
+def catalog_names(n, seed=7):
+    """n distinct names like 'kerala paneer tikka 1234'."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        parts = [rng.choice(STYLES), rng.choice(PREFIXES), rng.choice(DISHES), str(rng.randrange(100_000))]
+        names.add(" ".join(p for p in parts if p))
+    return sorted(names)
+
+def misspell(name, rng):
+    """Drop one letter from a word, e.g. 'paneer' -> 'paner'."""
+    words = name.split()
+    i = rng.randrange(len(words))
+    word = words[i]
+    if len(word) > 4:
+        j = rng.randrange(1, len(word) - 1)
+        words[i] = word[:j] + word[j + 1:]
+    return " ".join(words)
+
+def run(sizes, queries):
+    rng = random.Random(11)
+    print(f"{'foods':>8} | {'build':>8} | {'hit median':>11} | {'hit p95':>9} | {'miss median':>12} | {'matched':>7}")
+    print("-" * 72)
+    results = []
+    for n in sizes:
+        names = catalog_names(n)
+        t0 = time.perf_counter()
+        index = food_index.FoodNameIndex()
+        for food_id, name in enumerate(names, start=1):
+            index.add(food_id, name)
+        build_s = time.perf_counter() - t0
+
+        hit_queries = [misspell(rng.choice(names), rng) for _ in range(queries)]
+        miss_queries = [f"quinoa avocado bowl {i}" for i in range(queries)]
+        matched = sum(index.best_match(q) is not None for q in hit_queries)
+        hits = iter(hit_queries * 3)
+        misses = iter(miss_queries * 3)
+        hit_stats = time_call(lambda: index.best_match(next(hits)), repeat=queries)
+        miss_stats = time_call(lambda: index.best_match(next(misses)), repeat=queries)
+        print(f"{n:>8} | {build_s:>6.2f} s | {hit_stats['median_ms']:>8.3f} ms | {hit_stats['p95_ms']:>6.3f} ms | "
+              f"{miss_stats['median_ms']:>9.3f} ms | {matched / queries:>6.0%}")
+        results.append({"foods": n, "build_s": build_s, "hit": hit_stats, "miss": miss_stats,
+                        "matched": matched / queries})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    run(args.sizes, args.queries)
@@ -0,0 +1,59 @@
+"""
+Bulk food import throughput: writes an N-row USDA-style CSV, imports it into
+a scratch database through the write engine of the given storage mode (the
+production one by default), then imports it again (the idempotent re-run).
+
+    python -m backend.benchmarks.bench_import_foods --rows 500000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from backend import database, import_foods
+from backend.benchmarks.common import scratch_db, drop_db
+from backend.benchmarks.bench_food_match import catalog_names
+
+HEADERS = ["Description", "Energy (kcal)", "Protein", "Carbohydrate, by difference", "Total lipid (fat)",
+           "Fiber, total dietary", "Sodium", "Iron", "Calcium"]
+
+def write_table(path, n, seed=3):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for name in catalog_names(n):
+            writer.writerow([name, rng.randint(20, 600), round(rng.uniform(0, 30), 1), round(rng.uniform(0, 80), 1),
+                             round(rng.uniform(0, 40), 1), round(rng.uniform(0, 10), 1), rng.randint(0, 900),
+                             round(rng.uniform(0, 5), 2), rng.randint(0, 300)])
+
+def run(rows, batch_size, mode=database.STORAGE_MODE):
+    fd, csv_path = tempfile.mkstemp(prefix="helios_foods_", suffix=".csv")
+    os.close(fd)
+    schema_engine, _, db_path = scratch_db()
+    schema_engine.dispose()
+    engine, read_engine = database.make_engines(db_path, mode)
+    try:
+        write_table(csv_path, rows)
+        t0 = time.perf_counter()
+        first = import_foods.import_foods(csv_path, engine=engine, batch_size=batch_size)
+        first_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        again = import_foods.import_foods(csv_path, engine=engine, batch_size=batch_size)
+        again_s = time.perf_counter() - t0
+    finally:
+        os.remove(csv_path)
+        read_engine.dispose()
+        drop_db(engine, db_path)
+    print(f"Import {rows} rows ({mode}): {first_s:.2f} s ({rows / first_s:,.0f} rows/s), inserted {first['inserted']}")
+    print(f"Re-run:          {again_s:.2f} s, inserted {again['inserted']}, skipped {again['skipped']}")
+    return {"rows": rows, "mode": mode, "import_s": first_s, "rerun_s": again_s, "first": first, "again": again}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=import_foods.BATCH_SIZE)
+    parser.add_argument("--storage-mode", choices=["wal", "simple"], default=database.STORAGE_MODE)
+    args = parser.parse_args()
+    run(args.rows, args.batch_size, args.storage_mode)
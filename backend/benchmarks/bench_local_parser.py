@@ -0,0 +1,85 @@
+"""
+How many real logs the local parser handles without the parse model, how
+well it agrees with the eval labels, and how much parse latency that saves.
+
+Runs over backend/evals/dataset_food_parsing.json. The LLM latency to compare
+against is the median parse_food_text latency recorded in llm_logs.jsonl.
+With no traces yet it is an assumed --llm-ms, not a measurement, and the
+output says so.
+
+    python -m backend.benchmarks.bench_local_parser
+    python -m backend.benchmarks.bench_local_parser --llm-ms 1200 --verbose
+"""
+import argparse
+import json
+import os
+import statistics
+from backend import llm, local_parser
+from backend.evals.eval_utils import load_dataset
+from backend.init_db import seed_portion_units
+from backend.benchmarks.common import scratch_db, drop_db, time_call
+
+def traced_parse_latency_ms():
+    """Median latency of real parse_food_text calls in the trace log, or None."""
+    if not os.path.exists(llm.LOG_FILE):
+        return None
+    latencies = []
+    with open(llm.LOG_FILE) as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if trace.get("function") == "parse_food_text" and trace.get("model") == llm.PARSE_MODEL \
+                    and not trace.get("error"):
+                latencies.append(trace["latency_ms"])
+    return statistics.median(latencies) if latencies else None
+
+def run(llm_ms, verbose):
+    data = load_dataset("dataset_food_parsing.json")
+    engine, SessionLocal, path = scratch_db()
+    db = SessionLocal()
+    try:
+        seed_portion_units(db)
+        handled = items_ok = time_ok = 0
+        local_ms = []
+        for example in data:
+            text = example["input_text"]
+            result = local_parser.parse_food_text_local(text, db)
+            local_ms.append(time_call(lambda: local_parser.parse_food_text_local(text, db), repeat=50)["median_ms"])
+            if result["confidence"] == "low":
+                if verbose:
+                    print(f"  LLM   {text}")
+                continue
+            handled += 1
+            names = [item["name"].lower() for item in result["items"]]
+            items_ok += names == example["expected_items"]
+            time_ok += result["time"] == example["expected_time"]
+            if verbose:
+                print(f"  local {text} -> {[(i['name'], i['quantity']) for i in result['items']]} @ {result['time']}")
+    finally:
+        db.close()
+        drop_db(engine, path)
+
+    traced_ms = traced_parse_latency_ms()
+    parse_ms = traced_ms if traced_ms is not None else llm_ms
+    total = len(data)
+    local_median = statistics.median(local_ms)
+    print(f"Handled locally:     {handled}/{total} ({handled / total:.0%})")
+    if handled:
+        print(f"  items match labels: {items_ok}/{handled}")
+        print(f"  time matches label: {time_ok}/{handled}")
+    print(f"Local parse latency: {local_median:.3f} ms median")
+    source = "measured, from llm_logs.jsonl" if traced_ms is not None else "ASSUMED via --llm-ms, not measured"
+    print(f"LLM parse latency:   {parse_ms:.0f} ms median ({source})")
+    print(f"Parse time saved:    {handled * (parse_ms - local_median) / 1000:.1f} s over {total} logs "
+          f"({handled / total * 100:.0f}% of parse calls{'' if traced_ms is not None else ', at the assumed latency'})")
+    return {"total": total, "handled": handled, "items_match": items_ok, "time_match": time_ok,
+            "local_median_ms": local_median, "llm_parse_ms": parse_ms, "llm_parse_measured": traced_ms is not None}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=1500, help="assumed parse call latency when there are no traces")
+    parser.add_argument("--verbose", action="store_true", help="show how each log was handled")
+    args = parser.parse_args()
+    run(args.llm_ms, args.verbose)
@@ -0,0 +1,41 @@
+"""
+Benchmark GET /dashboard/range over a year (or more) of daily rollups.
+
+    python -m backend.benchmarks.bench_range --years 1 3
+"""
+import argparse
+from datetime import datetime, timedelta
+from backend import main, services
+from backend.benchmarks.common import BENCH_DATE, scratch_db, drop_db, fill_entries, time_call, MEALS_PER_DAY
+
+def run(years, repeat):
+    print(f"{'days':>6} | {'bucket':>6} | {'median':>10} | {'p95':>10}")
+    print("-" * 44)
+    results = []
+    for y in years:
+        n_days = 365 * y
+        engine, SessionLocal, path = scratch_db()
+        try:
+            fill_entries(engine, n_days * MEALS_PER_DAY)
+            db = SessionLocal()
+            try:
+                services.rebuild_daily_totals(db)
+                end = BENCH_DATE
+                start = (datetime.strptime(end, "%Y-%m-%d") - timedelta(days=n_days - 1)).strftime("%Y-%m-%d")
+                for bucket in services.RANGE_BUCKETS:
+                    stats = time_call(lambda: main.read_dashboard_range(start=start, end=end, bucket=bucket, db=db),
+                                      repeat=repeat)
+                    print(f"{n_days:>6} | {bucket:>6} | {stats['median_ms']:>7.3f} ms | {stats['p95_ms']:>7.3f} ms")
+                    results.append({"days": n_days, "bucket": bucket, **stats})
+            finally:
+                db.close()
+        finally:
+            drop_db(engine, path)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.years, args.repeat)
@@ -0,0 +1,104 @@
+"""
+Shared helpers for the benchmark scripts: scratch databases, synthetic data and timers.
+Run benchmarks from the repo root, e.g. `python -m backend.benchmarks.bench_dashboard`.
+"""
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base
+from backend import models  # noqa: F401  (registers the tables on Base)
+
+BENCH_DATE = "2026-01-15"
+MEALS_PER_DAY = 5
+
+SAMPLE_MICROS = {
+    "fiber_g": 3.2, "sugar_g": 1.1, "sodium_mg": 210, "potassium_mg": 320,
+    "calcium_mg": 40, "iron_mg": 1.4, "vitamin_c_mg": 2
+}
+
+def scratch_db(path=None):
+    """Create an empty database with the app schema. Returns (engine, SessionLocal, path)."""
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="helios_bench_", suffix=".db")
+        os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine), path
+
+def drop_db(engine, path):
+    engine.dispose()
+    if os.path.exists(path):
+        os.remove(path)
+
+def _entry_rows(rng, entry_id, ts):
+    """One synthetic entry and its single entry_items row."""
+    macros = {
+        "calories": rng.randint(80, 900),
+        "protein": round(rng.uniform(1, 40), 1),
+        "carbs": round(rng.uniform(5, 120), 1),
+        "fats": round(rng.uniform(1, 35), 1),
+        "water_ml": 0,
+        "food_name": "Synthetic Meal",
+        "micros": SAMPLE_MICROS
+    }
+    entry = (entry_id, "synthetic meal", ts.strftime("%Y-%m-%d %H:%M:%S.%f"), ts.strftime("%Y-%m-%d %H:%M:%S.%f"),
+             ts.strftime("%Y-%m-%d"), json.dumps(macros))
+    item = (entry_id, "Synthetic Meal", "1 katori", 150.0, macros["calories"], macros["protein"], macros["carbs"],
+            macros["fats"], json.dumps(SAMPLE_MICROS))
+    return entry, item
+
+def fill_entries(engine, n, date=BENCH_DATE, per_day=MEALS_PER_DAY, batch=50_000, seed=0):
+    """
+    Insert n synthetic entries: exactly `per_day` on `date`, the rest spread over the
+    days before it at `per_day` a day, so history grows while the target day stays fixed.
+    """
+    rng = random.Random(seed)
+    day = datetime.strptime(date, "%Y-%m-%d")
+    entry_sql = ("INSERT INTO entries (id, raw_text, created_at, ingested_at, local_date, macros) "
+                 "VALUES (?, ?, ?, ?, ?, ?)")
+    item_sql = ("INSERT INTO entry_items (entry_id, position, name, quantity, weight_g, calories, protein, carbs, "
+                "fats, micros) VALUES (?, 0, ?, ?, ?, ?, ?, ?, ?, ?)")
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        next_id = cur.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()[0]
+        entries, items = [], []
+        for i in range(n):
+            ts = day - timedelta(days=i // per_day) + timedelta(hours=8 + 3 * (i % per_day),
+                                                                 minutes=rng.randrange(60))
+            entry, item = _entry_rows(rng, next_id + i, ts)
+            entries.append(entry)
+            items.append(item)
+            if len(entries) >= batch:
+                cur.executemany(entry_sql, entries)
+                cur.executemany(item_sql, items)
+                entries.clear()
+                items.clear()
+        if entries:
+            cur.executemany(entry_sql, entries)
+            cur.executemany(item_sql, items)
+        raw.commit()
+    finally:
+        raw.close()
+
+def time_call(fn, repeat=20, warmup=2):
+    """Run fn repeatedly and return latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3)
+    }
@@ -0,0 +1,165 @@
+"""
+Local stand-in for the Anthropic Messages API, for capacity tests of the real server.
+
+Serves POST /v1/messages with the canned parse, estimate and judge replies
+from fake_llm, shaped like real Message JSON, so the unmodified anthropic SDK
+in backend/llm.py talks to it over HTTP. Each call sleeps for a latency drawn
+from a lognormal distribution (median and p95 per kind of call: parse,
+estimate, judge), and a configurable share of calls fails with the API's own
+error bodies (529 overloaded, 429 rate limited, 500 api error). Note the SDK
+retries 429/5xx itself (twice by default), as it would against the real API.
+
+GET /stats reports calls by kind, errors by status and peak calls in flight.
+
+    python -m backend.benchmarks.fake_anthropic_server --port 8787 \\
+        --parse-ms 900 --parse-p95-ms 2500 --estimate-ms 1500 --estimate-p95-ms 4000 --error 529=0.02
+    HELIOS_LLM_BASE_URL=http://127.0.0.1:8787 uvicorn backend.main:app
+"""
+import argparse
+import asyncio
+import math
+import random
+import secrets
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from backend.benchmarks.fake_llm import canned_reply, PARSE_INPUT_RE, JUDGE_PROMPT_MARK
+
+Z_95 = 1.6449   # standard normal 95th percentile
+ERROR_TYPES = {429: "rate_limit_error", 500: "api_error", 529: "overloaded_error"}
+
+class LatencyProfile:
+    """Lognormal latency fitted to a median and p95: a long right tail, like real API round trips."""
+
+    def __init__(self, median_ms: float, p95_ms: float = None):
+        self.median_ms = median_ms
+        self.p95_ms = max(p95_ms if p95_ms is not None else median_ms, median_ms)
+        self.sigma = math.log(self.p95_ms / median_ms) / Z_95 if median_ms > 0 else 0.0
+
+    def sample_s(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+class FakeServerConfig:
+    def __init__(self, latency: dict = None, errors: dict = None, error_latency_ms: float = 50, seed: int = None):
+        latency = latency or {}
+        # kind -> LatencyProfile; batch estimates use the estimate profile
+        self.latency = {kind: latency.get(kind) or LatencyProfile(0) for kind in ("parse", "estimate", "judge")}
+        self.errors = dict(errors or {})       # HTTP status -> share of calls answered with it
+        unknown = set(self.errors) - set(ERROR_TYPES)
+        if unknown:
+            raise ValueError(f"Unsupported error statuses {sorted(unknown)}; use {sorted(ERROR_TYPES)}")
+        if sum(self.errors.values()) > 1:
+            raise ValueError("Error rates add up to more than 1")
+        self.error_latency = LatencyProfile(error_latency_ms)
+        self.rng = random.Random(seed)
+
+class ServerStats:
+    def __init__(self):
+        self.calls = {}       # kind -> count
+        self.errors = {}      # status -> count
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def to_dict(self) -> dict:
+        return {"calls": dict(self.calls), "errors": {str(s): n for s, n in self.errors.items()},
+                "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+
+def _prompt(body: dict) -> str:
+    content = body["messages"][0]["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+def _kind(prompt: str) -> str:
+    if prompt.startswith(JUDGE_PROMPT_MARK):
+        return "judge"
+    return "parse" if PARSE_INPUT_RE.search(prompt) else "estimate"
+
+def _error(status: int, error_type: str, message: str) -> JSONResponse:
+    return JSONResponse({"type": "error", "error": {"type": error_type, "message": message}}, status_code=status)
+
+def _pick_error(config: FakeServerConfig):
+    roll = config.rng.random()
+    for status, rate in config.errors.items():
+        if roll < rate:
+            return status
+        roll -= rate
+    return None
+
+def create_app(config: FakeServerConfig = None) -> FastAPI:
+    config = config or FakeServerConfig()
+    stats = ServerStats()
+    app = FastAPI(title="Fake Anthropic API")
+    app.state.config = config
+    app.state.stats = stats
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request):
+        body = await request.json()
+        try:
+            prompt = _prompt(body)
+            reply = canned_reply(prompt)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            return _error(400, "invalid_request_error", f"Fake server cannot answer this request: {e}")
+
+        kind = _kind(prompt)
+        stats.calls[kind] = stats.calls.get(kind, 0) + 1
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            status = _pick_error(config)
+            if status is not None:
+                await asyncio.sleep(config.error_latency.sample_s(config.rng))
+                stats.errors[status] = stats.errors.get(status, 0) + 1
+                return _error(status, ERROR_TYPES[status], f"Injected {ERROR_TYPES[status]}")
+            await asyncio.sleep(config.latency[kind].sample_s(config.rng))
+        finally:
+            stats.in_flight -= 1
+
+        return {
+            "id": f"msg_fake_{secrets.token_hex(12)}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model"),
+            "content": [{"type": "text", "text": reply}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            # Rough token counts, ~4 characters a token
+            "usage": {"input_tokens": len(prompt) // 4 + 1, "output_tokens": len(reply) // 4 + 1}
+        }
+
+    @app.get("/stats")
+    def read_stats():
+        return stats.to_dict()
+
+    return app
+
+def _error_rate(value: str):
+    status, _, rate = value.partition("=")
+    try:
+        return int(status), float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected STATUS=RATE (e.g. 529=0.02), got {value!r}")
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    for kind, median, p95 in (("parse", 900, 2500), ("estimate", 1500, 4000), ("judge", 600, 1500)):
+        parser.add_argument(f"--{kind}-ms", type=float, default=median, help=f"median {kind} latency")
+        parser.add_argument(f"--{kind}-p95-ms", type=float, default=p95, help=f"p95 {kind} latency")
+    parser.add_argument("--error", type=_error_rate, action="append", default=[], metavar="STATUS=RATE",
+                        help=f"share of calls failing with STATUS (one of {sorted(ERROR_TYPES)}); repeatable")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency={kind: LatencyProfile(getattr(args, f"{kind}_ms"), getattr(args, f"{kind}_p95_ms"))
+                 for kind in ("parse", "estimate", "judge")},
+        errors=dict(args.error),
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
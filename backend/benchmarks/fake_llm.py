@@ -0,0 +1,106 @@
+"""
+Offline stand-ins for the Anthropic clients used in backend/llm.py.
+
+They recognise the parse and estimate prompts built by llm.build_parse_prompt,
+llm.build_estimate_prompt and llm.build_batch_estimate_prompt and answer with canned JSON after an injected
+delay (and approve every eval judge prompt), so tests and load tests exercise the real request path without
+network.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# Per-100g profiles returned by the fake estimator
+FAKE_FOODS = {
+    "arhar dal": {"calories_per_100": 120, "protein_per_100": 7, "carbs_per_100": 18, "fats_per_100": 2,
+                  "micros": {"fiber_g": 3.0, "potassium_mg": 300, "iron_mg": 1.5}},
+    "rice": {"calories_per_100": 130, "protein_per_100": 3, "carbs_per_100": 28, "fats_per_100": 0,
+             "micros": {"fiber_g": 0.4, "potassium_mg": 35}},
+    "roti": {"calories_per_100": 240, "protein_per_100": 8, "carbs_per_100": 46, "fats_per_100": 3,
+             "micros": {"fiber_g": 4.0, "iron_mg": 2.0}},
+}
+DEFAULT_FOOD = {"calories_per_100": 100, "protein_per_100": 5, "carbs_per_100": 10, "fats_per_100": 5, "micros": {}}
+
+PARSE_INPUT_RE = re.compile(r'User Input: "(.*?)"\n', re.S)
+ESTIMATE_INPUT_RE = re.compile(r'of: "(.+?)"')
+BATCH_INPUT_RE = re.compile(r'EACH of these foods:\n(\[.*?\])\n')
+JUDGE_PROMPT_MARK = "You are an impartial judge"
+
+def fake_parse(raw_text):
+    """Split 'qty name, qty name' logs the way the parser prompt would."""
+    items = []
+    for part in raw_text.split(","):
+        qty, _, name = part.strip().partition(" ")
+        items.append({"name": name.strip().title(), "quantity": qty, "note": ""})
+    return {"items": items, "time": None, "confidence": "high"}
+
+def fake_estimate(food_name):
+    profile = FAKE_FOODS.get(food_name.lower(), DEFAULT_FOOD)
+    return {"default_unit": "g", **profile, "micros": dict(profile["micros"])}
+
+def fake_estimate_batch(food_names):
+    return {name: fake_estimate(name) for name in food_names}
+
+def canned_reply(prompt: str) -> str:
+    """JSON text the real model would be expected to return for a prompt."""
+    if prompt.startswith(JUDGE_PROMPT_MARK):
+        return "YES"
+    match = PARSE_INPUT_RE.search(prompt)
+    if match:
+        return json.dumps(fake_parse(match.group(1)))
+    match = ESTIMATE_INPUT_RE.search(prompt)
+    if match:
+        return json.dumps(fake_estimate(match.group(1)))
+    match = BATCH_INPUT_RE.search(prompt)
+    if match:
+        return json.dumps(fake_estimate_batch(json.loads(match.group(1))))
+    raise ValueError("Unrecognised prompt")
+
+def _message(prompt):
+    return SimpleNamespace(content=[SimpleNamespace(text=canned_reply(prompt))])
+
+class FakeAnthropic:
+    """Sync client stand-in that tracks how many calls are in flight."""
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.messages = self
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, max_tokens, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay_s)
+            return _message(messages[0]["content"])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+class FakeAsyncAnthropic:
+    """Async client stand-in: awaits the delay instead of blocking."""
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.messages = self
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, max_tokens, messages, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay_s)
+            return _message(messages[0]["content"])
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,94 @@
+"""
+Load test for the async ingestion path against a fake LLM with artificial delay.
+
+Fires --requests concurrent POST /log calls while a poller hits GET /dashboard,
+then reports log throughput, peak LLM calls in flight and dashboard latency
+under load. Everything runs in-process over ASGI against a scratch database.
+
+    python -m backend.benchmarks.load_async_log --requests 300 --llm-delay 1.0
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from backend import llm, main, services
+from backend.benchmarks.common import scratch_db, drop_db
+from backend.benchmarks.fake_llm import FakeAsyncAnthropic, fake_estimate
+
+FOODS = ["Arhar Dal", "Rice", "Roti"]
+
+async def poll_dashboard(client, stop, samples):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        res = await client.get("/dashboard", params={"date": "2026-01-15"})
+        res.raise_for_status()
+        samples.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.05)
+
+async def run(n_requests, llm_delay):
+    engine, SessionLocal, path = scratch_db()
+    # Known foods, so every request costs exactly one (fake) parse call
+    db = SessionLocal()
+    for name in FOODS:
+        services.create_food_item(db, dict(fake_estimate(name), name=name), source="seed")
+    db.close()
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    fake = FakeAsyncAnthropic(delay_s=llm_delay)
+    llm.async_client = fake
+    llm.log_trace = lambda *args, **kwargs: None
+    main.app.dependency_overrides[main.get_db] = get_db
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            stop = asyncio.Event()
+            dash_samples = []
+            poller = asyncio.create_task(poll_dashboard(client, stop, dash_samples))
+
+            t0 = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post("/log", json={"raw_text": f"100g {FOODS[i % len(FOODS)]}", "date": "2026-01-15"})
+                for i in range(n_requests)
+            ))
+            elapsed = time.perf_counter() - t0
+            stop.set()
+            await poller
+
+            # The rollup must agree with the entries it summarises
+            dash = (await client.get("/dashboard", params={"date": "2026-01-15"})).json()
+            rollup_ok = dash["totals"]["calories"] == sum(e["macros"]["calories"] for e in dash["entries"])
+    finally:
+        main.app.dependency_overrides.clear()
+        drop_db(engine, path)
+
+    failed = sum(1 for r in responses if r.status_code != 200 or "error" in (r.json().get("macros") or {}))
+    dash_samples.sort()
+    report = {
+        "requests": n_requests,
+        "llm_delay_s": llm_delay,
+        "wall_s": round(elapsed, 3),
+        "logs_per_s": round(n_requests / elapsed, 1),
+        "failed": failed,
+        "rollup_consistent": rollup_ok,
+        "peak_llm_in_flight": fake.max_in_flight,
+        "dashboard_p50_ms": round(statistics.median(dash_samples), 2) if dash_samples else None,
+        "dashboard_p95_ms": round(dash_samples[int(len(dash_samples) * 0.95)], 2) if dash_samples else None,
+    }
+    for key, value in report.items():
+        print(f"{key:>20}: {value}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--llm-delay", type=float, default=1.0, help="seconds per fake LLM call")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.llm_delay))
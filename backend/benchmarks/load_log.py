@@ -0,0 +1,199 @@
+"""
+End-to-end load generator for a running Helios server.
+
+Drives POST /log, POST /preview_log and GET /dashboard over real HTTP at a
+target request rate (open loop: arrivals keep their schedule however slow the
+server gets, up to --max-in-flight), then reports per endpoint the achieved
+throughput, p50/p95/p99 latency, failures by kind and SQLite lock errors
+("database is locked", whether surfaced as a 500 or in the fallback entry
+/log saves when processing fails).
+
+Pair it with the fake Anthropic server so LLM latency is realistic but free,
+and a scratch database so health.db is never touched:
+
+    python -m backend.benchmarks.fake_anthropic_server --port 8787 --error 529=0.01
+    HELIOS_DB_PATH=/tmp/helios_load.db python -m backend.init_db
+    HELIOS_DB_PATH=/tmp/helios_load.db HELIOS_LLM_BASE_URL=http://127.0.0.1:8787 \\
+        uvicorn backend.main:app --port 8000
+    python -m backend.benchmarks.load_log --url http://127.0.0.1:8000 --rps 20 --duration 60 \\
+        --llm-url http://127.0.0.1:8787
+
+Start the server with HELIOS_STORAGE_MODE=simple to compare the single
+default engine with the WAL + write queue mode (database.py).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+import httpx
+
+KNOWN_LOGS = ["100g Arhar Dal", "2 Roti, 1 katori Rice", "1 katori Arhar Dal, 2 Roti at 1pm", "200g Rice"]
+DEFAULT_MIX = "log=0.5,preview=0.2,dashboard=0.3"
+LOCK_MARKERS = ("database is locked", "database table is locked")
+
+def parse_mix(value: str) -> dict:
+    """'log=0.5,preview=0.2,dashboard=0.3' -> normalised weights per endpoint."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("log", "preview", "dashboard"):
+            raise ValueError(f"Unknown endpoint {name!r} in mix; use log, preview, dashboard")
+        mix[name.strip()] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Mix weights must add up to more than 0")
+    return {name: weight / total for name, weight in mix.items()}
+
+def percentile(sorted_samples: list, q: float):
+    if not sorted_samples:
+        return None
+    return round(sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))], 1)
+
+def classify(endpoint: str, response: httpx.Response) -> str:
+    """'ok', 'lock', 'llm_fallback' or 'http_<status>'."""
+    text = response.text
+    if any(marker in text for marker in LOCK_MARKERS):
+        return "lock"
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    if endpoint == "log" and "error" in (response.json().get("macros") or {}):
+        # /log saved its zero-macro fallback entry: processing (usually the LLM call) failed
+        return "llm_fallback"
+    return "ok"
+
+class LoadGenerator:
+    def __init__(self, url: str, rps: float, duration_s: float, mix: dict, new_food_rate: float = 0.1,
+                 max_in_flight: int = 500, timeout_s: float = 120, seed: int = 0, transport=None):
+        self.url = url
+        self.rps = rps
+        self.duration_s = duration_s
+        self.mix = mix
+        self.new_food_rate = new_food_rate
+        self.max_in_flight = max_in_flight
+        self.timeout_s = timeout_s
+        self.rng = random.Random(seed)
+        self.transport = transport            # e.g. httpx.ASGITransport to drive an app in-process
+        self.latencies = defaultdict(list)    # endpoint -> ms of completed requests
+        self.outcomes = defaultdict(Counter)  # endpoint -> outcome -> count
+        self.in_flight = 0
+        self.max_seen_in_flight = 0
+        self.shed = 0                         # arrivals skipped at max_in_flight
+        self.max_lag_ms = 0.0                 # how far the generator fell behind its schedule
+        self._new_foods = 0
+
+    def _log_text(self) -> str:
+        if self.rng.random() < self.new_food_rate:
+            # A food the catalog has never seen: costs an estimate call as well as the parse
+            self._new_foods += 1
+            return f"100g Load Test Food {self._new_foods}"
+        return self.rng.choice(KNOWN_LOGS)
+
+    def _request(self, client: httpx.AsyncClient, endpoint: str):
+        if endpoint == "dashboard":
+            return client.get("/dashboard")
+        path = "/log" if endpoint == "log" else "/preview_log"
+        return client.post(path, json={"raw_text": self._log_text()})
+
+    async def _fire(self, client, endpoint):
+        self.in_flight += 1
+        self.max_seen_in_flight = max(self.max_seen_in_flight, self.in_flight)
+        t0 = time.perf_counter()
+        try:
+            response = await self._request(client, endpoint)
+            outcome = classify(endpoint, response)
+            self.latencies[endpoint].append((time.perf_counter() - t0) * 1000)
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        self.outcomes[endpoint][outcome] += 1
+
+    async def run(self) -> dict:
+        endpoints, weights = list(self.mix), list(self.mix.values())
+        n_arrivals = int(self.rps * self.duration_s)
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(base_url=self.url, timeout=self.timeout_s, limits=limits,
+                                     transport=self.transport) as client:
+            tasks = []
+            start = time.perf_counter()
+            for i in range(n_arrivals):
+                delay = start + i / self.rps - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.max_lag_ms = max(self.max_lag_ms, -delay * 1000)
+                if self.in_flight >= self.max_in_flight:
+                    self.shed += 1
+                    continue
+                endpoint = self.rng.choices(endpoints, weights)[0]
+                tasks.append(asyncio.create_task(self._fire(client, endpoint)))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+        return self.report(n_arrivals, elapsed)
+
+    def report(self, n_arrivals: int, elapsed_s: float) -> dict:
+        endpoints = {}
+        for endpoint in self.mix:
+            samples = sorted(self.latencies[endpoint])
+            outcomes = self.outcomes[endpoint]
+            endpoints[endpoint] = {
+                "requests": sum(outcomes.values()),
+                "ok": outcomes["ok"],
+                "throughput_rps": round(outcomes["ok"] / elapsed_s, 2),
+                "p50_ms": percentile(samples, 0.50),
+                "p95_ms": percentile(samples, 0.95),
+                "p99_ms": percentile(samples, 0.99),
+                "max_ms": round(samples[-1], 1) if samples else None,
+                "lock_errors": outcomes["lock"],
+                "failures": {k: n for k, n in outcomes.items() if k != "ok"}
+            }
+        return {
+            "target_rps": self.rps,
+            "duration_s": self.duration_s,
+            "arrivals": n_arrivals,
+            "shed_at_max_in_flight": self.shed,
+            "wall_s": round(elapsed_s, 2),
+            "achieved_rps": round(sum(sum(c.values()) for c in self.outcomes.values()) / elapsed_s, 2),
+            "peak_in_flight": self.max_seen_in_flight,
+            "max_schedule_lag_ms": round(self.max_lag_ms, 1),
+            "sqlite_lock_errors": sum(e["lock_errors"] for e in endpoints.values()),
+            "endpoints": endpoints
+        }
+
+async def main(args):
+    generator = LoadGenerator(args.url, args.rps, args.duration, parse_mix(args.mix), args.new_food_rate,
+                              args.max_in_flight, args.timeout, args.seed)
+    report = await generator.run()
+    if args.llm_url:
+        async with httpx.AsyncClient(base_url=args.llm_url) as client:
+            report["fake_llm"] = (await client.get("/stats")).json()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return report
+    for key, value in report.items():
+        if key not in ("endpoints", "fake_llm"):
+            print(f"{key:>22}: {value}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"\n  {endpoint}")
+        for key, value in stats.items():
+            print(f"{key:>22}: {value}")
+    if "fake_llm" in report:
+        print(f"\n  fake LLM: {report['fake_llm']}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Helios server under test")
+    parser.add_argument("--rps", type=float, default=10.0, help="target requests per second, all endpoints")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint weights")
+    parser.add_argument("--new-food-rate", type=float, default=0.1,
+                        help="share of logs naming a food the catalog doesn't know yet")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-url", default=None, help="fake Anthropic server, to include its /stats")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,206 @@
+"""
+Data-scale benchmark suite with regression thresholds.
+
+For each scale (entries in a scratch database, default 10k, 100k and 1M) it
+fills the history with synthetic entries and the catalog with one synthetic
+food per ten entries, then times the hot paths:
+
+    read_dashboard       GET /dashboard for a fixed day
+    process_entry_text   parse + resolve + totals for a new log of catalog foods (LLM stubbed)
+    resolve_weight       quantity strings with portion units
+    delete_log           DELETE /log/{id}, rollup update included
+
+Results are written as JSON (--out). Against a saved baseline (--baseline),
+a metric whose median grew by more than its threshold (THRESHOLDS, or
+--threshold NAME=RATIO) counts as a regression and the suite exits 1, so it
+can gate CI. Differences under --min-delta-ms are treated as noise.
+
+    python -m backend.benchmarks.suite --save-baseline
+    python -m backend.benchmarks.suite --scales 10000 100000 --out bench.json --baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+from datetime import datetime
+from backend import catalog, food_index, import_foods, llm, main, models, nutrients, portions, services
+from backend.init_db import seed_portion_units
+from backend.benchmarks.common import BENCH_DATE, SAMPLE_MICROS, scratch_db, drop_db, fill_entries, time_call
+from backend.benchmarks.bench_food_match import catalog_names
+from backend.benchmarks.fake_llm import FakeAnthropic
+
+SCALES = [10_000, 100_000, 1_000_000]
+FOODS_PER_ENTRY = 0.1
+DELETE_DATE = "2026-02-01"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Allowed growth of each metric's median over the baseline, as a ratio (0.5 = 50% slower)
+THRESHOLDS = {
+    "read_dashboard": 0.5,
+    "process_entry_text": 0.5,
+    "resolve_weight": 1.0,     # the cheapest metric: scheduler noise is a large share of it
+    "delete_log": 0.5,
+}
+MIN_DELTA_MS = 0.05
+QUANTITIES = ["1 katori", "2 roti", "100g", "1 bowl", "3 tablespoon", "1.5 cup", "2 pieces", "250 ml", "1 plate"]
+# One token, so the (fake) parser keeps the food name intact and every food resolves from the catalog
+LOG_QUANTITIES = ["100g", "150g", "2", "250ml", "1.5"]
+
+def fill_foods(engine, n, seed=5):
+    """Insert n synthetic catalog foods (named like bench_food_match's). Returns their names."""
+    rng = random.Random(seed)
+    names = catalog_names(n)
+    created_at = datetime.now().isoformat(sep=" ")
+    micros, micros_packed = json.dumps(SAMPLE_MICROS), nutrients.pack(SAMPLE_MICROS)
+    rows = [(name, catalog.normalize_food_name(name), rng.randint(20, 600), rng.randint(0, 30),
+             rng.randint(0, 80), rng.randint(0, 40), micros, micros_packed, "g", created_at) for name in names]
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(import_foods.INSERT_SQL, rows)
+        raw.commit()
+    finally:
+        raw.close()
+    return names
+
+def add_deletable_entries(db, n):
+    """n entries on DELETE_DATE, inserted through the rollup path so deleting them is realistic."""
+    ids = []
+    for i in range(n):
+        ts = datetime.strptime(DELETE_DATE, "%Y-%m-%d").replace(hour=8 + i % 12)
+        entry = models.Entry(raw_text="synthetic meal", created_at=ts, ingested_at=ts, local_date=DELETE_DATE,
+                             macros={"calories": 300, "protein": 12.0, "carbs": 40.0, "fats": 9.0, "water_ml": 0,
+                                     "food_name": "Synthetic Meal", "micros": SAMPLE_MICROS},
+                             items=[models.EntryItem(name="Synthetic Meal", quantity="1 katori", weight_g=150.0,
+                                                     calories=300, protein=12.0, carbs=40.0, fats=9.0,
+                                                     micros=SAMPLE_MICROS)])
+        main.save_entry(db, entry)
+        ids.append(entry.id)
+    return ids
+
+def run_scale(n, repeat, warmup=2):
+    """Time every metric against a scratch database holding n entries."""
+    engine, SessionLocal, path = scratch_db()
+    fake = FakeAnthropic()
+    saved = llm.client, llm.log_trace
+    llm.client, llm.log_trace = fake, lambda *args, **kwargs: None
+    try:
+        fill_entries(engine, n)
+        names = fill_foods(engine, max(100, int(n * FOODS_PER_ENTRY)))
+        db = SessionLocal()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                seed_portion_units(db)
+            catalog.food_cache.invalidate()
+            food_index.load(db)
+            rng = random.Random(n)
+            results = {}
+
+            results["read_dashboard"] = time_call(lambda: main.read_dashboard(date=BENCH_DATE, db=db),
+                                                  repeat=repeat, warmup=warmup)
+
+            # A different log every call, so the parse cache never answers for the stubbed LLM
+            logs = iter([f"{rng.choice(LOG_QUANTITIES)} {rng.choice(names)}, {rng.choice(LOG_QUANTITIES)} "
+                         f"{rng.choice(names)}" for _ in range(repeat + warmup)])
+
+            def process():
+                services.process_entry_text(next(logs), db)
+                db.rollback()
+            results["process_entry_text"] = time_call(process, repeat=repeat, warmup=warmup)
+
+            quantities = QUANTITIES * 100
+            results["resolve_weight"] = time_call(lambda: [services.resolve_weight(q, db) for q in quantities],
+                                                  repeat=repeat, warmup=warmup)
+            results["resolve_weight"]["per_call_us"] = round(
+                results["resolve_weight"]["median_ms"] * 1000 / len(quantities), 3)
+
+            ids = iter(add_deletable_entries(db, repeat + warmup))
+            results["delete_log"] = time_call(lambda: main.delete_log(entry_id=next(ids), db=db),
+                                              repeat=repeat, warmup=warmup)
+            assert db.get(models.DailyTotals, DELETE_DATE).entry_count == 0
+            # Every log was parsed by the stub and every food came from the catalog
+            assert fake.calls == repeat + warmup
+        finally:
+            db.close()
+    finally:
+        llm.client, llm.log_trace = saved
+        catalog.food_cache.invalidate()
+        food_index.reset()
+        portions.reset()
+        drop_db(engine, path)
+    return results
+
+def run(scales, repeat):
+    print(f"{'entries':>10} | {'metric':>18} | {'median':>10} | {'p95':>10}")
+    print("-" * 58)
+    results = {}
+    for n in scales:
+        results[str(n)] = run_scale(n, repeat)
+        for metric, stats in results[str(n)].items():
+            print(f"{n:>10} | {metric:>18} | {stats['median_ms']:>7.3f} ms | {stats['p95_ms']:>7.3f} ms")
+    return {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results
+    }
+
+def compare(report: dict, baseline: dict, thresholds: dict = None, min_delta_ms: float = MIN_DELTA_MS) -> list:
+    """Metrics whose median regressed past their threshold, for every scale both runs measured."""
+    thresholds = {**THRESHOLDS, **(thresholds or {})}
+    regressions = []
+    for scale, metrics in report["results"].items():
+        for metric, stats in metrics.items():
+            base = baseline["results"].get(scale, {}).get(metric)
+            if base is None or metric not in thresholds:
+                continue
+            limit = base["median_ms"] * (1 + thresholds[metric])
+            if stats["median_ms"] > limit and stats["median_ms"] - base["median_ms"] > min_delta_ms:
+                regressions.append({"entries": int(scale), "metric": metric, "baseline_ms": base["median_ms"],
+                                    "median_ms": stats["median_ms"], "limit_ms": round(limit, 3),
+                                    "ratio": round(stats["median_ms"] / base["median_ms"], 2)
+                                    if base["median_ms"] else None})
+    return regressions
+
+def _threshold(value: str):
+    name, _, ratio = value.partition("=")
+    if name not in THRESHOLDS:
+        raise argparse.ArgumentTypeError(f"unknown metric {name!r}; one of {sorted(THRESHOLDS)}")
+    try:
+        return name, float(ratio)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=RATIO (e.g. read_dashboard=0.3), got {value!r}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="entries in the scratch database")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--out", default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help=f"compare against a saved run (default {os.path.relpath(DEFAULT_BASELINE)})")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help="save this run as the baseline")
+    parser.add_argument("--threshold", type=_threshold, action="append", default=[], metavar="NAME=RATIO",
+                        help="override a metric's allowed growth; repeatable")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS)
+    args = parser.parse_args()
+
+    report = run(args.scales, args.repeat)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), dict(args.threshold), args.min_delta_ms)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Results saved to {path}")
+    if args.baseline:
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['metric']} at {r['entries']} entries: {r['median_ms']} ms "
+                  f"vs baseline {r['baseline_ms']} ms (limit {r['limit_ms']} ms)")
+        if report["regressions"]:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
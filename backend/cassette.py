@@ -0,0 +1,185 @@
+"""
+Record/replay transport for Anthropic messages calls.
+
+Every module that talks to the model gets its client from make_client() /
+make_async_client(). HELIOS_LLM_MODE picks what that client does:
+
+    live    (default) the plain Anthropic client
+    record  call the API and append each response to the cassette
+    replay  answer from the cassette only: no network, no API key
+
+Responses are keyed by model plus a SHA-256 of the rest of the request
+(messages, system, max_tokens, ...), so a replayed eval run or legacy test
+sees exactly what was recorded, in milliseconds. A request missing from the
+cassette raises CassetteMiss in replay mode.
+
+The cassette (HELIOS_LLM_CASSETTE, default backend/cassettes/llm.jsonl) is
+JSON Lines, one recorded call per line, so re-recording only appends.
+
+HELIOS_LLM_BASE_URL sends live and record calls to another Messages API
+endpoint instead, such as the local fake server used for load tests
+(backend/benchmarks/fake_anthropic_server.py); no real API key is needed then.
+
+    HELIOS_LLM_MODE=record python -m backend.evals.run_evals
+    HELIOS_LLM_MODE=replay python -m backend.evals.run_evals
+    HELIOS_LLM_MODE=replay python -m pytest backend/test_flow.py backend/test_dashboard.py
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+import anthropic
+
+DEFAULT_CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "llm.jsonl")
+MODES = ("live", "record", "replay")
+
+def llm_mode() -> str:
+    # Read at client creation, after the callers' load_dotenv()
+    mode = os.environ.get("HELIOS_LLM_MODE", "live")
+    if mode not in MODES:
+        raise ValueError(f"HELIOS_LLM_MODE must be one of {MODES}, not {mode!r}")
+    return mode
+
+class CassetteMiss(Exception):
+    """Replay mode got a request that was never recorded."""
+
+def request_key(model: str, **params) -> str:
+    """'<model>:<sha256 of the canonical JSON of the other request params>'."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{model}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+class Cassette:
+    """Thread-safe key -> recorded response map, backed by a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._entries[entry["key"]] = entry["response"]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str):
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key: str, request: dict, response: dict):
+        entry = {"key": key, "recorded_at": datetime.now().isoformat(), "request": request, "response": response}
+        with self._lock:
+            self._entries[key] = response
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self.recorded += 1
+
+def _to_record(message) -> dict:
+    return {
+        "model": getattr(message, "model", None),
+        "stop_reason": getattr(message, "stop_reason", None),
+        "content": [{"type": "text", "text": block.text} for block in message.content if hasattr(block, "text")],
+        "usage": {"input_tokens": getattr(message.usage, "input_tokens", None),
+                  "output_tokens": getattr(message.usage, "output_tokens", None)}
+                 if getattr(message, "usage", None) is not None else None
+    }
+
+def _to_message(record: dict):
+    """Rebuild an object with the attributes callers read off a Message."""
+    usage = record.get("usage")
+    return SimpleNamespace(
+        model=record.get("model"),
+        stop_reason=record.get("stop_reason"),
+        content=[SimpleNamespace(**block) for block in record["content"]],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+class _Transport:
+    def __init__(self, inner, cassette: Cassette, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', not {mode!r}")
+        self.inner = inner
+        self.cassette = cassette
+        self.mode = mode
+        self.messages = self
+
+    def _replayed(self, model, params):
+        key = request_key(model, **params)
+        record = self.cassette.get(key)
+        if record is None and self.mode == "replay":
+            raise CassetteMiss(f"No recorded response for {key} in {self.cassette.path}; "
+                               f"record it with HELIOS_LLM_MODE=record")
+        return key, record
+
+class CassetteClient(_Transport):
+    """Sync stand-in for anthropic.Anthropic (messages.create only)."""
+
+    def create(self, model, **params):
+        key, record = self._replayed(model, params)
+        if record is None:
+            message = self.inner.messages.create(model=model, **params)
+            record = _to_record(message)
+            self.cassette.put(key, {"model": model, **params}, record)
+        return _to_message(record)
+
+class AsyncCassetteClient(_Transport):
+    """Async stand-in for anthropic.AsyncAnthropic (messages.create only)."""
+
+    async def create(self, model, **params):
+        key, record = self._replayed(model, params)
+        if record is None:
+            message = await self.inner.messages.create(model=model, **params)
+            record = _to_record(message)
+            self.cassette.put(key, {"model": model, **params}, record)
+        return _to_message(record)
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+def get_cassette(path: str = None) -> Cassette:
+    """One shared Cassette per file, so sync and async clients see each other's recordings."""
+    path = path or os.environ.get("HELIOS_LLM_CASSETTE", DEFAULT_CASSETTE)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+def _client_kwargs(api_key: str = None) -> dict:
+    base_url = os.environ.get("HELIOS_LLM_BASE_URL")
+    api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+    if not base_url:
+        return {"api_key": api_key}
+    # A local stand-in ignores the key, but the SDK refuses to send a request without one
+    return {"api_key": api_key or "local", "base_url": base_url}
+
+def make_client(api_key: str = None, mode: str = None):
+    """An Anthropic client for HELIOS_LLM_MODE (or mode)."""
+    mode = mode or llm_mode()
+    if mode == "live":
+        return anthropic.Anthropic(**_client_kwargs(api_key))
+    inner = anthropic.Anthropic(**_client_kwargs(api_key)) if mode == "record" else None
+    return CassetteClient(inner, get_cassette(), mode)
+
+def make_async_client(api_key: str = None, mode: str = None):
+    """An AsyncAnthropic client for HELIOS_LLM_MODE (or mode)."""
+    mode = mode or llm_mode()
+    if mode == "live":
+        return anthropic.AsyncAnthropic(**_client_kwargs(api_key))
+    inner = anthropic.AsyncAnthropic(**_client_kwargs(api_key)) if mode == "record" else None
+    return AsyncCassetteClient(inner, get_cassette(), mode)
@@ -0,0 +1,112 @@
+"""
+In-process cache of food catalog rows, keyed by normalized food name.
+
+Entries are immutable snapshots rather than ORM objects, so they can be
+shared across requests and sessions without being expired or detached.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import numpy as np
+from . import nutrients
+
+FOOD_CACHE_SIZE = 4096
+FOOD_CACHE_TTL_S = 600
+
+def normalize_food_name(name: str) -> str:
+    """Lowercase and collapse whitespace: 'Arhar  Dal ' -> 'arhar dal'."""
+    return " ".join(name.lower().split())
+
+class FoodSnapshot(NamedTuple):
+    """Read-only copy of a FoodItem row (same attribute names)."""
+    id: int
+    name: str
+    calories_per_100: int
+    protein_per_100: int
+    carbs_per_100: int
+    fats_per_100: int
+    micros: dict
+    default_unit: str
+    source: str
+    # Tracked micros per 100g as a nutrients vector; None means derive it from micros
+    micros_vector: Optional[np.ndarray] = None
+
+    def micros_per_100(self) -> np.ndarray:
+        return self.micros_vector if self.micros_vector is not None else nutrients.to_vector(self.micros)
+
+def snapshot(item) -> FoodSnapshot:
+    micros_vector = nutrients.unpack(item.micros_packed) if item.micros_packed else nutrients.to_vector(item.micros)
+    micros_vector.setflags(write=False)  # shared by every request the cache serves
+    return FoodSnapshot(
+        id=item.id,
+        name=item.name,
+        calories_per_100=item.calories_per_100,
+        protein_per_100=item.protein_per_100,
+        carbs_per_100=item.carbs_per_100,
+        fats_per_100=item.fats_per_100,
+        micros=dict(item.micros or {}),
+        default_unit=item.default_unit,
+        source=item.source,
+        micros_vector=micros_vector
+    )
+
+class CatalogCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_size: int = FOOD_CACHE_SIZE, ttl_s: float = FOOD_CACHE_TTL_S):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[FoodSnapshot]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: FoodSnapshot):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str = None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "db_round_trips_saved": self.hits,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+food_cache = CatalogCache()
@@ -0,0 +1,99 @@
+"""
+Offline fixtures: a scratch in-memory database and a stubbed LLM, so tests
+never touch health.db or the Anthropic API.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend import catalog, food_index, llm, local_parser, main, parse_cache, portions
+from backend.database import Base
+from backend.benchmarks.fake_llm import (FakeAnthropic, FakeAsyncAnthropic, fake_parse, fake_estimate,
+                                         fake_estimate_batch)
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    """Process-wide caches must not leak rows between scratch databases."""
+    monkeypatch.setattr(catalog, "food_cache", catalog.CatalogCache())
+    monkeypatch.setattr(parse_cache, "_counters", dict.fromkeys(parse_cache._counters, 0))
+    portions.reset()
+    food_index.reset()
+    yield
+    portions.reset()
+    food_index.reset()
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    calls = {"parse": [], "estimate": []}
+
+    def parse(raw_text):
+        calls["parse"].append(raw_text)
+        return fake_parse(raw_text)
+
+    def estimate(food_name, retry=False):
+        calls["estimate"].append(food_name)
+        return fake_estimate(food_name)
+
+    def estimate_batch(food_names):
+        calls["estimate"].extend(food_names)
+        return fake_estimate_batch(food_names)
+
+    async def aparse(raw_text):
+        return parse(raw_text)
+
+    async def aestimate(food_name, retry=False):
+        return estimate(food_name)
+
+    async def aestimate_batch(food_names):
+        return estimate_batch(food_names)
+
+    monkeypatch.setattr(llm, "parse_food_text", parse)
+    monkeypatch.setattr(llm, "estimate_metric_macros", estimate)
+    monkeypatch.setattr(llm, "aparse_food_text", aparse)
+    monkeypatch.setattr(llm, "aestimate_metric_macros", aestimate)
+    monkeypatch.setattr(llm, "estimate_batch", estimate_batch)
+    monkeypatch.setattr(llm, "aestimate_batch", aestimate_batch)
+    monkeypatch.setattr(llm, "log_trace", lambda *args, **kwargs: None)
+    return calls
+
+@pytest.fixture
+def llm_parser(monkeypatch):
+    """Turn off the local parser fast path so every log reaches the (fake) parse model."""
+    monkeypatch.setattr(local_parser, "ENABLED", False)
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """Install a fake (async) Anthropic client; call it with the latency to inject."""
+    def install(delay_s=0.0, is_async=False):
+        fake = FakeAsyncAnthropic(delay_s) if is_async else FakeAnthropic(delay_s)
+        monkeypatch.setattr(llm, "async_client" if is_async else "client", fake)
+        monkeypatch.setattr(llm, "log_trace", lambda *args, **kwargs: None)
+        return fake
+    return install
+
+@pytest.fixture
+def client(session_factory, fake_llm):
+    def get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    main.app.dependency_overrides[main.get_db] = get_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
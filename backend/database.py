@@ -1,17 +1,96 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import os
 from pathlib import Path
+from . import writer
 
 # Get absolute path to the directory this file is in
 BASE_DIR = Path(__file__).resolve().parent
-DB_PATH = BASE_DIR / "health.db"
+# HELIOS_DB_PATH points a server (e.g. under load test) at a scratch database
+DB_PATH = Path(os.environ.get("HELIOS_DB_PATH", BASE_DIR / "health.db"))
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-# connect_args={"check_same_thread": False} is needed for SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# "wal": WAL journaling, a query-only read pool and every write through the
+# writer.WriteQueue thread. "simple": one default engine, as before.
+STORAGE_MODE = os.environ.get("HELIOS_STORAGE_MODE", "wal")
+BUSY_TIMEOUT_MS = int(os.environ.get("HELIOS_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+READ_POOL_SIZE = int(os.environ.get("HELIOS_READ_POOL_SIZE", "16"))
+
+# Per-connection settings in WAL mode. synchronous=NORMAL is durable across
+# app crashes in WAL (only a power loss can drop the last commits).
+WAL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": BUSY_TIMEOUT_MS,
+    "synchronous": "NORMAL",
+    "cache_size": -16000,      # KiB, i.e. 16 MB of page cache per connection
+    "temp_store": "MEMORY",
+}
+
+def _on_connect(engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+def make_engines(path, mode: str = STORAGE_MODE):
+    """
+    (write engine, read engine) for a SQLite file. In simple mode both are
+    the same default engine. In WAL mode the write engine has one connection
+    and starts every transaction with BEGIN IMMEDIATE (so a writer waits on
+    busy_timeout up front instead of failing to upgrade a read lock), and
+    the read engine is a pool of query-only connections.
+    """
+    url = f"sqlite:///{path}"
+    if mode == "simple":
+        # connect_args={"check_same_thread": False} is needed for SQLite
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        return engine, engine
+    if mode != "wal":
+        raise ValueError(f"Unknown storage mode {mode!r}; use 'wal' or 'simple'")
+
+    write_engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=1, max_overflow=1)
+    _on_connect(write_engine, WAL_PRAGMAS)
+
+    @event.listens_for(write_engine, "connect")
+    def manual_transactions(dbapi_connection, connection_record):
+        # pysqlite's own implicit BEGIN can't be made IMMEDIATE and breaks SAVEPOINT
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(write_engine, "begin")
+    def begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    read_engine = create_engine(url, connect_args={"check_same_thread": False},
+                                pool_size=READ_POOL_SIZE, max_overflow=READ_POOL_SIZE)
+    _on_connect(read_engine, {**WAL_PRAGMAS, "query_only": 1})
+    return write_engine, read_engine
+
+def vacuum(engine):
+    """
+    VACUUM the database behind engine. It can't run inside a transaction, and
+    the WAL write engine begins one on every SQLAlchemy connection, so this
+    uses the raw DBAPI connection in autocommit mode.
+    """
+    raw = engine.raw_connection()
+    try:
+        dbapi_connection = raw.driver_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            dbapi_connection.execute("VACUUM")
+        finally:
+            dbapi_connection.isolation_level = isolation_level
+    finally:
+        raw.close()
+
+# engine takes the writes (scripts and migrations use it directly); request
+# sessions come from ReadSessionLocal
+engine, read_engine = make_engines(DB_PATH)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+write_queue = writer.register(engine, read_engine) if read_engine is not engine else None
 
 Base = declarative_base()
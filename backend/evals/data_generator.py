@@ -1,14 +1,17 @@
 import os
 import json
-import anthropic
+import sys
 from dotenv import load_dotenv
 
 # Adjust path to point to backend/.env
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
-client = anthropic.Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
+# Add parent dir to path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from backend.cassette import make_client
+
+client = make_client(api_key=os.environ.get("ANTHROPIC_API_KEY"))
 
 OUTPUT_FILE = os.path.join(os.path.dirname(__file__), "dataset_food_parsing.json")
 
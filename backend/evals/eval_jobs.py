@@ -0,0 +1,219 @@
+"""
+Eval suite runs as background jobs.
+
+POST /evals/run used to hold the request open while every example was
+parsed, then judged, then the macro cases estimated, one LLM call at a time.
+A run is now a job: each example's parse and judge calls, and each macro
+case, are tasks on a shared executor bounded by HELIOS_EVAL_CONCURRENCY.
+GET /evals/runs/{id} reports progress and the results so far (same shape as
+run_all_evals), and a run can be cancelled: tasks not yet started are
+dropped, calls in flight finish.
+
+Every run is saved as JSON under HELIOS_EVAL_RUNS_DIR (about once a second
+while it runs, and when it ends), so results survive a restart.
+"""
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Optional
+from backend.evals import run_evals
+from backend.evals.eval_utils import load_dataset, run_example
+
+EVAL_CONCURRENCY = int(os.environ.get("HELIOS_EVAL_CONCURRENCY", "4"))
+EVAL_RUNS_DIR = os.environ.get("HELIOS_EVAL_RUNS_DIR", os.path.join(os.path.dirname(__file__), "runs"))
+EVAL_DATASET = "dataset_food_parsing.json"
+PERSIST_INTERVAL_S = 1.0
+FINISHED = ("completed", "cancelled", "failed")
+RUN_ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+
+class EvalRun:
+    """One eval suite run; tasks record their outcome by example index."""
+
+    def __init__(self, run_id: str, dataset: list, macro_cases: list):
+        self.id = run_id
+        self.dataset = dataset
+        self.macro_cases = macro_cases
+        self.status = "queued"
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._assertions = {}             # example index -> failure record or None
+        self._verdicts = {}               # example index -> (passed, failure record or None)
+        self._macros = {}                 # case index -> failure record or None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def snapshot(self) -> dict:
+        """Status, progress and the results so far, as returned by the API and saved to disk."""
+        with self._lock:
+            assertions = [self._assertions[i] for i in sorted(self._assertions)]
+            verdicts = [self._verdicts[i] for i in sorted(self._verdicts)]
+            macros = [self._macros[i] for i in sorted(self._macros)]
+        failed_assertions = [f for f in assertions if f is not None]
+        failed_macros = [f for f in macros if f is not None]
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": {
+                "parse": {"done": len(assertions), "total": len(self.dataset)},
+                "judge": {"done": len(verdicts), "total": len(self.dataset)},
+                "macros": {"done": len(macros), "total": len(self.macro_cases)}
+            },
+            "results": {
+                "assertions": run_evals.summarize(len(assertions) - len(failed_assertions), len(assertions),
+                                                  failed_assertions),
+                "judge": run_evals.summarize(sum(ok for ok, _ in verdicts), len(verdicts),
+                                             [f for _, f in verdicts if f is not None]),
+                "macros": run_evals.summarize(len(macros) - len(failed_macros), len(macros), failed_macros)
+            }
+        }
+
+    def _run_example(self, i, example):
+        if self._cancelled.is_set():
+            return
+        result = run_example(run_evals.parse_food_text, example)
+        with self._lock:
+            self._assertions[i] = run_evals.check_parse_output(result)
+        if self._cancelled.is_set():
+            return
+        verdict = run_evals.judge_example(result)
+        with self._lock:
+            self._verdicts[i] = verdict
+
+    def _run_macro_case(self, i, case):
+        if self._cancelled.is_set():
+            return
+        try:
+            _, failure = run_evals.check_macro_case(case)
+        except Exception as e:
+            failure = {"input": case["food"], "output": None, "reason": f"Error: {e}"}
+        with self._lock:
+            self._macros[i] = failure
+
+    def execute(self, executor, save=lambda run: None):
+        """Run every task on executor, saving progress periodically. Blocks until done."""
+        self.status = "running"
+        self.started_at = datetime.now().isoformat()
+        save(self)
+        try:
+            pending = {executor.submit(self._run_example, i, example) for i, example in enumerate(self.dataset)}
+            pending |= {executor.submit(self._run_macro_case, i, case) for i, case in enumerate(self.macro_cases)}
+            last_saved = time.monotonic()
+            while pending:
+                done, pending = wait(pending, timeout=PERSIST_INTERVAL_S, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                if self._cancelled.is_set():
+                    for future in pending:
+                        future.cancel()
+                    # Calls already in flight finish; their outcomes are kept
+                    wait(pending)
+                    break
+                if time.monotonic() - last_saved >= PERSIST_INTERVAL_S:
+                    save(self)
+                    last_saved = time.monotonic()
+            self.status = "cancelled" if self._cancelled.is_set() else "completed"
+        except Exception as e:
+            print(f"Eval run {self.id} failed: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        self.finished_at = datetime.now().isoformat()
+        save(self)
+
+class EvalRunner:
+    """Submits, tracks and persists eval runs; one executor shared by all runs."""
+
+    def __init__(self, runs_dir: str = EVAL_RUNS_DIR, concurrency: int = EVAL_CONCURRENCY):
+        self.runs_dir = runs_dir
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="eval")
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, dataset: list = None, macro_cases: list = None) -> EvalRun:
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        run = EvalRun(run_id,
+                      load_dataset(EVAL_DATASET) if dataset is None else dataset,
+                      run_evals.MACRO_TEST_CASES if macro_cases is None else macro_cases)
+        with self._lock:
+            self._runs[run_id] = run
+        self._save(run)
+        threading.Thread(target=run.execute, args=(self._executor, self._save),
+                         name=f"eval-run-{run_id}", daemon=True).start()
+        return run
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """Snapshot of a run, from memory or (after a restart) from its saved file."""
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is not None:
+            return run.snapshot()
+        saved = self._load(run_id)
+        if saved is not None and saved["status"] not in FINISHED:
+            # Saved mid-run by a process that has since stopped
+            saved["status"] = "interrupted"
+        return saved
+
+    def cancel(self, run_id: str) -> Optional[dict]:
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is None:
+            return self.get(run_id)
+        run.cancel()
+        return run.snapshot()
+
+    def list_runs(self, limit: int = 20) -> list:
+        """Newest runs first, without failed examples."""
+        if not os.path.isdir(self.runs_dir):
+            return []
+        run_ids = sorted((name[:-5] for name in os.listdir(self.runs_dir)
+                          if name.endswith(".json") and RUN_ID_RE.match(name[:-5])), reverse=True)
+        runs = []
+        for run_id in run_ids[:limit]:
+            run = self.get(run_id)
+            if run is None:
+                continue
+            for result in run["results"].values():
+                result.pop("failed_examples", None)
+            runs.append(run)
+        return runs
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.runs_dir, f"{run_id}.json")
+
+    def _save(self, run: EvalRun):
+        try:
+            os.makedirs(self.runs_dir, exist_ok=True)
+            tmp = self._path(run.id) + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(run.snapshot(), f, indent=2)
+            os.replace(tmp, self._path(run.id))
+        except Exception as e:
+            print(f"Saving eval run {run.id} failed: {e}")
+
+    def _load(self, run_id: str) -> Optional[dict]:
+        if not RUN_ID_RE.match(run_id):
+            return None
+        try:
+            with open(self._path(run_id)) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+eval_runner = EvalRunner()
@@ -6,20 +6,19 @@ def load_dataset(filename):
     with open(filepath, "r") as f:
         return json.load(f)
 
+def run_example(func, example, input_key="input_text"):
+    try:
+        return {
+            "input": example,
+            "output": func(example[input_key]),
+            "error": None
+        }
+    except Exception as e:
+        return {
+            "input": example,
+            "output": None,
+            "error": str(e)
+        }
+
 def run_function_over_dataset(func, dataset, input_key="input_text"):
-    results = []
-    for example in dataset:
-        try:
-            output = func(example[input_key])
-            results.append({
-                "input": example,
-                "output": output,
-                "error": None
-            })
-        except Exception as e:
-            results.append({
-                "input": example,
-                "output": None,
-                "error": str(e)
-            })
-    return results
+    return [run_example(func, example, input_key) for example in dataset]
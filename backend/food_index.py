@@ -0,0 +1,183 @@
+"""
+Approximate food-name matching over the whole catalog.
+
+Exact lookups miss spelling variants ("Arhar Daal", "roti" vs "rotis",
+"arhar dal cooked"), and every miss costs an estimate call plus a duplicate
+FoodItem. This in-memory index of character trigrams finds the closest
+catalog name by Dice similarity. Overlaps are counted with one numpy
+bincount over the query's postings, and queries that can't reach the
+threshold stop early, so a lookup stays under a millisecond with 100k foods.
+A close score alone isn't enough: "moong dal halwa" shares most trigrams
+with "moong dal" but is another dish, so every word of either name must be
+a spelling of some word in the other.
+
+Like the portions index it is loaded once and kept current as foods are
+added; names that only differ by descriptors or plurals are remembered in
+the food_aliases table.
+"""
+import math
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import NamedTuple, Optional
+import numpy as np
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from . import models, writer
+
+MATCH_THRESHOLD = float(os.environ.get("HELIOS_FOOD_MATCH_THRESHOLD", "0.75"))
+# Words that don't change which catalog food is meant (the estimate prompt
+# already assumes standard preparation)
+DESCRIPTOR_WORDS = frozenset(["cooked", "homemade", "fresh", "plain", "regular", "normal"])
+# Dice similarity at which two single words count as spellings of each other ("daal", "dal")
+WORD_THRESHOLD = float(os.environ.get("HELIOS_FOOD_WORD_THRESHOLD", "0.5"))
+
+def match_key(normalized_name: str) -> str:
+    """Name as compared by the index: descriptors dropped, plurals singular."""
+    words = [w for w in normalized_name.split() if w not in DESCRIPTOR_WORDS] or normalized_name.split()
+    return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words)
+
+def trigrams(key: str) -> frozenset:
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _dice(a: str, b: str) -> float:
+    ga, gb = trigrams(a), trigrams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb)) if ga or gb else 1.0
+
+def similarity(a: str, b: str) -> float:
+    """Dice similarity of two normalized names, 1.0 for the same food."""
+    return _dice(match_key(a), match_key(b))
+
+def same_words(a: str, b: str) -> bool:
+    """
+    True when every word of each match key is a spelling of a word in the
+    other, so neither name adds a food the other lacks ("peanut butter
+    toast" vs "peanut butter").
+    """
+    words_a, words_b = a.split(), b.split()
+    return all(any(_dice(w, v) >= WORD_THRESHOLD for v in words_b) for w in words_a) \
+        and all(any(_dice(w, v) >= WORD_THRESHOLD for v in words_a) for w in words_b)
+
+class FoodMatch(NamedTuple):
+    food_id: int
+    name_normalized: str
+    score: float
+
+class FoodNameIndex:
+    """
+    Trigram inverted index. Foods get dense positions in insertion order;
+    postings are position lists, materialized as numpy arrays on first use so
+    a lookup is one bincount over the query's postings.
+    """
+
+    def __init__(self):
+        self._ids = []                    # position -> food id
+        self._names = {}                  # food id -> name_normalized
+        self._lengths = []                # position -> trigram count of its match key
+        self._postings = defaultdict(list)
+        self._arrays = {}                 # trigram -> postings as an int32 array
+        self._length_array = np.zeros(0, dtype=np.int32)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, food_id: int, name_normalized: str):
+        if not name_normalized:
+            return
+        grams = trigrams(match_key(name_normalized))
+        with self._lock:
+            if food_id in self._names:
+                return
+            position = len(self._ids)
+            self._ids.append(food_id)
+            self._names[food_id] = name_normalized
+            self._lengths.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(position)
+                self._arrays.pop(gram, None)
+
+    def name_of(self, food_id: int) -> Optional[str]:
+        return self._names.get(food_id)
+
+    def _query_arrays(self, query):
+        with self._lock:
+            arrays = []
+            for gram in query:
+                if gram not in self._postings:
+                    continue
+                array = self._arrays.get(gram)
+                if array is None:
+                    array = self._arrays[gram] = np.array(self._postings[gram], dtype=np.int32)
+                arrays.append(array)
+            if len(self._length_array) != len(self._lengths):
+                self._length_array = np.array(self._lengths, dtype=np.int32)
+            return arrays, self._length_array
+
+    def best_match(self, name_normalized: str, threshold: float = MATCH_THRESHOLD) -> Optional[FoodMatch]:
+        """Closest catalog food with Dice similarity >= threshold and the same words (same_words), or None."""
+        key = match_key(name_normalized)
+        query = trigrams(key)
+        n = len(query)
+        if not n:
+            return None
+        # Dice >= t needs at least this much overlap even with the shortest
+        # compatible name, so most misses stop before counting anything
+        min_len = math.ceil(threshold * n / (2 - threshold))
+        min_overlap = math.ceil(threshold * (n + min_len) / 2)
+        arrays, lengths = self._query_arrays(query)
+        if len(arrays) < min_overlap:
+            return None
+
+        overlap = np.bincount(np.concatenate(arrays))
+        candidates = np.flatnonzero(overlap >= min_overlap)
+        if not len(candidates):
+            return None
+        scores = 2 * overlap[candidates] / (n + lengths[candidates])
+        for best in np.argsort(-scores, kind="stable"):
+            if scores[best] < threshold:
+                break
+            food_id = self._ids[candidates[best]]
+            if same_words(key, match_key(self._names[food_id])):
+                return FoodMatch(food_id, self._names[food_id], round(float(scores[best]), 4))
+        return None
+
+_index: Optional[FoodNameIndex] = None
+
+def load(db: Session) -> FoodNameIndex:
+    """(Re)build the index from the food_items table and make it current."""
+    global _index
+    index = FoodNameIndex()
+    for food_id, name_normalized in db.query(models.FoodItem.id, models.FoodItem.name_normalized):
+        index.add(food_id, name_normalized)
+    _index = index
+    return _index
+
+def get_index(db: Session = None) -> FoodNameIndex:
+    """The current index, loading it on first use if startup didn't."""
+    if _index is None:
+        return load(db)
+    return _index
+
+def reset():
+    """Forget the loaded index (the next get_index call reloads it)."""
+    global _index
+    _index = None
+
+def remember_aliases(db: Session, aliases: dict, source: str = "normalized"):
+    """
+    Persist {alias normalized name: (food id, score)} so the next lookup is
+    an exact alias hit. Written in its own short transaction, best effort:
+    a lost alias only costs another fuzzy match.
+    """
+    if not aliases:
+        return
+    rows = [{"alias_normalized": alias, "food_item_id": food_id, "score": score, "source": source,
+             "created_at": datetime.utcnow()} for alias, (food_id, score) in aliases.items()]
+    try:
+        writer.write_apart(db, lambda session: session.execute(
+            sqlite_insert(models.FoodAlias).on_conflict_do_nothing(), rows))
+    except Exception as e:
+        print(f"Food alias write failed: {e}")
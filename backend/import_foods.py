@@ -0,0 +1,189 @@
+"""
+Pre-warm the food catalog from a local food composition table, so staples
+like rice, roti and dal never cost an estimate call.
+
+Reads CSV, JSON Lines or a JSON array of per-100g rows. Headers may use the
+catalog's own names (calories_per_100, fiber_g, ...) or common IFCT / USDA
+ones ("Energy (kcal)", "Total lipid (fat)", PROTCNT, ...). CSV and JSON Lines
+are streamed; rows are inserted in executemany batches as source="seed".
+Foods already in the catalog (by normalized name) are left untouched, so
+re-running an import is a no-op.
+
+    python -m backend.import_foods data/ifct2017.csv
+    python -m backend.import_foods data/usda_foundation.jsonl --batch-size 20000
+"""
+import argparse
+import csv
+import json
+import re
+import time
+from datetime import datetime
+from backend.database import engine as default_engine
+from backend import catalog, food_index, llm, nutrients
+
+BATCH_SIZE = 10_000
+
+# Catalog column -> accepted source headers, after _header_key()
+COLUMN_ALIASES = {
+    "name": ["name", "food", "food_name", "description", "food_description"],
+    "calories_per_100": ["calories_per_100", "calories", "kcal", "energy_kcal", "enerc_kcal"],
+    "protein_per_100": ["protein_per_100", "protein", "protein_g", "protcnt"],
+    "carbs_per_100": ["carbs_per_100", "carbs", "carbohydrate", "carbohydrate_g",
+                      "carbohydrate_by_difference", "choavldf"],
+    "fats_per_100": ["fats_per_100", "fat", "fats", "total_fat", "total_fat_g", "total_lipid_fat", "fatce"],
+    "default_unit": ["default_unit", "unit"],
+    "fiber_g": ["fiber_g", "fiber", "fibre", "dietary_fiber", "fiber_total_dietary", "fibtg"],
+    "sugar_g": ["sugar_g", "sugar", "sugars", "sugars_total", "fsugar"],
+    "sodium_mg": ["sodium_mg", "sodium", "sodium_na", "na"],
+    "potassium_mg": ["potassium_mg", "potassium", "potassium_k", "k"],
+    "calcium_mg": ["calcium_mg", "calcium", "calcium_ca", "ca"],
+    "iron_mg": ["iron_mg", "iron", "iron_fe", "fe"],
+    "vitamin_c_mg": ["vitamin_c_mg", "vitamin_c", "vitamin_c_total_ascorbic_acid", "vitc"],
+    "vitamin_a_iu": ["vitamin_a_iu", "vitamin_a"],
+    "cholesterol_mg": ["cholesterol_mg", "cholesterol", "chole"],
+    "saturated_fat_g": ["saturated_fat_g", "saturated_fat", "fatty_acids_total_saturated", "fasat"],
+}
+_COLUMN_FOR = {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+INSERT_SQL = ("INSERT INTO food_items (name, name_normalized, calories_per_100, protein_per_100, carbs_per_100, "
+              "fats_per_100, micros, micros_packed, default_unit, created_at, source) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'seed') ON CONFLICT DO NOTHING")
+
+def _header_key(header: str) -> str:
+    """'Total lipid (fat)' -> 'total_lipid_fat'."""
+    return re.sub(r"[^a-z0-9]+", "_", header.lower()).strip("_")
+
+def column_map(headers, positions: bool = False) -> dict:
+    """
+    {catalog column: source header} for the headers this importer understands.
+    With positions=True the header's index is stored instead, for CSV rows
+    read as lists.
+    """
+    mapping = {}
+    for position, header in enumerate(headers):
+        column = _COLUMN_FOR.get(_header_key(header))
+        if column and column not in mapping:
+            mapping[column] = position if positions else header
+    return mapping
+
+def _number(value):
+    """Table cell -> float, or None when blank/missing. 'Tr' (trace) counts as 0."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        if isinstance(value, str) and value.strip().lower() in ("tr", "trace"):
+            return 0.0
+        return None
+
+def row_builder(mapping: dict, created_at: str):
+    """
+    Compile a column map into record -> INSERT_SQL parameters (None when the
+    record lacks a name or a macro). The lookups are resolved once per file,
+    not once per row.
+    """
+    name_at = mapping.get("name")
+    macros_at = [mapping.get(key) for key in llm.MACRO_KEYS]
+    micros_at = [(key, mapping[key]) for key in llm.MICRO_KEYS if key in mapping]
+    unit_at = mapping.get("default_unit")
+    if name_at is None or None in macros_at:
+        return lambda record: None
+    encode = json.JSONEncoder().encode
+
+    def build(record):
+        try:
+            name = " ".join(str(record[name_at] or "").split())
+            macros = [_number(record[where]) for where in macros_at]
+            micros = {key: value for key, value in ((key, _number(record[where])) for key, where in micros_at)
+                      if value is not None and value >= 0}
+            unit = str(record[unit_at] or "g").strip().lower() if unit_at is not None else "g"
+        except (IndexError, KeyError):
+            return None
+        if not name or any(value is None or not value >= 0 for value in macros):
+            return None
+        return (name, catalog.normalize_food_name(name), *(round(value) for value in macros), encode(micros),
+                nutrients.pack(micros), unit if unit in ("g", "ml") else "g", created_at)
+    return build
+
+def read_records(path: str):
+    """Yield (record, column map) from a .csv, .jsonl or .json file."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            mapping = column_map(next(reader, []), positions=True)
+            for record in reader:
+                yield record, mapping
+        return
+    mappings = {}
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            # A JSON array has to be loaded whole; use JSON Lines for very large tables
+            records = json.load(f)
+        for record in records:
+            headers = tuple(record)
+            if headers not in mappings:
+                mappings[headers] = column_map(headers)
+            yield record, mappings[headers]
+
+def import_foods(path: str, engine=None, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Insert the foods in path that aren't in the catalog yet. Returns counts:
+    read, inserted, skipped (already in the catalog or repeated in the file)
+    and invalid (no name or a missing macro).
+    """
+    engine = engine or default_engine
+    created_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+    stats = {"read": 0, "inserted": 0, "skipped": 0, "invalid": 0}
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        # One explicit transaction: the WAL write engine's connections are in
+        # autocommit mode, where each row would otherwise commit on its own
+        cur.execute("BEGIN IMMEDIATE")
+        seen = {key for (key,) in cur.execute("SELECT name_normalized FROM food_items")}
+        batch = []
+        builders = {}
+        for record, mapping in read_records(path):
+            stats["read"] += 1
+            if id(mapping) not in builders:
+                builders[id(mapping)] = row_builder(mapping, created_at)
+            row = builders[id(mapping)](record)
+            if row is None:
+                stats["invalid"] += 1
+            elif row[1] in seen:
+                stats["skipped"] += 1
+            else:
+                seen.add(row[1])
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    stats["inserted"] += _insert(cur, batch)
+                    batch.clear()
+        if batch:
+            stats["inserted"] += _insert(cur, batch)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    stats["skipped"] = stats["read"] - stats["invalid"] - stats["inserted"]
+    catalog.food_cache.invalidate()
+    food_index.reset()
+    return stats
+
+def _insert(cur, batch) -> int:
+    before = cur.connection.total_changes
+    cur.executemany(INSERT_SQL, batch)
+    return cur.connection.total_changes - before
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="composition table (.csv, .jsonl or .json), values per 100 g/ml")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per executemany call")
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    stats = import_foods(args.path, batch_size=args.batch_size)
+    print(f"Read {stats['read']} rows in {time.perf_counter() - t0:.1f} s: {stats['inserted']} inserted, "
+          f"{stats['skipped']} already in the catalog, {stats['invalid']} without a name or macros.")
@@ -1,23 +1,35 @@
 import os
+import re
 import json
 import time
+import asyncio
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import anthropic
-from . import schemas
+from . import schemas, catalog, cassette, tracing, trace_store, trace_stats
+from .singleflight import AsyncSingleFlight
 
 # Load env vars
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
-client = anthropic.Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
+# Live, recording or replaying per HELIOS_LLM_MODE (see cassette.py)
+client = cassette.make_client(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+# Used by the async ingestion path (/log, /preview_log)
+async_client = cassette.make_async_client(api_key=os.environ.get("ANTHROPIC_API_KEY"))
 
 LOG_FILE = os.path.join(os.path.dirname(__file__), "llm_logs.jsonl")
+trace_writer = tracing.get_writer(LOG_FILE, store_path=trace_store.TRACE_DB)
+trace_writer.add_observer(trace_stats.collector)
+
+# Max LLM calls in flight for one log with several unknown foods
+ESTIMATE_CONCURRENCY = int(os.environ.get("HELIOS_ESTIMATE_CONCURRENCY", "4"))
+# Max foods per batched estimate call
+ESTIMATE_BATCH_SIZE = int(os.environ.get("HELIOS_ESTIMATE_BATCH_SIZE", "8"))
 
 def log_trace(func_name, input_data, output_data, latency_ms, model, error=None):
     """
-    Log LLM traces to a JSONL file for evaluation.
+    Log LLM traces to a JSONL file for evaluation (written in the background,
+    see tracing.TraceWriter).
     """
     trace = {
         "timestamp": datetime.datetime.now().isoformat(),
@@ -29,14 +41,8 @@ def log_trace(func_name, input_data, output_data, latency_ms, model, error=None)
         "error": str(error) if error else None
     }
     
-    # Ensure directory exists (though backend usually exists)
-    try:
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps(trace) + "\n")
-            f.flush()
-            os.fsync(f.fileno())
-    except Exception as e:
-        print(f"Logging failed: {e}")
+    # Queued for the background writer: no disk I/O (or fsync) on the request path
+    trace_writer.submit(trace)
 
 import dateutil.parser
 
@@ -63,13 +69,34 @@ def clean_time_string(time_str: str) -> str:
         print(f"Time parse error for '{time_str}': {e}")
         return None
 
-def parse_food_text(raw_text: str):
+# Explicit clock times in a log: "at 8 pm", "8:30AMM", "10 30 amm", "@ 20:00"
+TIME_PHRASE_RE = re.compile(
+    r"(?:\b(?:at|around|arond|about|by)\s+|@\s*)*"
+    r"(?:\b(\d{1,2})(?:[:.\s](\d{2}))?\s*([ap])\.?\s*m+\b\.?"
+    r"|\b(\d{1,2}):(\d{2})\b)",
+    re.IGNORECASE
+)
+
+def extract_time(raw_text: str):
     """
-    Step 1: Parse raw text into structured items using Haiku.
+    Find an explicit clock time in a log without calling the LLM.
+    Returns (text with time phrases removed, "HH:MM" or None).
     """
-    start_time = time.time()
-    
-    parse_prompt = f"""You are a food log parser. Break the user's messy food log into discrete, structured items with clear quantities.
+    match = TIME_PHRASE_RE.search(raw_text)
+    if not match:
+        return raw_text, None
+    hour, minute, meridiem, hour24, minute24 = match.groups()
+    if hour24 is not None:
+        time_str = clean_time_string(f"{hour24}:{minute24}")
+    else:
+        time_str = clean_time_string(f"{hour}:{minute or '00'} {meridiem.upper()}M")
+    return TIME_PHRASE_RE.sub(" ", raw_text), time_str
+
+PARSE_MODEL = "claude-3-haiku-20240307"
+ESTIMATE_MODEL = "claude-sonnet-4-5"  # Sonnet for better nutrition accuracy
+
+def build_parse_prompt(raw_text: str) -> str:
+    return f"""You are a food log parser. Break the user's messy food log into discrete, structured items with clear quantities.
 
 User Input: "{raw_text}"
 
@@ -95,45 +122,8 @@ JSON Schema:
     "confidence": "high|medium|low"
 }}"""
 
-    model_name = "claude-3-haiku-20240307"
-    try:
-        message = client.messages.create(
-            model=model_name,
-            max_tokens=800,
-            messages=[{"role": "user", "content": parse_prompt}]
-        )
-        content = message.content[0].text.strip()
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1].rsplit("```", 1)[0]
-        
-        result = json.loads(content.strip())
-        
-        # CLEAN TIME HERE
-        if result.get("time"):
-            result["time"] = clean_time_string(result["time"])
-        
-        # Log success
-        latency = (time.time() - start_time) * 1000
-        log_trace("parse_food_text", {"raw_text": raw_text}, result, latency, model_name)
-        
-        return result
-    except Exception as e:
-        print(f"Parse Error: {e}")
-        error_result = {"items": [{"name": raw_text, "quantity": "1 serving", "note": "Parse failed"}], "time": None}
-        
-        # Log error
-        latency = (time.time() - start_time) * 1000
-        log_trace("parse_food_text", {"raw_text": raw_text}, error_result, latency, model_name, error=e)
-        
-        return error_result
-
-def estimate_metric_macros(food_name: str):
-    """
-    Step 2: Get base nutritional info for 100g/ml of a specific food item.
-    """
-    start_time = time.time()
-    
-    prompt = f"""You are a nutrition database builder. 
+def build_estimate_prompt(food_name: str) -> str:
+    return f"""You are a nutrition database builder. 
 Provide standard nutritional values for 100 grams (or 100ml for liquids) of: "{food_name}".
 
 Rules:
@@ -164,39 +154,298 @@ JSON Schema:
     }}
 }}
 """
-    model_name = "claude-sonnet-4-5"  # Sonnet for better nutrition accuracy
+
+def build_batch_estimate_prompt(food_names: list) -> str:
+    return f"""You are a nutrition database builder.
+Provide standard nutritional values for 100 grams (or 100ml for liquids) of EACH of these foods:
+{json.dumps(food_names, ensure_ascii=False)}
+
+Rules:
+1. SPECIFICITY IS KEY. If the user asked for "Arhar Dal", do NOT provide generic "Dal". Provide stats for "Arhar Dal" specifically.
+2. Assume standard preparation (cooked for grains/meats, raw for fruits/veg unless specified).
+3. Be conservative/average.
+4. Return ONLY valid JSON: one object keyed by each food name EXACTLY as listed above.
+
+JSON Schema:
+{{
+    "<food name>": {{
+        "calories_per_100": int,
+        "protein_per_100": int,
+        "carbs_per_100": int,
+        "fats_per_100": int,
+        "default_unit": "g",  // or 'ml'
+        "micros": {{
+            "fiber_g": float,
+            "sugar_g": float,
+            "sodium_mg": int,
+            "potassium_mg": int,
+            "calcium_mg": int,
+            "iron_mg": float,
+            "vitamin_c_mg": int,
+            "vitamin_a_iu": int,
+            "cholesterol_mg": int,
+            "saturated_fat_g": float
+            // Add any other relevant micros here
+        }}
+    }}
+}}
+"""
+
+MACRO_KEYS = ("calories_per_100", "protein_per_100", "carbs_per_100", "fats_per_100")
+# The micros the estimate prompts ask for (models may add others)
+MICRO_KEYS = ("fiber_g", "sugar_g", "sodium_mg", "potassium_mg", "calcium_mg", "iron_mg",
+              "vitamin_c_mg", "vitamin_a_iu", "cholesterol_mg", "saturated_fat_g")
+
+def validate_macro_profile(profile):
+    """
+    A per-100g profile with numeric, non-negative macros (micros optional),
+    or None if the model returned something unusable for this food.
+    """
+    if not isinstance(profile, dict):
+        return None
+    for key in MACRO_KEYS:
+        value = profile.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            return None
+    micros = profile.get("micros")
+    return {
+        **profile,
+        "default_unit": profile.get("default_unit") if profile.get("default_unit") in ("g", "ml") else "g",
+        "micros": micros if isinstance(micros, dict) else {}
+    }
+
+def _message_json(message):
+    """Extract the JSON payload from a messages.create response."""
+    content = message.content[0].text.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1].rsplit("```", 1)[0]
+    return json.loads(content.strip())
+
+def _finish_parse(raw_text, start_time, message=None, error=None):
+    """Shared tail of the sync and async parsers: clean, log, fall back."""
+    latency = (time.time() - start_time) * 1000
+    if error is None:
+        try:
+            result = _message_json(message)
+            # CLEAN TIME HERE
+            if result.get("time"):
+                result["time"] = clean_time_string(result["time"])
+            # Log success
+            log_trace("parse_food_text", {"raw_text": raw_text}, result, latency, PARSE_MODEL)
+            return result
+        except Exception as e:
+            error = e
+
+    print(f"Parse Error: {error}")
+    error_result = {"items": [{"name": raw_text, "quantity": "1 serving", "note": "Parse failed"}], "time": None,
+                    "confidence": "low"}
+    # Log error
+    log_trace("parse_food_text", {"raw_text": raw_text}, error_result, latency, PARSE_MODEL, error=error)
+    return error_result
+
+def _finish_estimate(food_name, start_time, message=None, error=None, retry=False):
+    """
+    Shared tail of the sync and async estimators: decode, validate, log, fall
+    back. retry marks the trace of a food the batch call already counted.
+    """
+    latency = (time.time() - start_time) * 1000
+    input_data = {"food_name": food_name, "retry": True} if retry else {"food_name": food_name}
+    if error is None:
+        try:
+            result = validate_macro_profile(_message_json(message))
+            if result is None:
+                raise ValueError(f"Invalid macro profile for {food_name}")
+            # Log success
+            log_trace("estimate_metric_macros", input_data, result, latency, ESTIMATE_MODEL)
+            return result
+        except Exception as e:
+            error = e
+
+    print(f"Macro Estimation Error: {error}")
+    # Return safe defaults
+    error_result = {
+        "calories_per_100": 0,
+        "protein_per_100": 0, 
+        "carbs_per_100": 0, 
+        "fats_per_100": 0, 
+        "default_unit": "g",
+        "micros": {}
+    }
+    # Log error
+    log_trace("estimate_metric_macros", input_data, error_result, latency, ESTIMATE_MODEL, error=error)
+    return error_result
+
+def parse_food_text(raw_text: str):
+    """
+    Step 1: Parse raw text into structured items using Haiku.
+    """
+    start_time = time.time()
     try:
         message = client.messages.create(
-            model=model_name,
+            model=PARSE_MODEL,
             max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
+            messages=[{"role": "user", "content": build_parse_prompt(raw_text)}]
         )
-        content = message.content[0].text.strip()
-        if content.startswith("```"):
-             content = content.split("\n", 1)[1].rsplit("```", 1)[0]
-        
-        result = json.loads(content.strip())
-        
-        # Log success
-        latency = (time.time() - start_time) * 1000
-        log_trace("estimate_metric_macros", {"food_name": food_name}, result, latency, model_name)
-        
-        return result
+    except Exception as e:
+        return _finish_parse(raw_text, start_time, error=e)
+    return _finish_parse(raw_text, start_time, message)
 
+def estimate_metric_macros(food_name: str, retry: bool = False):
+    """
+    Step 2: Get base nutritional info for 100g/ml of a specific food item.
+    retry=True when a batch call already tried this food.
+    """
+    start_time = time.time()
+    try:
+        message = client.messages.create(
+            model=ESTIMATE_MODEL,
+            max_tokens=800,
+            messages=[{"role": "user", "content": build_estimate_prompt(food_name)}]
+        )
     except Exception as e:
-        print(f"Macro Estimation Error: {e}")
-        # Return safe defaults
-        error_result = {
-            "calories_per_100": 0,
-            "protein_per_100": 0, 
-            "carbs_per_100": 0, 
-            "fats_per_100": 0, 
-            "default_unit": "g",
-            "micros": {}
-        }
-        
-        # Log error
-        latency = (time.time() - start_time) * 1000
-        log_trace("estimate_metric_macros", {"food_name": food_name}, error_result, latency, "claude-sonnet-4-5", error=e)
-        
-        return error_result
+        return _finish_estimate(food_name, start_time, error=e, retry=retry)
+    return _finish_estimate(food_name, start_time, message, retry=retry)
+
+def _finish_estimate_batch(food_names, start_time, message=None, error=None):
+    """
+    Shared tail of the sync and async batch estimators. Returns
+    {food name: validated profile}; foods that are missing or invalid in the
+    reply are left out so the caller can retry just those.
+    """
+    latency = (time.time() - start_time) * 1000
+    profiles = {}
+    if error is None:
+        try:
+            result = _message_json(message)
+            if not isinstance(result, dict):
+                raise ValueError("Batch reply is not a JSON object")
+            # Match keys loosely: the model sometimes re-cases a name
+            by_key = {catalog.normalize_food_name(str(name)): profile for name, profile in result.items()}
+            for name in food_names:
+                profile = validate_macro_profile(by_key.get(catalog.normalize_food_name(name)))
+                if profile is not None:
+                    profiles[name] = profile
+            failed = [name for name in food_names if name not in profiles]
+            if failed:
+                error = f"Invalid or missing profiles: {', '.join(failed)}"
+        except Exception as e:
+            error = e
+
+    if error is not None:
+        print(f"Batch Estimation Error: {error}")
+    log_trace("estimate_batch", {"food_names": list(food_names)}, profiles, latency, ESTIMATE_MODEL, error=error)
+    return profiles
+
+def estimate_batch(food_names: list) -> dict:
+    """
+    Estimate several foods in one call: the rules and schema are sent once
+    instead of once per food. Returns {food name: profile} for the foods
+    that came back valid.
+    """
+    start_time = time.time()
+    try:
+        message = client.messages.create(
+            model=ESTIMATE_MODEL,
+            max_tokens=600 + 500 * len(food_names),
+            messages=[{"role": "user", "content": build_batch_estimate_prompt(food_names)}]
+        )
+    except Exception as e:
+        return _finish_estimate_batch(food_names, start_time, error=e)
+    return _finish_estimate_batch(food_names, start_time, message)
+
+def _chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), max(size, 1))]
+
+def _estimate_chunk(food_names: list) -> list:
+    """One batch call; foods that fail validation are retried one by one."""
+    if len(food_names) == 1:
+        return [estimate_metric_macros(food_names[0])]
+    profiles = estimate_batch(food_names)
+    return [profiles[name] if name in profiles else estimate_metric_macros(name, retry=True) for name in food_names]
+
+def estimate_many(food_names: list, max_workers: int = ESTIMATE_CONCURRENCY,
+                  batch_size: int = ESTIMATE_BATCH_SIZE) -> list:
+    """
+    Estimate several foods and return the results in input order: batches of
+    up to batch_size foods per call, at most max_workers calls at a time.
+    """
+    chunks = _chunks(list(food_names), batch_size)
+    if len(chunks) <= 1:
+        return [profile for chunk in chunks for profile in _estimate_chunk(chunk)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        return [profile for results in pool.map(_estimate_chunk, chunks) for profile in results]
+
+# ══════════════════════════════════════════════════
+# ASYNC VARIANTS (same prompts, non-blocking client)
+# ══════════════════════════════════════════════════
+
+async def aparse_food_text(raw_text: str):
+    """Async parse_food_text: awaits the LLM instead of blocking a thread."""
+    start_time = time.time()
+    try:
+        message = await async_client.messages.create(
+            model=PARSE_MODEL,
+            max_tokens=800,
+            messages=[{"role": "user", "content": build_parse_prompt(raw_text)}]
+        )
+    except Exception as e:
+        return await asyncio.to_thread(_finish_parse, raw_text, start_time, error=e)
+    # Trace logging touches the disk, keep it off the event loop
+    return await asyncio.to_thread(_finish_parse, raw_text, start_time, message)
+
+async def aestimate_metric_macros(food_name: str, retry: bool = False):
+    """Async estimate_metric_macros."""
+    start_time = time.time()
+    try:
+        message = await async_client.messages.create(
+            model=ESTIMATE_MODEL,
+            max_tokens=800,
+            messages=[{"role": "user", "content": build_estimate_prompt(food_name)}]
+        )
+    except Exception as e:
+        return await asyncio.to_thread(_finish_estimate, food_name, start_time, error=e, retry=retry)
+    return await asyncio.to_thread(_finish_estimate, food_name, start_time, message, retry=retry)
+
+async def aestimate_batch(food_names: list) -> dict:
+    """Async estimate_batch."""
+    start_time = time.time()
+    try:
+        message = await async_client.messages.create(
+            model=ESTIMATE_MODEL,
+            max_tokens=600 + 500 * len(food_names),
+            messages=[{"role": "user", "content": build_batch_estimate_prompt(food_names)}]
+        )
+    except Exception as e:
+        return await asyncio.to_thread(_finish_estimate_batch, food_names, start_time, error=e)
+    return await asyncio.to_thread(_finish_estimate_batch, food_names, start_time, message)
+
+async def _aestimate_chunk(food_names: list) -> list:
+    if len(food_names) == 1:
+        return [await aestimate_metric_macros(food_names[0])]
+    profiles = await aestimate_batch(food_names)
+    retries = [name for name in food_names if name not in profiles]
+    for name, profile in zip(retries, await asyncio.gather(*(aestimate_metric_macros(n, retry=True) for n in retries))):
+        profiles[name] = profile
+    return [profiles[name] for name in food_names]
+
+# Keyed by normalized food name, shared by every request on the event loop
+estimate_flights = AsyncSingleFlight()
+
+async def aestimate_many(food_names: list, max_concurrency: int = ESTIMATE_CONCURRENCY,
+                         batch_size: int = ESTIMATE_BATCH_SIZE) -> list:
+    """
+    Async estimate_many: batched, bounded by a semaphore, results in input
+    order. A food already being estimated for another request joins that
+    call instead of starting a new one.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(chunk):
+        async with semaphore:
+            return await _aestimate_chunk(chunk)
+
+    async def run(names):
+        results = await asyncio.gather(*(bounded(chunk) for chunk in _chunks(names, batch_size)))
+        return [profile for chunk in results for profile in chunk]
+
+    return await estimate_flights.do_many([(catalog.normalize_food_name(name), name) for name in food_names], run)
@@ -0,0 +1,122 @@
+"""
+Deterministic fast path for already-structured food logs.
+
+Logs like "100g Arhar Dal" or "Lunch: 2 katori rice, 3 roti at 8 pm" don't
+need the parse model. This grammar handles quantity + unit + food item lists
+and clock times, using the same unit vocabulary as resolve_weight and the
+same time cleaning as the LLM parser, and returns the parse_food_text schema.
+Anything it isn't sure about comes back with confidence "low" so the caller
+falls back to the LLM.
+"""
+import os
+import re
+from sqlalchemy.orm import Session
+from . import llm, portions
+
+# Set HELIOS_LOCAL_PARSER=0 to send every log to the parse model
+ENABLED = os.environ.get("HELIOS_LOCAL_PARSER", "1") != "0"
+
+# A leading meal label is dropped; like the LLM parser, it doesn't imply a time
+MEAL_LABEL_RE = re.compile(r"^\s*(?:(?:i\s+)?(?:had|ate)\s+)?(breakfast|lunch|dinner|snacks?)\s*[:\-]\s*", re.I)
+ITEM_SPLIT_RE = re.compile(r"\s*(?:,|;|&|\+|\band\b|\bwith\b)\s*", re.I)
+# "2", "1.5", "1/2", then an optional unit glued on ("100g") or separate ("2 katori")
+ITEM_RE = re.compile(
+    r"^(?P<qty>\d+(?:\.\d+)?(?:/\d+)?|a|an|one|two|three|four|five|half)?\s*"
+    r"(?:(?<=\d)(?P<glued>[a-z]+)\s+|(?P<unit>[a-z]+)\s+(?P<of>of\s+)?)?"
+    r"(?P<name>[a-z][a-z' \-]*)$",
+    re.I
+)
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "half": 0.5}
+# Words that mean the log is prose, not a list of foods
+PROSE_WORDS = frozenset(["i", "had", "ate", "my", "some", "the", "made", "from", "bought", "inside",
+                         "for", "in", "at", "about", "around", "little", "few", "bit", "lots"])
+MAX_NAME_WORDS = 4
+
+def _unit_vocabulary(db: Session = None) -> frozenset:
+    index = portions.get_index(db)
+    return frozenset(index.units) | frozenset(alias for alias, _ in index.aliases) \
+        | portions.GRAM_UNITS | portions.ML_UNITS | portions.KG_UNITS
+
+def _known_unit(word: str, vocabulary: frozenset):
+    """The unit as written if word is a (plural of a) known unit, else None."""
+    word = word.lower()
+    for candidate in (word, word[:-1] if word.endswith("s") else None, word[:-2] if word.endswith("es") else None):
+        if candidate and candidate in vocabulary:
+            return word
+    return None
+
+def _amount(qty: str) -> float:
+    qty = qty.lower()
+    if qty in NUMBER_WORDS:
+        return NUMBER_WORDS[qty]
+    if "/" in qty:
+        numerator, denominator = qty.split("/")
+        return float(numerator) / float(denominator) if float(denominator) else 0
+    return float(qty)
+
+def _format_amount(amount: float) -> str:
+    return str(int(amount)) if amount == int(amount) else f"{amount:g}"
+
+def parse_item(text: str, vocabulary: frozenset):
+    """(item dict, explicit number?) for one "qty unit name" chunk, or None."""
+    match = ITEM_RE.match(text.strip())
+    if not match:
+        return None
+    qty, unit, name = match.group("qty"), match.group("glued") or match.group("unit"), match.group("name")
+    words = name.lower().split()
+    if unit and not _known_unit(unit, vocabulary):
+        # "2 boiled eggs": the word after the number is part of the name
+        words = [unit.lower()] + words
+        # "100x rice", or "2 handfuls of nuts": an unknown unit, not a name
+        if match.group("glued") or match.group("of"):
+            return None
+        unit = None
+    if not words or len(words) > MAX_NAME_WORDS or PROSE_WORDS.intersection(words) or "of" in words:
+        return None
+    if qty is None and unit is None:
+        return None  # no quantity at all: leave the portion guess to the LLM
+    if all(_known_unit(word, vocabulary) for word in words):
+        return None  # "1 cup": a unit with no food named
+    amount = _amount(qty) if qty else 1
+    if amount <= 0:
+        return None
+
+    if unit:
+        quantity = f"{_format_amount(amount)} {unit.lower()}"
+    else:
+        quantity = f"{_format_amount(amount)} {'piece' if amount == 1 else 'pieces'}"
+    item = {"name": " ".join(words).title(), "quantity": quantity}
+    return item, bool(qty) and qty[0].isdigit()
+
+def parse_food_text_local(raw_text: str, db: Session = None) -> dict:
+    """
+    Same result schema as llm.parse_food_text. confidence is "high" when every
+    item has a numeric quantity, "medium" when some rely on "a"/"an" or a bare
+    unit ("bowl of rice"), and "low" (with no items) when the text doesn't fit
+    the grammar.
+    """
+    low = {"items": [], "time": None, "confidence": "low"}
+    if not ENABLED:
+        return low
+    text, time_str = llm.extract_time(raw_text)
+
+    label = MEAL_LABEL_RE.match(text)
+    if label:
+        text = text[label.end():]
+
+    chunks = [chunk for chunk in ITEM_SPLIT_RE.split(text.strip().strip(".!")) if chunk.strip()]
+    if not chunks:
+        return low
+
+    vocabulary = _unit_vocabulary(db)
+    items = []
+    all_numeric = True
+    for chunk in chunks:
+        parsed = parse_item(chunk, vocabulary)
+        if parsed is None:
+            return low
+        item, numeric = parsed
+        items.append(item)
+        all_numeric = all_numeric and numeric
+
+    return {"items": items, "time": time_str, "confidence": "high" if all_numeric else "medium"}
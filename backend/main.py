@@ -1,10 +1,23 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import List
-from . import models, schemas, database
+from . import models, schemas, database, catalog, portions, parse_cache, previews, food_index, tracing, trace_store, trace_stats, nutrients, writer
 
-app = FastAPI(title="Helios API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload the in-memory indexes; on shutdown, write out queued traces and database writes."""
+    load_portion_units()
+    load_food_index()
+    yield
+    flush_traces()
+    drain_writes()
+
+app = FastAPI(title="Helios API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,22 +25,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Dependency
+# Dependency: reads go through this session, writes through writer.write()
 def get_db():
-    db = database.SessionLocal()
+    db = database.ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def load_portion_units():
+    """Preload portion units so resolving quantities never queries the DB."""
+    db = database.ReadSessionLocal()
+    try:
+        portions.load(db)
+    except Exception as e:
+        # Table may not exist yet (init_db not run); resolve_weight loads lazily
+        print(f"Portion unit preload skipped: {e}")
+    finally:
+        db.close()
+
+def load_food_index():
+    """Build the fuzzy food-name index up front instead of on the first unknown food."""
+    db = database.ReadSessionLocal()
+    try:
+        food_index.load(db)
+    except Exception as e:
+        print(f"Food index preload skipped: {e}")
+    finally:
+        db.close()
+
+def flush_traces():
+    """Write out traces still queued for llm_logs.jsonl before the process exits."""
+    tracing.close_all()
+
+def drain_writes():
+    """Commit the writes still queued for the database."""
+    if database.write_queue is not None:
+        database.write_queue.close()
+
 @app.get("/")
 def read_root():
     return {"status": "Helios Backend is running"}
 
 import os
-import json
 import dateutil.parser
 from datetime import datetime
 from dotenv import load_dotenv
@@ -36,6 +79,11 @@ from . import services
 # Load env vars
 load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 
+@app.exception_handler(services.PendingMigrationError)
+def pending_migration(request, exc):
+    """Totals of entries that predate entry_items would read as zero: refuse instead."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 # ══════════════════════════════════════════════════
 # STEP 1: Parse raw text into structured items
 # ══════════════════════════════════════════════════
@@ -46,32 +94,62 @@ class ParseRequest(schemas.BaseModel):
 def parse_food_text(req: ParseRequest):
     return services.llm.parse_food_text(req.raw_text)
 
+def save_entry(db: Session, db_entry: models.Entry) -> models.Entry:
+    """Insert an entry and its rollup delta (plus any foods learned for it) in one commit."""
+    def insert(session):
+        session.add(db_entry)
+        services.apply_entry_to_totals(session, db_entry)
+        session.flush()
+        return db_entry
+
+    writer.write(db, insert)
+    if db_entry in db:
+        db.refresh(db_entry)
+    return db_entry
+
 @app.post("/preview_log")
-def preview_log(entry: schemas.EntryBase, db: Session = Depends(get_db)):
+async def preview_log(entry: schemas.EntryBase, db: Session = Depends(get_db)):
     """
-    Analyze text and return structured data with nutrients,
-    BUT DO NOT save to the database.
+    Analyze text and return structured data with nutrients. The entry
+    itself is NOT saved; catalog foods learned along the way are kept.
     """
-    processed_data = services.process_entry_text(entry.raw_text, db)
-    return processed_data
+    processed_data = await services.aprocess_entry_text(entry.raw_text, db)
+    # Keep any foods learned while previewing
+    await run_in_threadpool(db.commit)
+    # /log can redeem the token instead of processing the text again
+    token = previews.preview_store.put(entry.raw_text, processed_data)
+    return {**processed_data, "preview_token": token, "expires_in": previews.preview_store.ttl_s}
 
 @app.post("/log", response_model=schemas.Entry)
-def create_log(entry: schemas.EntryCreate, db: Session = Depends(get_db)):
+async def create_log(entry: schemas.EntryCreate, db: Session = Depends(get_db)):
+    # LLM calls are awaited and DB work runs in the threadpool, so slow
+    # LLM round trips never pin a worker thread
+
     # 1. Base date from user or now
+    now = services.local_now()
     if entry.date:
         base_date = datetime.strptime(entry.date, "%Y-%m-%d")
     else:
-        base_date = datetime.now()
+        base_date = now
     
     # Default to current time if no specific time found
-    final_ingested_at = datetime.now()
+    final_ingested_at = now
     # If historical date, default to 12:00 PM
-    if entry.date and entry.date != datetime.now().strftime("%Y-%m-%d"):
+    if entry.date and entry.date != now.strftime("%Y-%m-%d"):
          final_ingested_at = base_date.replace(hour=12, minute=0, second=0)
 
     try:
-        # Use new services to process text
-        processed_data = services.process_entry_text(entry.raw_text, db)
+        # Reviewed items skip the parse; an unedited preview skips the LLM
+        # entirely; anything else is processed from the text
+        processed_data = None
+        if entry.items:
+            _, item_time = services.llm.extract_time(entry.raw_text)
+            processed_data = await services.aprocess_items(
+                [item.model_dump() for item in entry.items], item_time, db)
+        elif entry.preview_token:
+            processed_data = previews.preview_store.pop(entry.preview_token, entry.raw_text)
+        if processed_data is None:
+            processed_data = await services.aprocess_entry_text(entry.raw_text, db)
         
         # Merge Time Logic
         ai_time = processed_data.get("time")
@@ -96,6 +174,7 @@ def create_log(entry: schemas.EntryCreate, db: Session = Depends(get_db)):
             raw_text=entry.raw_text,
             created_at=datetime.now(),
             ingested_at=final_ingested_at,
+            local_date=services.local_day(final_ingested_at),
             macros={
                 "calories": processed_data["total_macros"]["calories"],
                 "protein": processed_data["total_macros"]["protein"],
@@ -103,22 +182,23 @@ def create_log(entry: schemas.EntryCreate, db: Session = Depends(get_db)):
                 "fats": processed_data["total_macros"]["fats"],
                 "water_ml": processed_data["total_macros"]["water_ml"],
                 "food_name": processed_data.get("food_name", "Unknown"),
-                "items": processed_data.get("items", []),
                 "micros": processed_data.get("micros", {}) 
-            }
+            },
+            # Stored as entry_items rows, not in the macros blob
+            items=[models.EntryItem.from_processed(item, i)
+                   for i, item in enumerate(processed_data.get("items", []))]
         )
         
-        db.add(db_entry)
-        db.commit()
-        db.refresh(db_entry)
-        return db_entry
+        return await run_in_threadpool(save_entry, db, db_entry)
 
     except Exception as e:
         print(f"Error processing log: {e}")
+        await run_in_threadpool(db.rollback)
         # Fallback
         fallback_entry = models.Entry(
             raw_text=entry.raw_text, 
             ingested_at=final_ingested_at,
+            local_date=services.local_day(final_ingested_at),
             macros={
                 "error": str(e),
                 "calories": 0,
@@ -126,63 +206,29 @@ def create_log(entry: schemas.EntryCreate, db: Session = Depends(get_db)):
                 "carbs": 0,
                 "fats": 0,
                 "water_ml": 0,
-                "food_name": entry.raw_text,
-                "items": []
+                "food_name": entry.raw_text
             }
         )
-        db.add(fallback_entry)
-        db.commit()
-        db.refresh(fallback_entry)
-        return fallback_entry
+        return await run_in_threadpool(save_entry, db, fallback_entry)
 
 @app.get("/dashboard")
 def read_dashboard(date: str = None, db: Session = Depends(get_db)):
     if not date:
-        date = datetime.now().strftime("%Y-%m-%d")
+        date = services.local_now().strftime("%Y-%m-%d")
     
     # query daily goal
     goal = db.query(models.DailyGoal).filter(models.DailyGoal.date == date).first()
     if not goal:
-        # Create default goal if not exists
-        goal = models.DailyGoal(date=date)
-        db.add(goal)
-        db.commit()
-        db.refresh(goal)
-
-    # query entries for the day (using string comparison for simplicity with sqlite)
-    entries = db.query(models.Entry).all()
-    
-    today_entries = []
-    for e in entries:
-        if e.ingested_at:
-             if e.ingested_at.strftime("%Y-%m-%d") == date:
-                 today_entries.append(e)
-    
-    # Aggregate
-    total_calories = 0
-    total_protein = 0
-    total_carbs = 0
-    total_fats = 0
-    total_water = 0
+        # Create default goal if not exists; concurrent first loads of a day both get here
+        writer.write(db, lambda session: session.execute(
+            sqlite_insert(models.DailyGoal).values(date=date).on_conflict_do_nothing()))
+        goal = db.get(models.DailyGoal, date)
+
+    # query entries for the day (on the indexed local_date)
+    today_entries = services.get_entries_for_day(db, date)
     
-    # Init Micros
-    total_micros = {}
-
-    for e in today_entries:
-        if e.macros:
-            total_calories += e.macros.get("calories", 0)
-            total_protein += e.macros.get("protein", 0)
-            total_carbs += e.macros.get("carbs", 0)
-            total_fats += e.macros.get("fats", 0)
-            total_water += e.macros.get("water_ml", 0)
-            
-            # Aggregate Micros
-            entry_micros = e.macros.get("micros", {})
-            if entry_micros:
-                for k, v in entry_micros.items():
-                    total_micros[k] = total_micros.get(k, 0) + v
-                    # Round for display
-                    total_micros[k] = round(total_micros[k], 2)
+    # Totals come from the day's rollup row, rounded only for display
+    totals = services.get_daily_totals(db, date)
     
     return {
         "date": date,
@@ -192,58 +238,161 @@ def read_dashboard(date: str = None, db: Session = Depends(get_db)):
             "water_ml": goal.water_target_ml
         },
         "totals": {
-            "calories": total_calories,
-            "protein": total_protein,
-            "carbs": total_carbs,
-            "fats": total_fats,
-            "water_ml": total_water,
-            "micros": total_micros
+            "calories": round(totals.calories),
+            "protein": round(totals.protein, 1),
+            "carbs": round(totals.carbs, 1),
+            "fats": round(totals.fats, 1),
+            "water_ml": round(totals.water_ml),
+            "micros": nutrients.canonical(totals.micros, 2)
         },
-        "entries": today_entries
+        "entries": [schemas.Entry.model_validate(e) for e in today_entries]
+    }
+
+@app.get("/dashboard/range")
+def read_dashboard_range(start: str, end: str, bucket: str = "day", db: Session = Depends(get_db)):
+    """
+    Totals per day, week or month between two dates (inclusive), so trend
+    charts need one request instead of one /dashboard call per day.
+    Bucket boundaries are clipped to the requested range.
+    """
+    if bucket not in services.RANGE_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(services.RANGE_BUCKETS)}")
+    try:
+        first = datetime.strptime(start, "%Y-%m-%d")
+        last = datetime.strptime(end, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be YYYY-MM-DD")
+    if last < first:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (last - first).days >= services.MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"range is limited to {services.MAX_RANGE_DAYS} days")
+
+    return {
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "buckets": services.get_range_totals(db, start, end, bucket)
     }
 
 @app.delete("/log/{entry_id}")
 def delete_log(entry_id: int, db: Session = Depends(get_db)):
-    entry = db.query(models.Entry).filter(models.Entry.id == entry_id).first()
-    if not entry:
+    def delete(session):
+        entry = session.get(models.Entry, entry_id)
+        if not entry:
+            return False
+        services.apply_entry_to_totals(session, entry, sign=-1)
+        session.delete(entry)
+        return True
+
+    if not writer.write(db, delete):
         raise HTTPException(status_code=404, detail="Entry not found")
-    
-    db.delete(entry)
-    db.commit()
     return {"message": "Entry deleted"}
 
+@app.get("/catalog/stats")
+def read_catalog_stats():
+    """Food catalog cache counters (each hit is one skipped DB round trip)."""
+    return {**catalog.food_cache.stats(), "estimates": services.llm.estimate_flights.stats()}
+
+@app.post("/catalog/aliases", response_model=schemas.FoodAlias)
+def create_food_alias(alias: schemas.FoodAliasCreate, db: Session = Depends(get_db)):
+    """Teach the catalog another name for a food, e.g. "Toor Dal" -> "Arhar Dal"."""
+    key = catalog.normalize_food_name(alias.alias)
+    if db.query(models.FoodItem).filter(models.FoodItem.name_normalized == key).first():
+        raise HTTPException(status_code=400, detail=f"'{alias.alias}' is already a catalog food")
+    db_alias = services.create_food_alias(db, alias.alias, alias.food_name)
+    if db_alias is None:
+        raise HTTPException(status_code=404, detail=f"Food '{alias.food_name}' not found")
+    return db_alias
+
+@app.get("/parse_cache/stats")
+def read_parse_cache_stats(db: Session = Depends(get_db)):
+    """Parse cache hit rate, size and evictions (each hit skips one parse call)."""
+    return parse_cache.get_stats(db)
+
 # ══════════════════════════════════════════════════
 # EVALS DASHBOARD API
 # ══════════════════════════════════════════════════
 
 @app.get("/evals/logs")
-def get_llm_logs():
-    """Return the last 50 LLM trace logs."""
-    log_file = os.path.join(os.path.dirname(__file__), "llm_logs.jsonl")
-    logs = []
-    if os.path.exists(log_file):
+def get_llm_logs(response: Response, limit: int = 50, cursor: int = None, function: str = None,
+                 model: str = None, error: bool = None, since: str = None, until: str = None):
+    """
+    LLM traces, newest first, optionally filtered by function, model, error
+    (true/false) and timestamp range. When there are older matches the
+    X-Next-Cursor header holds the cursor for the next page.
+    """
+    trace_writer = services.llm.trace_writer
+    # Traces are written in the background; include the ones still queued
+    trace_writer.flush(timeout=1.0)
+    filters = {"limit": limit, "cursor": cursor, "function": function, "model": model, "error": error,
+               "since": since, "until": until}
+    store = trace_writer.get_store()
+    logs, next_cursor = None, None
+    if store is not None:
+        try:
+            logs, next_cursor = store.query(**filters)
+        except Exception as e:
+            print(f"Error reading trace store: {e}")
+    if logs is None:
         try:
-            with open(log_file, "r") as f:
-                # Read all lines and take the last 50
-                lines = f.readlines()
-                for line in lines[-50:]:
-                    try:
-                        logs.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
+            logs, next_cursor = trace_store.tail(trace_writer.path, **filters)
         except Exception as e:
             print(f"Error reading logs: {e}")
-    # Return reversed (newest first)
-    return logs[::-1]
+            logs = []
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return logs
+
+@app.get("/evals/stats")
+def get_trace_stats(hours: int = 24):
+    """
+    p50/p95/p99 latency per function and model, cache hit ratios, error rate
+    and calls per hour over the last `hours`, from running aggregates.
+    """
+    if not 1 <= hours <= trace_stats.collector.retention_hours:
+        raise HTTPException(status_code=400,
+                            detail=f"hours must be between 1 and {trace_stats.collector.retention_hours}")
+    trace_writer = services.llm.trace_writer
+    trace_writer.flush(timeout=1.0)
+    trace_writer.get_store()   # loads the aggregates from the store on first use
+    return trace_stats.collector.summary(hours)
 
-from .evals.run_evals import run_all_evals
+@app.get("/evals/logs/stats")
+def get_trace_writer_stats():
+    """Background trace writer counters (dropped > 0 means the queue overflowed)."""
+    return services.llm.trace_writer.stats()
 
-@app.post("/evals/run")
+from .evals.eval_jobs import eval_runner
+
+@app.post("/evals/run", status_code=202)
 def run_evaluations():
-    """Run the full evaluation suite and return results."""
+    """
+    Start the evaluation suite in the background. Poll GET /evals/runs/{id}
+    for progress and results.
+    """
     try:
-        results = run_all_evals()
-        return results
+        return eval_runner.submit().snapshot()
     except Exception as e:
         print(f"Eval Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/evals/runs")
+def list_eval_runs(limit: int = 20):
+    """Recent eval runs, newest first (pass rates only)."""
+    return eval_runner.list_runs(limit)
+
+@app.get("/evals/runs/{run_id}")
+def get_eval_run(run_id: str):
+    """Status, progress and results so far of an eval run."""
+    run = eval_runner.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Eval run not found")
+    return run
+
+@app.post("/evals/runs/{run_id}/cancel")
+def cancel_eval_run(run_id: str):
+    """Stop an eval run: queued examples are skipped, calls in flight finish."""
+    run = eval_runner.cancel(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Eval run not found")
+    return run
@@ -0,0 +1,60 @@
+import argparse
+import json
+from sqlalchemy import text
+from backend.database import engine as default_engine, vacuum
+from backend import models, catalog
+
+BATCH_SIZE = 1000
+
+def migrate_entry_items(engine=None, batch_size=BATCH_SIZE) -> int:
+    """
+    Create entry_items and move every entry's macros["items"] into it, one
+    batch per transaction (so an interrupted run resumes where it stopped).
+    Returns the number of entries migrated.
+    """
+    engine = engine or default_engine
+    models.EntryItem.__table__.create(bind=engine, checkfirst=True)
+    print("Table 'entry_items' is in place.")
+
+    with engine.connect() as conn:
+        food_ids = {row.name_normalized: row.id for row in
+                    conn.execute(text("SELECT id, name_normalized FROM food_items WHERE name_normalized IS NOT NULL"))}
+
+    migrated = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, macros FROM entries WHERE id > :last_id AND json_type(macros, '$.items') = 'array' "
+                "ORDER BY id LIMIT :limit"), {"last_id": last_id, "limit": batch_size}).all()
+            if not rows:
+                break
+            items = []
+            for row in rows:
+                for position, item in enumerate(json.loads(row.macros)["items"]):
+                    if not isinstance(item, dict):
+                        continue
+                    item = dict(item, food_item_id=food_ids.get(catalog.normalize_food_name(item.get("name") or "")))
+                    items.append({**models.EntryItem.values_from(item, position), "entry_id": row.id})
+            if items:
+                conn.execute(models.EntryItem.__table__.insert(), items)
+            conn.execute(text("UPDATE entries SET macros = json_remove(macros, '$.items') WHERE id = :id"),
+                         [{"id": row.id} for row in rows])
+            migrated += len(rows)
+            last_id = rows[-1].id
+        print(f"Migrated {migrated} entries...")
+    print(f"Moved the items of {migrated} entries to 'entry_items'.")
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move entry items from the macros JSON into the entry_items table.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="entries per transaction")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return the freed space")
+    args = parser.parse_args()
+    try:
+        migrate_entry_items(batch_size=args.batch_size)
+        if args.vacuum:
+            vacuum(default_engine)
+            print("Database vacuumed.")
+    except Exception as e:
+        print(f"Migration failed: {e}")
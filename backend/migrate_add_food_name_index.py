@@ -0,0 +1,31 @@
+from backend.database import engine
+from backend.catalog import normalize_food_name
+from sqlalchemy import text
+
+def add_name_normalized_column():
+    with engine.connect() as conn:
+        try:
+            try:
+                conn.execute(text("SELECT name_normalized FROM food_items LIMIT 1"))
+                print("Column 'name_normalized' already exists.")
+            except Exception:
+                print("Adding 'name_normalized' column...")
+                conn.execute(text("ALTER TABLE food_items ADD COLUMN name_normalized VARCHAR"))
+
+            # Backfill in Python so it matches normalize_food_name exactly
+            rows = conn.execute(text("SELECT id, name FROM food_items WHERE name_normalized IS NULL")).all()
+            if rows:
+                conn.execute(
+                    text("UPDATE food_items SET name_normalized = :norm WHERE id = :id"),
+                    [{"id": r.id, "norm": normalize_food_name(r.name)} for r in rows]
+                )
+            print(f"Backfilled name_normalized for {len(rows)} food items.")
+
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_food_items_name_normalized ON food_items (name_normalized)"))
+            conn.commit()
+            print("Index on 'name_normalized' is in place.")
+        except Exception as e:
+            print(f"Migration failed: {e}")
+
+if __name__ == "__main__":
+    add_name_normalized_column()
@@ -0,0 +1,30 @@
+from backend.database import engine
+from sqlalchemy import text
+
+def add_local_date_column():
+    with engine.connect() as conn:
+        try:
+            try:
+                conn.execute(text("SELECT local_date FROM entries LIMIT 1"))
+                print("Column 'local_date' already exists.")
+            except Exception:
+                print("Adding 'local_date' column...")
+                conn.execute(text("ALTER TABLE entries ADD COLUMN local_date VARCHAR"))
+
+            # Backfill: ingested_at is stored as naive local time ('YYYY-MM-DD HH:MM:SS'),
+            # so the day key is its date prefix.
+            result = conn.execute(text(
+                "UPDATE entries SET local_date = substr(ingested_at, 1, 10) "
+                "WHERE local_date IS NULL AND ingested_at IS NOT NULL"
+            ))
+            print(f"Backfilled local_date for {result.rowcount} entries.")
+
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entries_ingested_at ON entries (ingested_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_entries_local_date ON entries (local_date)"))
+            conn.commit()
+            print("Indexes on 'ingested_at' and 'local_date' are in place.")
+        except Exception as e:
+            print(f"Migration failed: {e}")
+
+if __name__ == "__main__":
+    add_local_date_column()
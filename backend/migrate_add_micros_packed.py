@@ -0,0 +1,44 @@
+import json
+from sqlalchemy import text
+from backend.database import engine as default_engine
+from backend import catalog, nutrients
+
+BATCH_SIZE = 10_000
+
+def add_micros_packed_column(engine=None, batch_size=BATCH_SIZE) -> int:
+    """
+    Add food_items.micros_packed and fill it from the micros JSON, one batch
+    per transaction. Returns the number of foods packed.
+    """
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("SELECT micros_packed FROM food_items LIMIT 1"))
+            print("Column 'micros_packed' already exists.")
+        except Exception:
+            print("Adding 'micros_packed' column...")
+            conn.execute(text("ALTER TABLE food_items ADD COLUMN micros_packed BLOB"))
+
+    packed = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, micros FROM food_items WHERE id > :last_id AND micros_packed IS NULL "
+                "ORDER BY id LIMIT :limit"), {"last_id": last_id, "limit": batch_size}).all()
+            if not rows:
+                break
+            conn.execute(text("UPDATE food_items SET micros_packed = :packed WHERE id = :id"),
+                         [{"id": row.id, "packed": nutrients.pack(json.loads(row.micros or "null"))}
+                          for row in rows])
+            packed += len(rows)
+            last_id = rows[-1].id
+    catalog.food_cache.invalidate()
+    print(f"Packed the micros of {packed} food items.")
+    return packed
+
+if __name__ == "__main__":
+    try:
+        add_micros_packed_column()
+    except Exception as e:
+        print(f"Migration failed: {e}")
@@ -0,0 +1,30 @@
+from sqlalchemy import text
+from backend.database import engine as default_engine
+from backend import catalog, food_index
+
+def drop_fuzzy_aliases(engine=None) -> int:
+    """
+    Delete the aliases saved from misspelling matches before they stopped
+    being stored; some point at the wrong dish ("moong dal halwa" -> Moong
+    Dal). Aliases that only differ from their food by descriptors or plurals
+    are kept. Returns the number of aliases deleted.
+    """
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT a.alias_normalized, f.name_normalized FROM food_aliases a "
+            "JOIN food_items f ON f.id = a.food_item_id WHERE a.source = 'fuzzy'")).all()
+        stale = [{"alias": row.alias_normalized} for row in rows
+                 if food_index.match_key(row.alias_normalized) != food_index.match_key(row.name_normalized or "")]
+        if stale:
+            conn.execute(text("DELETE FROM food_aliases WHERE alias_normalized = :alias"), stale)
+        conn.execute(text("UPDATE food_aliases SET source = 'normalized' WHERE source = 'fuzzy'"))
+    catalog.food_cache.invalidate()
+    print(f"Deleted {len(stale)} fuzzy food aliases.")
+    return len(stale)
+
+if __name__ == "__main__":
+    try:
+        drop_fuzzy_aliases()
+    except Exception as e:
+        print(f"Migration failed: {e}")
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+from backend.database import engine as default_engine
+from backend import catalog, food_index
+
+def make_food_names_unique(engine=None) -> int:
+    """
+    Merge catalog foods that share a normalized name ("Masoor Dal" and
+    "masoor dal") into the oldest row, repointing entry items and aliases,
+    then replace the index on name_normalized with a unique one. Returns the
+    number of rows deleted.
+    """
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        duplicates = conn.execute(text(
+            "SELECT f.id, keep.id AS keep_id FROM food_items f "
+            "JOIN (SELECT name_normalized, MIN(id) AS id FROM food_items WHERE name_normalized IS NOT NULL "
+            "      GROUP BY name_normalized HAVING COUNT(*) > 1) keep "
+            "ON keep.name_normalized = f.name_normalized AND f.id != keep.id")).all()
+        if duplicates:
+            params = [{"id": row.id, "keep_id": row.keep_id} for row in duplicates]
+            conn.execute(text("UPDATE entry_items SET food_item_id = :keep_id WHERE food_item_id = :id"), params)
+            conn.execute(text("UPDATE food_aliases SET food_item_id = :keep_id WHERE food_item_id = :id"), params)
+            conn.execute(text("DELETE FROM food_items WHERE id = :id"), params)
+        print(f"Merged {len(duplicates)} duplicate food items.")
+
+        conn.execute(text("DROP INDEX IF EXISTS ix_food_items_name_normalized"))
+        conn.execute(text("CREATE UNIQUE INDEX ix_food_items_name_normalized ON food_items (name_normalized)"))
+        print("Unique index on 'name_normalized' is in place.")
+    catalog.food_cache.invalidate()
+    food_index.reset()
+    return len(duplicates)
+
+if __name__ == "__main__":
+    try:
+        make_food_names_unique()
+    except Exception as e:
+        print(f"Migration failed: {e}")
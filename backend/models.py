@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, Float, String, DateTime, JSON, LargeBinary, ForeignKey
+from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime
 
@@ -8,10 +9,63 @@ class Entry(Base):
     id = Column(Integer, primary_key=True, index=True)
     raw_text = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    ingested_at = Column(DateTime, nullable=True) # Per PRD: Strict Timestamp
+    ingested_at = Column(DateTime, nullable=True, index=True) # Per PRD: Strict Timestamp
+    local_date = Column(String, nullable=True, index=True) # YYYY-MM-DD in HELIOS_TZ
     
-    # Store Macros as JSON {calories, protein, carbs, fats, water_ml}
+    # Store Macros as JSON {calories, protein, carbs, fats, water_ml, food_name, micros}.
+    # The per-item breakdown is in entry_items (rows logged before it still carry macros["items"])
     macros = Column(JSON, nullable=True) 
+    items = relationship("EntryItem", order_by="EntryItem.position", cascade="all, delete-orphan",
+                         lazy="selectin")
+
+    @property
+    def macros_with_items(self):
+        """macros as the API returns it, with the items read back from entry_items."""
+        if self.macros is None or "items" in self.macros:
+            return self.macros
+        return {**self.macros, "items": [item.to_dict() for item in self.items]}
+
+class EntryItem(Base):
+    """One food of an entry, with numeric columns so it can be summed and filtered in SQL."""
+    __tablename__ = "entry_items"
+
+    id = Column(Integer, primary_key=True)
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False, default=0) # order within the log
+    name = Column(String, nullable=False)
+    quantity = Column(String, nullable=True) # as logged, e.g. "2 katori"
+    food_item_id = Column(Integer, ForeignKey("food_items.id", ondelete="SET NULL"), nullable=True, index=True)
+    weight_g = Column(Float, nullable=True)
+    calories = Column(Integer, default=0)
+    protein = Column(Float, default=0)
+    carbs = Column(Float, default=0)
+    fats = Column(Float, default=0)
+    micros = Column(JSON, nullable=True) # scaled to weight_g
+
+    @staticmethod
+    def values_from(item: dict, position: int = 0) -> dict:
+        """Column values for one item of services.build_entry_data's output (or a legacy macros["items"] entry)."""
+        nutrients = item.get("nutrients") or {}
+        return {"position": position, "name": item.get("name") or "", "quantity": item.get("quantity"),
+                "food_item_id": item.get("food_item_id"), "weight_g": item.get("weight_g"),
+                "calories": nutrients.get("calories") or 0, "protein": nutrients.get("protein") or 0,
+                "carbs": nutrients.get("carbs") or 0, "fats": nutrients.get("fats") or 0,
+                "micros": item.get("micros") or {}}
+
+    @classmethod
+    def from_processed(cls, item: dict, position: int = 0) -> "EntryItem":
+        return cls(**cls.values_from(item, position))
+
+    def to_dict(self) -> dict:
+        """The item as build_entry_data returned it."""
+        nutrients = {"calories": self.calories, "protein": self.protein, "carbs": self.carbs, "fats": self.fats}
+        micros = self.micros or {}
+        if "fiber" in micros:
+            nutrients["fiber"] = micros["fiber"]
+        elif "fiber_g" in micros:
+            nutrients["fiber"] = micros["fiber_g"]
+        return {"name": self.name, "quantity": self.quantity, "food_item_id": self.food_item_id,
+                "weight_g": self.weight_g, "nutrients": nutrients, "micros": micros}
 
 class DailyGoal(Base):
     __tablename__ = "daily_goals"
@@ -21,11 +75,25 @@ class DailyGoal(Base):
     protein_target = Column(Integer, default=150)
     water_target_ml = Column(Integer, default=3000)
 
+class DailyTotals(Base):
+    """Per-day rollup of entry macros, kept in step with entries by create_log/delete_log."""
+    __tablename__ = "daily_totals"
+
+    date = Column(String, primary_key=True, index=True) # YYYY-MM-DD (Entry.local_date)
+    calories = Column(Float, default=0)
+    protein = Column(Float, default=0)
+    carbs = Column(Float, default=0)
+    fats = Column(Float, default=0)
+    water_ml = Column(Float, default=0)
+    micros = Column(JSON, nullable=True) # Unrounded running sums
+    entry_count = Column(Integer, default=0)
+
 class FoodItem(Base):
     __tablename__ = "food_items"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
+    name_normalized = Column(String, unique=True, index=True, nullable=True) # catalog.normalize_food_name(name)
     
     # Base macros per 100g/ml
     calories_per_100 = Column(Integer, default=0)
@@ -35,6 +103,8 @@ class FoodItem(Base):
     
     # Full Micronutrient Profile (JSON)
     micros = Column(JSON, nullable=True)
+    # The tracked micros as a float32 vector (nutrients.pack); NULL until migrate_add_micros_packed.py runs
+    micros_packed = Column(LargeBinary, nullable=True)
     
     default_unit = Column(String, default="g") # 'g' or 'ml'
     
@@ -42,6 +112,16 @@ class FoodItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     source = Column(String, default="user_log") # 'user_log', 'seed', 'manual'
 
+class FoodAlias(Base):
+    """Other names for a catalog food: learned name variants or added by hand ("toor dal" -> Arhar Dal)."""
+    __tablename__ = "food_aliases"
+
+    alias_normalized = Column(String, primary_key=True) # catalog.normalize_food_name(alias)
+    food_item_id = Column(Integer, ForeignKey("food_items.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Float, default=1.0) # similarity when learned, 1.0 when manual
+    source = Column(String, default="manual") # 'normalized', 'manual' ('fuzzy' on older rows)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class PortionUnit(Base):
     __tablename__ = "portion_units"
 
@@ -49,3 +129,15 @@ class PortionUnit(Base):
     name = Column(String, unique=True, nullable=False) # 'katori', 'bowl', 'tablespoon'
     weight_in_grams = Column(Integer, nullable=False) # Standard conversion
     description = Column(String, nullable=True)
+
+class ParseCacheEntry(Base):
+    """Persisted parse_food_text results, keyed by normalized log text + prompt version."""
+    __tablename__ = "parse_cache"
+
+    key = Column(String, primary_key=True) # sha256 of prompt version + normalized text
+    normalized_text = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    result = Column(JSON, nullable=False) # {"items": [...], "time": ..., "confidence": ...}
+    time_from_text = Column(Integer, default=0) # 1 if result["time"] came from an explicit clock time
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,115 @@
+"""
+Fixed vocabulary of tracked micronutrients.
+
+Every micro has a permanent index into a nutrient vector, so a food's
+per-100g profile is one small array (stored packed as float32 in
+FoodItem.micros_packed) and scaling or summing profiles is plain vector
+arithmetic. Dicts keyed by nutrient name are only built at the edges (API
+responses and the JSON kept on entries and rollups).
+
+NUTRIENTS is append-only: a key's index never changes, and vectors packed
+before a nutrient was added simply read it as 0.
+"""
+from typing import NamedTuple
+import numpy as np
+
+class Nutrient(NamedTuple):
+    key: str
+    unit: str
+    label: str
+
+NUTRIENTS = (
+    Nutrient("fiber_g", "g", "Fiber"),
+    Nutrient("sugar_g", "g", "Sugar"),
+    Nutrient("sodium_mg", "mg", "Sodium"),
+    Nutrient("potassium_mg", "mg", "Potassium"),
+    Nutrient("calcium_mg", "mg", "Calcium"),
+    Nutrient("iron_mg", "mg", "Iron"),
+    Nutrient("vitamin_c_mg", "mg", "Vitamin C"),
+    Nutrient("vitamin_a_iu", "IU", "Vitamin A"),
+    Nutrient("cholesterol_mg", "mg", "Cholesterol"),
+    Nutrient("saturated_fat_g", "g", "Saturated fat"),
+    # The rest of the dashboard's nutrient matrix
+    Nutrient("vitamin_d_iu", "IU", "Vitamin D"),
+    Nutrient("vitamin_e_mg", "mg", "Vitamin E"),
+    Nutrient("vitamin_k_mcg", "mcg", "Vitamin K"),
+    Nutrient("vitamin_b1_thiamine_mg", "mg", "B1 (Thiamin)"),
+    Nutrient("vitamin_b2_riboflavin_mg", "mg", "B2 (Riboflavin)"),
+    Nutrient("vitamin_b3_niacin_mg", "mg", "B3 (Niacin)"),
+    Nutrient("vitamin_b5_pantothenic_acid_mg", "mg", "B5 (Pantothenic acid)"),
+    Nutrient("vitamin_b6_pyridoxine_mg", "mg", "B6 (Pyridoxine)"),
+    Nutrient("vitamin_b7_biotin_mcg", "mcg", "B7 (Biotin)"),
+    Nutrient("vitamin_b9_folate_mcg", "mcg", "B9 (Folate)"),
+    Nutrient("vitamin_b12_cobalamin_mcg", "mcg", "B12 (Cobalamin)"),
+    Nutrient("magnesium_mg", "mg", "Magnesium"),
+    Nutrient("phosphorus_mg", "mg", "Phosphorus"),
+    Nutrient("zinc_mg", "mg", "Zinc"),
+    Nutrient("copper_mcg", "mcg", "Copper"),
+    Nutrient("manganese_mg", "mg", "Manganese"),
+    Nutrient("selenium_mcg", "mcg", "Selenium"),
+    Nutrient("iodine_mcg", "mcg", "Iodine"),
+    Nutrient("chromium_mcg", "mcg", "Chromium"),
+    Nutrient("molybdenum_mcg", "mcg", "Molybdenum"),
+    Nutrient("chloride_mg", "mg", "Chloride"),
+    Nutrient("creatine_g", "g", "Creatine"),
+    Nutrient("epa_mg", "mg", "EPA"),
+    Nutrient("dha_mg", "mg", "DHA"),
+)
+KEYS = tuple(n.key for n in NUTRIENTS)
+INDEX = {key: i for i, key in enumerate(KEYS)}
+SIZE = len(NUTRIENTS)
+
+# Spellings models and older rows use for the same nutrient: the key without
+# its unit suffix ("fiber" -> "fiber_g"), the B vitamins by number or name
+# ("vitamin_b12", "folate"), plus a few common variants
+ALIASES = {
+    **{key.rsplit("_", 1)[0]: key for key in KEYS},
+    **{"_".join(key.split("_")[:2]): key for key in KEYS if key.startswith("vitamin_b")},
+    **{"_".join(key.split("_")[2:-1]): key for key in KEYS if key.startswith("vitamin_b")},
+    "fibre": "fiber_g",
+    "fibre_g": "fiber_g",
+    "sugars": "sugar_g",
+    "thiamin": "vitamin_b1_thiamine_mg",
+    "folic_acid": "vitamin_b9_folate_mcg",
+}
+
+def index_of(key: str):
+    """Vector index for a micro key or one of its aliases, None if it isn't tracked."""
+    key = key.lower()
+    i = INDEX.get(key)
+    if i is None:
+        i = INDEX.get(ALIASES.get(key))
+    return i
+
+def to_vector(micros: dict) -> np.ndarray:
+    """
+    {key: amount} -> float64 vector. Aliases add into their nutrient's slot;
+    untracked keys and non-numeric values are dropped.
+    """
+    vec = np.zeros(SIZE)
+    for key, value in (micros or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            i = index_of(key)
+            if i is not None:
+                vec[i] += value
+    return vec
+
+def to_dict(vec, digits: int = None) -> dict:
+    """Vector -> {key: amount} for the non-zero nutrients, optionally rounded."""
+    values = np.round(vec, digits) if digits is not None else vec
+    return {key: value for key, value in zip(KEYS, values.tolist()) if value}
+
+def canonical(micros: dict, digits: int = None) -> dict:
+    """A micros dict with aliases folded into registry keys and untracked keys dropped."""
+    return to_dict(to_vector(micros), digits)
+
+def pack(micros: dict) -> bytes:
+    """Profile dict -> little-endian float32 bytes (4 bytes per nutrient)."""
+    return to_vector(micros).astype("<f4").tobytes()
+
+def unpack(blob: bytes) -> np.ndarray:
+    """Packed profile -> float64 vector; profiles packed before the registry grew are zero-padded."""
+    stored = np.frombuffer(blob, dtype="<f4")[:SIZE]
+    vec = np.zeros(SIZE)
+    vec[:len(stored)] = stored
+    return vec
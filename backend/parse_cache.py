@@ -0,0 +1,157 @@
+"""
+Persistent cache of parse_food_text results.
+
+People log the same meals over and over, so parse results are stored in the
+parse_cache table keyed by the normalized log text (explicit clock times
+removed) plus a hash of the parse prompt and model. The time is re-derived
+from each request's own text, so "2 eggs at 8am" and "2 eggs at 9pm" share
+one cached parse but keep their own times.
+
+Reads use their own short session on the caller's engine and writes their
+own short transaction (writer.write_apart), so the cache never holds a pooled
+connection or the SQLite write lock while the request goes on to await the LLM.
+"""
+import copy
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import delete, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from . import llm, models, writer
+
+PARSE_CACHE_TTL_DAYS = int(os.environ.get("HELIOS_PARSE_CACHE_TTL_DAYS", "30"))
+PARSE_CACHE_MAX_ENTRIES = int(os.environ.get("HELIOS_PARSE_CACHE_MAX_ENTRIES", "5000"))
+# Hits only write last_used_at back when it is older than this
+TOUCH_INTERVAL = timedelta(hours=1)
+# Stores between expiry/size sweeps
+EVICT_EVERY = 50
+
+# Changing the prompt or the model invalidates every cached parse
+PROMPT_VERSION = hashlib.sha256(
+    (llm.PARSE_MODEL + "\n" + llm.build_parse_prompt("{raw_text}")).encode()
+).hexdigest()[:12]
+
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "stores": 0, "expirations": 0, "evictions": 0}
+
+def _count(name: str, n: int = 1):
+    with _lock:
+        _counters[name] += n
+
+def normalize_log_text(raw_text: str):
+    """Returns (cache text, explicit "HH:MM" time or None) for a raw log."""
+    stripped, time_str = llm.extract_time(raw_text)
+    normalized = re.sub(r"\s*,\s*", ", ", stripped.lower())
+    normalized = " ".join(normalized.split()).strip(" ,.!;")
+    return normalized, time_str
+
+def cache_key(normalized_text: str) -> str:
+    return hashlib.sha256(f"{PROMPT_VERSION}\n{normalized_text}".encode()).hexdigest()
+
+def lookup(db: Session, raw_text: str):
+    """Cached parse for raw_text with this request's time applied, or None."""
+    normalized, time_str = normalize_log_text(raw_text)
+    key = cache_key(normalized)
+    now = datetime.utcnow()
+    # Own session: the connection goes back to the pool before the caller awaits the LLM
+    with Session(bind=db.get_bind()) as session:
+        row = session.get(models.ParseCacheEntry, key)
+        if row is None:
+            _count("misses")
+            return None
+        result = copy.deepcopy(row.result)
+        time_from_text = row.time_from_text
+        expired = row.created_at < now - timedelta(days=PARSE_CACHE_TTL_DAYS)
+        stale_touch = now - row.last_used_at > TOUCH_INTERVAL
+
+    if expired:
+        _write(db, delete(models.ParseCacheEntry).where(models.ParseCacheEntry.key == key))
+        _count("expirations")
+        _count("misses")
+        return None
+    if stale_touch:
+        _write(db, update(models.ParseCacheEntry).where(models.ParseCacheEntry.key == key)
+               .values(last_used_at=now))
+    _count("hits")
+
+    # An explicit time in this text wins; a cached time that came from
+    # another log's clock time doesn't apply to this one
+    if time_str:
+        result["time"] = time_str
+    elif time_from_text:
+        result["time"] = None
+
+    llm.log_trace("parse_food_text", {"raw_text": raw_text}, result, 0, "PARSE_CACHE")
+    return result
+
+def _write(db: Session, statement) -> bool:
+    """Run a cache write in its own short transaction. Best effort: a failed
+    write costs a future LLM call, never the log being processed."""
+    try:
+        writer.write_apart(db, lambda session: session.execute(statement))
+        return True
+    except Exception as e:
+        print(f"Parse cache write failed: {e}")
+        return False
+
+def store(db: Session, raw_text: str, result: dict):
+    """Remember a parse result. Failed and low-confidence parses are not cached."""
+    if not result.get("items") or result.get("confidence") == "low":
+        return
+    normalized, time_str = normalize_log_text(raw_text)
+    now = datetime.utcnow()
+    values = {
+        "key": cache_key(normalized),
+        "normalized_text": normalized,
+        "prompt_version": PROMPT_VERSION,
+        "result": result,
+        "time_from_text": 1 if time_str else 0,
+        "created_at": now,
+        "last_used_at": now
+    }
+    # Upsert: two requests that miss on the same text both store it
+    statement = sqlite_insert(models.ParseCacheEntry).values(**values)
+    if not _write(db, statement.on_conflict_do_update(
+        index_elements=["key"],
+        set_={name: statement.excluded[name] for name in values if name != "key"}
+    )):
+        return
+    with _lock:
+        _counters["stores"] += 1
+        sweep = _counters["stores"] % EVICT_EVERY == 0
+    if sweep:
+        try:
+            writer.write_apart(db, evict)
+        except Exception as e:
+            print(f"Parse cache eviction failed: {e}")
+
+def evict(session: Session):
+    """Drop expired rows, then the least recently used beyond the size bound. Does not commit."""
+    cutoff = datetime.utcnow() - timedelta(days=PARSE_CACHE_TTL_DAYS)
+    expired = session.query(models.ParseCacheEntry).filter(models.ParseCacheEntry.created_at < cutoff) \
+        .delete(synchronize_session=False)
+    excess = session.query(models.ParseCacheEntry).count() - PARSE_CACHE_MAX_ENTRIES
+    evicted = 0
+    if excess > 0:
+        evicted = session.execute(text(
+            "DELETE FROM parse_cache WHERE key IN "
+            "(SELECT key FROM parse_cache ORDER BY last_used_at LIMIT :excess)"
+        ), {"excess": excess}).rowcount
+    _count("expirations", expired)
+    _count("evictions", evicted)
+
+def get_stats(db: Session) -> dict:
+    with _lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        "size": db.query(models.ParseCacheEntry).count(),
+        "max_entries": PARSE_CACHE_MAX_ENTRIES,
+        "ttl_days": PARSE_CACHE_TTL_DAYS,
+        "prompt_version": PROMPT_VERSION
+    }
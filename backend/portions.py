@@ -0,0 +1,90 @@
+"""
+Immutable in-memory index of the portion_units table.
+
+The whole table is tiny, so it is loaded once (at startup, or lazily on
+first use) and swapped out wholesale whenever units change. Resolving a
+quantity string therefore never touches the database on the hot path.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from . import models
+
+# Metric units resolve_weight converts directly (1ml ~ 1g)
+GRAM_UNITS = frozenset(['g', 'gm', 'gms', 'gram', 'grams'])
+ML_UNITS = frozenset(['ml', 'l', 'liter', 'liters', 'litre'])
+KG_UNITS = frozenset(['kg', 'kilo'])
+
+# Common spellings -> canonical unit name. Checked in order as substrings
+# of the unit text ("katoris" -> katori, "tbsp" -> tablespoon).
+UNIT_ALIASES = (
+    ("bowl", "bowl"),
+    ("katori", "katori"),
+    ("cup", "cup"),
+    ("tbsp", "tablespoon"),
+    ("tsp", "teaspoon"),
+    ("glass", "glass"),
+    ("slice", "slice"),
+    ("pc", "piece"),
+    ("piece", "piece"),
+)
+
+# Seeded into portion_units by init_db; also the index used without a database
+DEFAULT_UNITS = (
+    {"name": "katori", "weight_in_grams": 150, "description": "Standard Indian bowl (150ml)"},
+    {"name": "bowl", "weight_in_grams": 250, "description": "Large bowl (250ml)"},
+    {"name": "plate", "weight_in_grams": 300, "description": "Standard dinner plate"},
+    {"name": "cup", "weight_in_grams": 240, "description": "Standard US cup"},
+    {"name": "tablespoon", "weight_in_grams": 15, "description": "Standard tablespoon"},
+    {"name": "teaspoon", "weight_in_grams": 5, "description": "Standard teaspoon"},
+    {"name": "glass", "weight_in_grams": 200, "description": "Standard glass (200ml)"},
+    {"name": "slice", "weight_in_grams": 30, "description": "Standard slice of bread"},
+    {"name": "piece", "weight_in_grams": 50, "description": "Generic piece size"},
+    {"name": "ladle", "weight_in_grams": 150, "description": "Standard serving spoon"}
+)
+
+class PortionIndex(NamedTuple):
+    units: Mapping[str, int]                       # lowercase unit name -> grams
+    aliases: Tuple[Tuple[str, Optional[int]], ...]  # (alias, grams or None if unit missing)
+
+    def weight_for(self, unit_str: str) -> Optional[int]:
+        """Grams for one unit of unit_str, or None if it isn't a known portion."""
+        unit_str = unit_str.lower()
+        grams = self.units.get(unit_str)
+        if grams is not None:
+            return grams
+        for alias, alias_grams in self.aliases:
+            if alias in unit_str:
+                return alias_grams
+        return None
+
+_index: Optional[PortionIndex] = None
+
+def _build(units: dict) -> PortionIndex:
+    return PortionIndex(
+        units=MappingProxyType(units),
+        aliases=tuple((alias, units.get(name)) for alias, name in UNIT_ALIASES)
+    )
+
+DEFAULT_INDEX = _build({u["name"]: u["weight_in_grams"] for u in DEFAULT_UNITS})
+
+def load(db: Session) -> PortionIndex:
+    """(Re)build the index from the portion_units table and make it current."""
+    global _index
+    _index = _build({u.name.lower(): u.weight_in_grams for u in db.query(models.PortionUnit).all()})
+    return _index
+
+def get_index(db: Session = None) -> PortionIndex:
+    """
+    The current index, loading it on first use if startup didn't. Without a
+    loaded index or a db to load it from, the built-in DEFAULT_UNITS are
+    used (and not made current, so a later call with a db still loads).
+    """
+    if _index is None:
+        return load(db) if db is not None else DEFAULT_INDEX
+    return _index
+
+def reset():
+    """Forget the loaded index (the next get_index call reloads it)."""
+    global _index
+    _index = None
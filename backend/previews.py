@@ -0,0 +1,74 @@
+"""
+Short-lived server-side store of /preview_log results.
+
+The logger previews a log before the user confirms it. Each preview is kept
+here under an opaque token, so the confirming /log call can commit the
+already-computed result instead of paying for the LLM parse and estimation
+a second time.
+"""
+import copy
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+PREVIEW_TTL_S = int(os.environ.get("HELIOS_PREVIEW_TTL_S", "900"))
+PREVIEW_STORE_SIZE = 1024
+
+class PreviewStore:
+    """Thread-safe token -> (raw_text, processed data) map with expiry."""
+
+    def __init__(self, max_size: int = PREVIEW_STORE_SIZE, ttl_s: float = PREVIEW_TTL_S):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()  # token -> (expires_at, raw_text, data)
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.redeemed = 0
+        self.expired = 0
+
+    def put(self, raw_text: str, data: dict) -> str:
+        token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            # Same TTL for every entry, so the oldest are always first to expire
+            while self._entries and next(iter(self._entries.values()))[0] <= now:
+                self._entries.popitem(last=False)
+                self.expired += 1
+            self._entries[token] = (now + self.ttl_s, raw_text, copy.deepcopy(data))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self.issued += 1
+        return token
+
+    def pop(self, token: str, raw_text: str) -> Optional[dict]:
+        """
+        Redeem a token once. Returns None when it is unknown, expired, or was
+        issued for different text (the log was edited after previewing).
+        """
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry is None:
+                return None
+            expires_at, preview_text, data = entry
+            if expires_at <= time.monotonic():
+                self.expired += 1
+                return None
+            if preview_text != raw_text:
+                return None
+            self.redeemed += 1
+            return data
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "ttl_s": self.ttl_s,
+                "issued": self.issued,
+                "redeemed": self.redeemed,
+                "expired": self.expired
+            }
+
+preview_store = PreviewStore()
@@ -0,0 +1,22 @@
+import argparse
+from backend.database import SessionLocal
+from backend import services
+
+def rebuild(start=None, end=None):
+    """Recompute daily_totals from entries to repair any drift."""
+    db = SessionLocal()
+    try:
+        days = services.rebuild_daily_totals(db, start=start, end=end)
+        print(f"Rebuilt rollups for {days} days.")
+    except Exception as e:
+        db.rollback()
+        print(f"Rebuild failed: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute daily rollups from the entries table.")
+    parser.add_argument("--start", help="first day to rebuild (YYYY-MM-DD), default: all")
+    parser.add_argument("--end", help="last day to rebuild (YYYY-MM-DD), default: all")
+    args = parser.parse_args()
+    rebuild(args.start, args.end)
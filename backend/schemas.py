@@ -1,19 +1,28 @@
-from pydantic import BaseModel
-from typing import Optional, Dict
+from pydantic import BaseModel, Field, AliasChoices
+from typing import Optional, Dict, List
 from datetime import datetime
 
 # Entry Schemas
 class EntryBase(BaseModel):
     raw_text: str
 
+class LogItem(BaseModel):
+    name: str
+    quantity: str
+    note: Optional[str] = None
+
 class EntryCreate(EntryBase):
     date: Optional[str] = None # YYYY-MM-DD override
+    preview_token: Optional[str] = None # from /preview_log, skips the LLM
+    items: Optional[List[LogItem]] = None # reviewed/edited items, skips the parse
 
 class Entry(EntryBase):
     id: int
     created_at: datetime
     ingested_at: Optional[datetime] = None
-    macros: Optional[Dict] = None
+    local_date: Optional[str] = None
+    # Read from models.Entry.macros_with_items, so the items come back inside macros
+    macros: Optional[Dict] = Field(None, validation_alias=AliasChoices("macros_with_items", "macros"))
 
     class Config:
         from_attributes = True
@@ -54,6 +63,20 @@ class FoodItem(FoodItemBase):
     class Config:
         from_attributes = True
 
+# Food Alias Schemas
+class FoodAliasCreate(BaseModel):
+    alias: str # e.g. "Toor Dal"
+    food_name: str # existing catalog food, e.g. "Arhar Dal"
+
+class FoodAlias(BaseModel):
+    alias_normalized: str
+    food_item_id: int
+    score: float
+    source: str
+
+    class Config:
+        from_attributes = True
+
 # Portion Unit Schemas
 class PortionUnitBase(BaseModel):
     name: str
@@ -1,80 +1,472 @@
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from . import models, schemas, llm
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from fastapi.concurrency import run_in_threadpool
+from . import models, schemas, llm, catalog, portions, parse_cache, local_parser, food_index, nutrients, writer
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import os
 import re
+from time import perf_counter
+
+# Timezone used to decide which day an entry belongs to.
+# Unset means the server's local time (the historical behaviour).
+LOCAL_TZ = ZoneInfo(os.environ["HELIOS_TZ"]) if os.environ.get("HELIOS_TZ") else None
+
+def local_now() -> datetime:
+    """Current wall-clock time in LOCAL_TZ, naive like Entry.ingested_at."""
+    if LOCAL_TZ is None:
+        return datetime.now()
+    return datetime.now(LOCAL_TZ).replace(tzinfo=None)
+
+def local_day(dt: datetime) -> str:
+    """The YYYY-MM-DD day key for a timestamp (aware timestamps are converted to LOCAL_TZ)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(LOCAL_TZ) if LOCAL_TZ else dt.astimezone()
+    return dt.strftime("%Y-%m-%d")
+
+def get_entries_for_day(db: Session, date: str):
+    """Entries whose local day is date, via the local_date index (no full scan)."""
+    return (
+        db.query(models.Entry)
+        .filter(models.Entry.local_date == date)
+        .order_by(models.Entry.ingested_at)
+        .all()
+    )
+
+# Daily rollups
+ROLLUP_FIELDS = ("calories", "protein", "carbs", "fats", "water_ml")
+
+def _empty_totals(date: str) -> models.DailyTotals:
+    return models.DailyTotals(date=date, calories=0, protein=0, carbs=0, fats=0,
+                              water_ml=0, micros={}, entry_count=0)
+
+class PendingMigrationError(Exception):
+    """Entries still keep their items in the macros JSON, so their totals can't be summed yet."""
+
+def _pending_migration(count: int) -> PendingMigrationError:
+    return PendingMigrationError(f"{count} entries still keep their items in macros; "
+                                 "run python -m backend.migrate_add_entry_items")
+
+# Rollup fields summed from entry_items; water isn't tracked per item, so water_ml stays 0
+ITEM_FIELDS = ("calories", "protein", "carbs", "fats")
+
+# Day sums over the entry_items rows, computed by SQLite with the local_date
+# and entry_id indexes: no macros blob is loaded or parsed. Entries without
+# items (error fallbacks) count with zero totals; entries whose items are
+# still in the macros JSON are counted apart so they can't pass as zeros.
+_DAY_SUMS_SQL = """
+    SELECT entries.local_date, COUNT(DISTINCT entries.id) AS entry_count,
+           COUNT(DISTINCT CASE WHEN entry_items.id IS NULL AND json_type(entries.macros, '$.items') = 'array'
+                               THEN entries.id END) AS unmigrated,
+           {sums}
+    FROM entries LEFT JOIN entry_items ON entry_items.entry_id = entries.id
+    WHERE {where}
+    GROUP BY entries.local_date
+"""
+_DAY_MICROS_SQL = """
+    SELECT entries.local_date, m.key, SUM(m.value) AS total
+    FROM entries JOIN entry_items ON entry_items.entry_id = entries.id, json_each(entry_items.micros) AS m
+    WHERE {where} AND m.type IN ('integer', 'real')
+    GROUP BY entries.local_date, m.key
+"""
+
+def sum_day_totals(db: Session, start: str = None, end: str = None, exclude_id: int = None) -> dict:
+    """
+    Rollup values for every day in [start, end] (inclusive YYYY-MM-DD bounds,
+    default: all) that has entries, summed from entry_items with SUM ...
+    GROUP BY local_date. Raises PendingMigrationError if any of those entries
+    predates entry_items. Returns {date: {"date", "entry_count", <ROLLUP_FIELDS>, "micros"}}.
+    """
+    where = ["entries.local_date IS NOT NULL", "entries.macros IS NOT NULL", "entries.macros NOT IN ('{}', 'null')"]
+    params = {}
+    if start:
+        where.append("entries.local_date >= :start")
+        params["start"] = start
+    if end:
+        where.append("entries.local_date <= :end")
+        params["end"] = end
+    if exclude_id is not None:
+        where.append("entries.id != :exclude_id")
+        params["exclude_id"] = exclude_id
+    sums = ", ".join(f"TOTAL(entry_items.{field}) AS {field}" for field in ITEM_FIELDS)
+    where = " AND ".join(where)
+
+    days = {}
+    unmigrated = 0
+    for row in db.execute(text(_DAY_SUMS_SQL.format(sums=sums, where=where)), params):
+        unmigrated += row.unmigrated
+        days[row.local_date] = {"date": row.local_date, "entry_count": row.entry_count, "micros": {},
+                                **{field: getattr(row, field) for field in ITEM_FIELDS}, "water_ml": 0}
+    if unmigrated:
+        raise _pending_migration(unmigrated)
+    for date, key, total in db.execute(text(_DAY_MICROS_SQL.format(where=where)), params):
+        days[date]["micros"][key] = total
+    for day in days.values():
+        # Older items may spell a nutrient differently ("fiber" vs "fiber_g")
+        day["micros"] = nutrients.canonical(day["micros"])
+    return days
+
+def entry_totals(entry: models.Entry):
+    """
+    ({rollup field: value}, micros vector) of an entry, summed from its items
+    the same way sum_day_totals sums a day.
+    """
+    if "items" in entry.macros:
+        raise _pending_migration(1)
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    micros = np.zeros(nutrients.SIZE)
+    for item in entry.items:
+        for field in ITEM_FIELDS:
+            totals[field] += getattr(item, field) or 0
+        micros += nutrients.to_vector(item.micros)
+    return totals, micros
+
+def _compute_day_totals(db: Session, date: str, exclude_id: int = None) -> models.DailyTotals:
+    """Build (but don't add) a rollup row for a day from its stored entries."""
+    day = sum_day_totals(db, date, date, exclude_id).get(date)
+    return models.DailyTotals(**day) if day else _empty_totals(date)
+
+def apply_entry_to_totals(db: Session, entry: models.Entry, sign: int = 1):
+    """
+    Update the entry's day rollup by its items' totals. Does not commit: call
+    it before the commit that inserts or deletes the entry so both land together.
+
+    Safe under concurrent writers: the scalar sums are one atomic upsert,
+    which also takes SQLite's write lock, so the micros read-modify-write
+    that follows cannot interleave with another transaction.
+    """
+    if not entry.local_date or not entry.macros:
+        return
+    T = models.DailyTotals.__table__
+    sums, entry_micros = entry_totals(entry)
+    deltas = {field: sign * sums[field] for field in ROLLUP_FIELDS}
+
+    # Values used only if the row doesn't exist yet: a day logged before
+    # rollups existed starts from what is stored (minus this entry if flushed)
+    seed = _compute_day_totals(db, entry.local_date, exclude_id=entry.id if sign > 0 else None) \
+        if db.get(models.DailyTotals, entry.local_date) is None else None
+    insert_values = {"date": entry.local_date, "micros": {}, "entry_count": sign}
+    for field in ROLLUP_FIELDS:
+        insert_values[field] = deltas[field]
+    if seed is not None:
+        for field in ROLLUP_FIELDS:
+            insert_values[field] += getattr(seed, field)
+        insert_values["entry_count"] += seed.entry_count
+        insert_values["micros"] = seed.micros
+
+    upsert = sqlite_insert(T).values(**insert_values)
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=[T.c.date],
+        set_={**{field: T.c[field] + deltas[field] for field in ROLLUP_FIELDS},
+              "entry_count": T.c.entry_count + sign}
+    ))
+
+    # Micros under the write lock taken above, as one vector add
+    totals = db.get(models.DailyTotals, entry.local_date, populate_existing=True)
+    micros = nutrients.to_vector(totals.micros) + sign * entry_micros
+    totals.micros = nutrients.to_dict(micros)
+
+    # An emptied day resets to exact zeros so float drift can't accumulate
+    if totals.entry_count <= 0:
+        for field in ROLLUP_FIELDS:
+            setattr(totals, field, 0)
+        totals.micros = {}
+        totals.entry_count = 0
+
+def get_daily_totals(db: Session, date: str) -> models.DailyTotals:
+    """
+    Rollup row for a day (a primary-key read). Days logged before rollups
+    existed are computed once from their entries and persisted.
+    """
+    totals = db.get(models.DailyTotals, date)
+    if totals is None:
+        day = sum_day_totals(db, date, date).get(date)
+        if day is None:
+            return _empty_totals(date)
+        # A concurrent /log may have created the row since: its deltas already include this day
+        writer.write(db, lambda session: session.execute(
+            sqlite_insert(models.DailyTotals).values(**day).on_conflict_do_nothing()))
+        totals = db.get(models.DailyTotals, date)
+    return totals
+
+def rebuild_daily_totals(db: Session, start: str = None, end: str = None) -> int:
+    """
+    Recompute rollups from the entries table (inclusive YYYY-MM-DD bounds),
+    replacing whatever is stored. Returns the number of days written.
+    """
+    rollups = db.query(models.DailyTotals)
+    if start:
+        rollups = rollups.filter(models.DailyTotals.date >= start)
+    if end:
+        rollups = rollups.filter(models.DailyTotals.date <= end)
+    rollups.delete(synchronize_session=False)
+
+    days = sum_day_totals(db, start, end)
+    if days:
+        db.execute(models.DailyTotals.__table__.insert(), list(days.values()))
+    db.commit()
+    return len(days)
+
+# Multi-day ranges
+RANGE_BUCKETS = ("day", "week", "month")
+MAX_RANGE_DAYS = 3660
+
+def _bucket_keys(days: np.ndarray, bucket: str) -> np.ndarray:
+    """Map datetime64[D] days to the first day of their bucket (weeks start on Monday)."""
+    if bucket == "week":
+        # 1970-01-01 was a Thursday, so (n + 3) % 7 is days since Monday
+        return days - ((days.astype(np.int64) + 3) % 7)
+    if bucket == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
+
+# Days in a range that have entries but no rollup row yet (logged before rollups existed)
+_MISSING_DAYS_SQL = """
+    SELECT DISTINCT entries.local_date FROM entries
+    WHERE entries.local_date >= :start AND entries.local_date <= :end
+      AND entries.local_date NOT IN (SELECT date FROM daily_totals WHERE date >= :start AND date <= :end)
+"""
+
+def _backfill_day_totals(db: Session, start: str, end: str) -> int:
+    """
+    Compute and persist the missing rollup rows in [start, end], as
+    get_daily_totals does for one day. Returns the number of days written.
+    """
+    missing = db.execute(text(_MISSING_DAYS_SQL), {"start": start, "end": end}).scalars().all()
+    if not missing:
+        return 0
+    days = sum_day_totals(db, min(missing), max(missing))
+    rows = [days[date] for date in missing if date in days]
+    if rows:
+        # Rows a concurrent /log created meanwhile already include their day
+        writer.write(db, lambda session: session.execute(
+            sqlite_insert(models.DailyTotals).on_conflict_do_nothing(), rows))
+    return len(rows)
+
+def get_range_totals(db: Session, start: str, end: str, bucket: str = "day") -> list:
+    """
+    Totals for every day/week/month bucket overlapping [start, end] (inclusive days),
+    rolled up from the daily_totals rows with array sums rather than per-entry loops.
+    Week and month buckets aren't stored: a year of daily rows reduces in a
+    few milliseconds, and stored buckets would be one more copy to keep in
+    step on every log and delete. Empty buckets are included so charts get a
+    continuous series; days logged before rollups existed are backfilled first.
+    """
+    _backfill_day_totals(db, start, end)
+    first, last = np.datetime64(start, "D"), np.datetime64(end, "D")
+    days = np.arange(first, last + 1, dtype="datetime64[D]")
+
+    # Plain column tuples: no ORM instances to build for a year of rows
+    T = models.DailyTotals
+    rows = (
+        db.query(T.date, T.calories, T.protein, T.carbs, T.fats, T.water_ml, T.entry_count, T.micros)
+        .filter(T.date >= start, T.date <= end)
+        .all()
+    )
+    base = len(ROLLUP_FIELDS) + 1
+
+    # One row per calendar day, zeros where nothing was logged; micros in nutrients order
+    matrix = np.zeros((len(days), base + nutrients.SIZE))
+    if rows:
+        dates, *numeric, micros = zip(*rows)
+        positions = (np.array(dates, dtype="datetime64[D]") - first).astype(np.int64)
+        matrix[positions, :base] = np.array(numeric, dtype=float).T
+        matrix[positions, base:] = [nutrients.to_vector(m) for m in micros]
+
+    keys = _bucket_keys(days, bucket)
+    _, offsets = np.unique(keys, return_index=True)
+    sums = np.add.reduceat(matrix, offsets, axis=0)
+    logged = np.add.reduceat((matrix[:, len(ROLLUP_FIELDS)] > 0).astype(np.int64), offsets)
+    # Buckets are clipped to the requested range
+    bucket_starts = days[offsets]
+    bucket_ends = np.append(days[offsets[1:] - 1], days[-1])
+
+    # Convert once to Python scalars; indexing numpy per value is slow
+    n_fields = len(ROLLUP_FIELDS)
+    starts = np.datetime_as_string(bucket_starts).tolist()
+    ends = np.datetime_as_string(bucket_ends).tolist()
+    micros = [nutrients.to_dict(vec, 2) for vec in sums[:, base:]]
+    return [
+        {
+            "start": starts[i],
+            "end": ends[i],
+            "entry_count": int(row[n_fields]),
+            "days_logged": days_logged,
+            "totals": {
+                "calories": round(row[0]),
+                "protein": round(row[1], 1),
+                "carbs": round(row[2], 1),
+                "fats": round(row[3], 1),
+                "water_ml": round(row[4]),
+                "micros": micros[i]
+            }
+        }
+        for i, (row, days_logged) in enumerate(zip(sums.tolist(), logged.tolist()))
+    ]
 
 def get_food_item(db: Session, name: str):
-    """Find a food item by name (case-insensitive)."""
-    return db.query(models.FoodItem).filter(models.FoodItem.name.ilike(name)).first()
+    """
+    Find a food item by normalized name (or alias / close spelling), via the
+    in-process catalog cache. Returns a catalog.FoodSnapshot, or None if the
+    food is unknown.
+    """
+    return get_food_items(db, [name]).get(catalog.normalize_food_name(name))
+
+def get_food_items(db: Session, names) -> dict:
+    """
+    Look up many foods at once: catalog cache first, then a single IN query
+    for the rest. Returns {normalized name: FoodSnapshot} for the known ones.
+    """
+    found = {}
+    missing = set()
+    for name in names:
+        key = catalog.normalize_food_name(name)
+        if key in found or key in missing:
+            continue
+        cached = catalog.food_cache.get(key)
+        if cached is not None:
+            found[key] = cached
+        else:
+            missing.add(key)
+
+    if missing:
+        rows = db.query(models.FoodItem).filter(models.FoodItem.name_normalized.in_(missing)).all()
+        for item in rows:
+            if item.name_normalized in found:
+                continue
+            food = catalog.snapshot(item)
+            catalog.food_cache.put(item.name_normalized, food)
+            found[item.name_normalized] = food
+        unresolved = missing.difference(found)
+        if unresolved:
+            found.update(_match_food_names(db, unresolved))
+    return found
+
+def _match_food_names(db: Session, keys) -> dict:
+    """
+    Resolve normalized names with no exact catalog row: aliases first, then
+    the closest name in the fuzzy index. Matches that only differ from the
+    catalog name by descriptors or plurals are saved as aliases, so the next
+    lookup is exact; misspellings are matched again each time rather than
+    stored, so a bad match never becomes permanent. Returns {key: FoodSnapshot}.
+    """
+    found = {}
+    aliased = db.query(models.FoodAlias.alias_normalized, models.FoodItem) \
+        .join(models.FoodItem, models.FoodItem.id == models.FoodAlias.food_item_id) \
+        .filter(models.FoodAlias.alias_normalized.in_(keys)).all()
+    for alias, item in aliased:
+        found[alias] = catalog.snapshot(item)
+
+    index = food_index.get_index(db)
+    matches = {}
+    for key in keys:
+        if key not in found:
+            match = index.best_match(key)
+            if match is not None:
+                matches[key] = match
+    if matches:
+        items = {item.id: item for item in db.query(models.FoodItem)
+                 .filter(models.FoodItem.id.in_({match.food_id for match in matches.values()}))}
+        learned = {}
+        for key, match in matches.items():
+            item = items.get(match.food_id)
+            # SQLite can reuse the id of a rolled-back row, so check the name too
+            if item is None or item.name_normalized != match.name_normalized:
+                continue
+            found[key] = catalog.snapshot(item)
+            if food_index.match_key(key) == food_index.match_key(item.name_normalized):
+                learned[key] = (item.id, match.score)
+        food_index.remember_aliases(db, learned)
+
+    for key, food in found.items():
+        catalog.food_cache.put(key, food)
+    return found
 
-def create_food_item(db: Session, item_data: dict, source: str = "llm"):
-    """Create a new food item in memory."""
+def create_food_item(db: Session, item_data: dict, source: str = "llm", commit: bool = True):
+    """
+    Create a new food item. With commit=False the row is only added to the
+    session, so it is written by the caller's commit (e.g. together with the
+    Entry that first mentions it) and no write lock is taken before then.
+    """
     db_item = models.FoodItem(
         name=item_data["name"],
+        name_normalized=catalog.normalize_food_name(item_data["name"]),
         calories_per_100=item_data["calories_per_100"],
         protein_per_100=item_data["protein_per_100"],
         carbs_per_100=item_data["carbs_per_100"],
         fats_per_100=item_data["fats_per_100"],
         default_unit=item_data.get("default_unit", "g"),
         micros=item_data.get("micros", {}),
+        micros_packed=nutrients.pack(item_data.get("micros")),
         source=source
     )
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    if commit:
+        db.commit()
+        db.refresh(db_item)
+        food_index.get_index(db).add(db_item.id, db_item.name_normalized)
+    catalog.food_cache.invalidate(db_item.name_normalized)
     return db_item
 
-def get_portion_unit(db: Session, unit_name: str):
-    """Find a portion unit by name (case-insensitive)."""
-    # Try exact match first
-    unit = db.query(models.PortionUnit).filter(models.PortionUnit.name.ilike(unit_name)).first()
-    if unit:
-        return unit
-    
-    # Simple mapping for common variations
-    mappings = {
-        "bowl": "bowl",
-        "katori": "katori",
-        "cup": "cup",
-        "tbsp": "tablespoon",
-        "tsp": "teaspoon",
-        "glass": "glass",
-        "slice": "slice",
-        "pc": "piece",
-        "piece": "piece"
-    }
-    
-    # Check if unit_name contains any mapped key
-    for key, value in mappings.items():
-        if key in unit_name.lower():
-             return db.query(models.PortionUnit).filter(models.PortionUnit.name == value).first()
-             
-    return None
+def create_food_alias(db: Session, alias: str, food_name: str):
+    """
+    Point alias at an existing catalog food (replacing any learned alias).
+    Returns the FoodAlias, or None if food_name isn't in the catalog.
+    """
+    food = db.query(models.FoodItem) \
+        .filter(models.FoodItem.name_normalized == catalog.normalize_food_name(food_name)).first()
+    if food is None:
+        return None
+    key = catalog.normalize_food_name(alias)
+    statement = sqlite_insert(models.FoodAlias).values(
+        alias_normalized=key, food_item_id=food.id, score=1.0, source="manual", created_at=datetime.utcnow())
+    writer.write(db, lambda session: session.execute(statement.on_conflict_do_update(
+        index_elements=["alias_normalized"],
+        set_={"food_item_id": food.id, "score": 1.0, "source": "manual"}
+    )))
+    catalog.food_cache.invalidate(key)
+    return db.get(models.FoodAlias, key, populate_existing=True)
 
-def resolve_weight(quantity_str: str, db: Session) -> float:
+def create_portion_unit(db: Session, unit_data: dict):
+    """Add a portion unit and reload the in-memory portion index."""
+    db_unit = models.PortionUnit(**unit_data)
+    db.add(db_unit)
+    db.commit()
+    db.refresh(db_unit)
+    portions.load(db)
+    return db_unit
+
+# Number followed by an optional unit word: "2 katori", "1.5kg", "3"
+QUANTITY_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]+)?")
+
+def resolve_weight(quantity_str: str, db: Session = None) -> float:
     """
     Parse a quantity string and return estimated weight in grams.
-    Default to 100g if unknown.
+    Default to 100g if unknown. Portion units come from the preloaded
+    portions index; db is only used if that index hasn't been loaded yet.
     """
     # Regex to find number and unit
-    match = re.search(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]+)?", quantity_str)
+    match = QUANTITY_RE.search(quantity_str)
     
     if match:
         amount = float(match.group(1))
         unit_str = match.group(2).lower() if match.group(2) else ""
         
         # Check standard weights
-        if unit_str in ['g', 'gm', 'gms', 'gram', 'grams']:
+        if unit_str in portions.GRAM_UNITS:
             return amount
-        elif unit_str in ['ml', 'l', 'liter', 'liters', 'litre']:
+        elif unit_str in portions.ML_UNITS:
              # Assuming 1ml ~ 1g for simplicity
             return amount
-        elif unit_str in ['kg', 'kilo']:
+        elif unit_str in portions.KG_UNITS:
             return amount * 1000
         else:
-            # Check PortionUnit DB
-            portion_unit = get_portion_unit(db, unit_str)
-            if portion_unit:
-                return amount * portion_unit.weight_in_grams
+            # Check preloaded portion units
+            grams = portions.get_index(db).weight_for(unit_str)
+            if grams:
+                return amount * grams
             else:
                 # Fallback: Assume "serving" or "each" is ~100g or return 100g default
                 # If no unit provided (e.g. "2 eggs"), check if we can infer? 
@@ -83,28 +475,199 @@ def resolve_weight(quantity_str: str, db: Session) -> float:
     
     return 100.0 # Fallback
 
+def _upsert_learned_foods(db: Session, names, estimates) -> dict:
+    """
+    Insert LLM estimates as new catalog rows in the caller's transaction (not
+    committed), in log order. ON CONFLICT (name_normalized) DO NOTHING: when a
+    concurrent log already stored the same food, or this batch names it twice
+    ("Masoor Dal", "masoor dal"), the first row is kept and returned instead
+    of the unique constraint failing this log.
+    """
+    rows = []
+    for name, base_stats in zip(names, estimates):
+        rows.append({
+            "name": name,
+            "name_normalized": catalog.normalize_food_name(name),
+            "calories_per_100": base_stats["calories_per_100"],
+            "protein_per_100": base_stats["protein_per_100"],
+            "carbs_per_100": base_stats["carbs_per_100"],
+            "fats_per_100": base_stats["fats_per_100"],
+            "default_unit": base_stats.get("default_unit", "g"),
+            "micros": base_stats.get("micros", {}),
+            "micros_packed": nutrients.pack(base_stats.get("micros")),
+            "source": "llm_check"
+        })
+    db.execute(sqlite_insert(models.FoodItem).on_conflict_do_nothing(index_elements=["name_normalized"]), rows)
+
+    keys = [row["name_normalized"] for row in rows]
+    learned = {}
+    # Not cached: these rows are only visible to this transaction until the caller commits
+    index = food_index.get_index(db)
+    for item in db.query(models.FoodItem).filter(models.FoodItem.name_normalized.in_(keys)) \
+            .order_by(models.FoodItem.id):
+        learned.setdefault(item.name_normalized, catalog.snapshot(item))
+        index.add(item.id, item.name_normalized)
+    for key in keys:
+        catalog.food_cache.invalidate(key)
+    return learned
+
+def _store_learned_foods(db: Session, names, estimates) -> dict:
+    """
+    _upsert_learned_foods in db's transaction, for the caller to commit with
+    its entry; with a write queue the foods are committed on their own.
+    """
+    return writer.write(db, lambda session: _upsert_learned_foods(session, names, estimates), commit=False)
+
+def learn_food_items(db: Session, names) -> dict:
+    """
+    Ask the LLM for per-100g stats of foods missing from the catalog (in
+    parallel) and upsert them without committing. Returns
+    {normalized name: FoodSnapshot}.
+    """
+    # New Foods! Ask LLM for base stats, all of them concurrently
+    print(f"Learning new foods: {', '.join(names)}")
+    estimates = llm.estimate_many(list(names))
+    return _store_learned_foods(db, names, estimates)
+
+def _unknown_foods(names, foods: dict) -> list:
+    """Names (deduplicated, in order) missing from foods; known ones are traced as cache hits."""
+    unknown = []
+    unknown_keys = set()
+    for name in names:
+        key = catalog.normalize_food_name(name)
+        if key in foods:
+            # CACHE HIT: Log it so it shows in evaluations
+            # We construct a synthetic trace for "Cache Hit"
+            food = foods[key]
+            matched = catalog.normalize_food_name(food.name)
+            try:
+                llm.log_trace(
+                    func_name="estimate_metric_macros", 
+                    input_data={"food_name": name}, 
+                    output_data={"source": "CACHE", "calories": food.calories_per_100,
+                                 "matched_name": food.name,
+                                 "match_score": 1.0 if matched == key else round(food_index.similarity(key, matched), 4)}, 
+                    latency_ms=0, 
+                    model="DATABASE_CACHE"
+                )
+            except Exception:
+                pass
+        elif key not in unknown_keys:
+            unknown_keys.add(key)
+            unknown.append(name)
+    return unknown
+
+def _lookup_foods(db: Session, names):
+    """Batched catalog lookup; returns (known foods, unknown names)."""
+    foods = get_food_items(db, names)
+    return foods, _unknown_foods(names, foods)
+
+def resolve_food_items(db: Session, names) -> dict:
+    """
+    Resolve every food named in a log: one batched catalog lookup, then
+    learn the unknown ones. New foods are written but not committed; the caller
+    commits them together with the entry.
+    """
+    foods, unknown = _lookup_foods(db, names)
+    if unknown:
+        foods.update(learn_food_items(db, unknown))
+    return foods
+
+def _parse_locally(db: Session, raw_text: str):
+    """The local grammar's parse if it is confident, else None."""
+    start_time = perf_counter()
+    parsed_data = local_parser.parse_food_text_local(raw_text, db)
+    if parsed_data["confidence"] == "low":
+        return None
+    try:
+        llm.log_trace("parse_food_text", {"raw_text": raw_text}, parsed_data,
+                      (perf_counter() - start_time) * 1000, "LOCAL_PARSER")
+    except Exception:
+        pass
+    return parsed_data
+
+def parse_log(db: Session, raw_text: str) -> dict:
+    """
+    Parse a log: structured logs with the local grammar, repeats from the
+    persistent parse cache, and only the rest with the LLM.
+    """
+    parsed_data = _parse_locally(db, raw_text) or parse_cache.lookup(db, raw_text)
+    if parsed_data is None:
+        parsed_data = llm.parse_food_text(raw_text)
+        parse_cache.store(db, raw_text, parsed_data)
+    return parsed_data
+
+async def aparse_log(db: Session, raw_text: str) -> dict:
+    """Async parse_log: cache I/O in the threadpool, the LLM call awaited."""
+    parsed_data = _parse_locally(db, raw_text)
+    if parsed_data is not None:
+        return parsed_data
+    parsed_data = await run_in_threadpool(parse_cache.lookup, db, raw_text)
+    if parsed_data is None:
+        parsed_data = await llm.aparse_food_text(raw_text)
+        await run_in_threadpool(parse_cache.store, db, raw_text, parsed_data)
+    return parsed_data
+
 def process_entry_text(raw_text: str, db: Session) -> dict:
     """
     Orchestrate the parsing and processing of a food log.
-    1. Parse text -> items
-    2. Resolve items (DB lookup or LLM)
+    1. Parse text -> items (parse cache, else LLM)
+    2. Resolve items (one batched DB lookup, LLM for unknown foods)
     3. Calculate total macros
+    Newly learned foods are left uncommitted in db; the caller commits.
     """
-    # 1. Parse
-    parsed_data = llm.parse_food_text(raw_text)
+    # 1. Parse (repeat logs come from the parse cache)
+    parsed_data = parse_log(db, raw_text)
     items = parsed_data.get("items", [])
     time = parsed_data.get("time")
-    
+
+    # 2. Resolve all foods up front
+    foods = resolve_food_items(db, [item["name"] for item in items])
+
+    return build_entry_data(items, foods, time, db)
+
+async def aprocess_entry_text(raw_text: str, db: Session) -> dict:
+    """
+    Async process_entry_text for the request path: LLM calls are awaited on
+    the event loop and the (short) DB work runs in the threadpool, so
+    in-flight LLM requests never hold a worker thread.
+    """
+    parsed_data = await aparse_log(db, raw_text)
+    return await aprocess_items(parsed_data.get("items", []), parsed_data.get("time"), db)
+
+async def aprocess_items(items: list, time, db: Session) -> dict:
+    """
+    Resolve and total already-parsed items ({"name", "quantity"} dicts), e.g.
+    the ones a user reviewed after /preview_log. Only foods missing from the
+    catalog reach the LLM.
+    """
+    names = [item["name"] for item in items]
+
+    foods, unknown = await run_in_threadpool(_lookup_foods, db, names)
+    if unknown:
+        print(f"Learning new foods: {', '.join(unknown)}")
+        # Concurrent logs learning the same food share one in-flight estimate
+        estimates = await llm.aestimate_many(unknown)
+        # The upsert takes the write lock, so it runs only after every LLM
+        # await. With a write queue the foods are committed by the writer
+        # thread; without one they stay in db's transaction and the caller
+        # commits them with the entry
+        foods.update(await run_in_threadpool(_store_learned_foods, db, unknown, estimates))
+
+    return build_entry_data(items, foods, time, db)
+
+# Micros also reported in total_macros
+TOTAL_MICRO_KEYS = ("fiber_g", "sugar_g", "sodium_mg", "potassium_mg", "calcium_mg", "iron_mg", "vitamin_c_mg")
+
+def build_entry_data(items: list, foods: dict, time, db: Session = None) -> dict:
+    """Scale each resolved food (catalog.FoodSnapshot) to its logged quantity and total the entry."""
     processed_items = []
     total_macros = {
-        "calories": 0, "protein": 0, "carbs": 0, "fats": 0, "water_ml": 0, 
-        # Add aggregation for key micros
-        "fiber_g": 0, "sugar_g": 0, "sodium_mg": 0, "potassium_mg": 0,
-        "calcium_mg": 0, "iron_mg": 0, "vitamin_c_mg": 0
+        "calories": 0, "protein": 0, "carbs": 0, "fats": 0, "water_ml": 0
     }
     
-    # We will also collect a full "micros" dict for the entry
-    entry_micros = {}
+    # The entry's micros, summed as nutrients vectors
+    entry_micros = np.zeros(nutrients.SIZE)
 
     for item in items:
         name = item["name"]
@@ -113,30 +676,8 @@ def process_entry_text(raw_text: str, db: Session) -> dict:
         # Resolve Weight
         weight_g = resolve_weight(quantity_str, db)
         
-        # Resolve Food Item
-        food_item = get_food_item(db, name)
+        food_item = foods[catalog.normalize_food_name(name)]
         
-        if not food_item:
-            # New Food! Ask LLM for base stats
-            print(f"Learning new food: {name}")
-            base_stats = llm.estimate_metric_macros(name)
-            # Add name to stats to satisfy create_food_item signature
-            base_stats["name"] = name
-            food_item = create_food_item(db, base_stats, source="llm_check")
-        else:
-            # CACHE HIT: Log it so it shows in evaluations
-            # We construct a synthetic trace for "Cache Hit"
-            try:
-                llm.log_trace(
-                    func_name="estimate_metric_macros", 
-                    input_data={"food_name": name}, 
-                    output_data={"source": "CACHE", "calories": food_item.calories_per_100}, 
-                    latency_ms=0, 
-                    model="DATABASE_CACHE"
-                )
-            except Exception:
-                pass
-            
         # Calculate Macros for this instance
         ratio = weight_g / 100.0
         
@@ -147,30 +688,19 @@ def process_entry_text(raw_text: str, db: Session) -> dict:
             "fats": round(food_item.fats_per_100 * ratio, 1)
         }
         
-        # Calculate Micros
-        item_micros = {}
-        if food_item.micros:
-            for key, val in food_item.micros.items():
-                if isinstance(val, (int, float)):
-                    val = float(val)
-                    item_micros[key] = round(val * ratio, 2)
-                    
-                    # Aggregate into total_macros if key exists there (for convenience)
-                    if key in total_macros:
-                        total_macros[key] += item_micros[key]
-                    
-                    # Aggregate into entry_micros
-                    entry_micros[key] = entry_micros.get(key, 0) + item_micros[key]
+        # Calculate Micros: one scale of the per-100g vector
+        item_vector = food_item.micros_per_100() * ratio
+        entry_micros += item_vector
+        item_micros = nutrients.to_dict(item_vector, 2)
 
         # Add fiber to item_macros for frontend display if available
-        if "fiber" in item_micros:
-             item_macros["fiber"] = item_micros["fiber"]
-        elif "fiber_g" in item_micros:
+        if "fiber_g" in item_micros:
              item_macros["fiber"] = item_micros["fiber_g"]
 
         processed_items.append({
             "name": name,
             "quantity": quantity_str,
+            "food_item_id": food_item.id,
             "weight_g": round(weight_g, 1),
             "nutrients": item_macros,
             "micros": item_micros # Store individual item micros
@@ -181,6 +711,11 @@ def process_entry_text(raw_text: str, db: Session) -> dict:
         total_macros["protein"] += item_macros["protein"]
         total_macros["carbs"] += item_macros["carbs"]
         total_macros["fats"] += item_macros["fats"]
+
+    entry_micros = nutrients.to_dict(entry_micros, 2)
+    # Key micros alongside the macros, for convenience
+    for key in TOTAL_MICRO_KEYS:
+        total_macros[key] = entry_micros.get(key, 0)
         
     return {
         "items": processed_items,
@@ -0,0 +1,59 @@
+"""
+Single-flight: concurrent callers asking for the same key share one call.
+
+Used for LLM food estimates, so two logs that mention the same new food at
+the same time pay for one estimate instead of two. Keys are claimed in
+batches, so the foods a log still needs can go out in one batched call.
+"""
+import asyncio
+
+class AsyncSingleFlight:
+    """Per-key deduplication of in-flight calls on the running event loop."""
+
+    def __init__(self):
+        self._tasks = {}  # key -> asyncio.Task
+        self.calls = 0
+        self.shared = 0
+
+    async def do_many(self, items, run_batch):
+        """
+        items are (key, arg) pairs. Keys already in flight join those calls;
+        the rest run together as one run_batch(args) call, which must return
+        results in args order. Returns results in items order.
+
+        Each key's call is shielded, so one caller being cancelled doesn't
+        cancel it for the others. Results are shared: don't mutate them.
+        """
+        tasks = {}
+        new = {}
+        for key, arg in items:
+            if key in tasks or key in new:
+                continue
+            task = self._tasks.get(key)
+            if task is not None:
+                tasks[key] = task
+                self.shared += 1
+            else:
+                new[key] = arg
+
+        if new:
+            batch = asyncio.ensure_future(run_batch(list(new.values())))
+            for index, key in enumerate(new):
+                task = asyncio.ensure_future(self._pick(batch, index))
+                self._tasks[key] = task
+                task.add_done_callback(lambda done, key=key: self._release(key, done))
+                tasks[key] = task
+            self.calls += len(new)
+
+        return list(await asyncio.gather(*(asyncio.shield(tasks[key]) for key, _ in items)))
+
+    @staticmethod
+    async def _pick(batch, index):
+        return (await batch)[index]
+
+    def _release(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._tasks), "calls": self.calls, "shared": self.shared}
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from backend import main, models, services
+from backend.database import Base
+from backend.migrate_unique_food_names import make_food_names_unique
+
+def test_log_requests_do_not_hold_threads(tmp_path, fake_client, llm_parser):
+    print("\n--- Test: Async /log keeps LLM calls off the threadpool ---")
+    engine = create_engine(f"sqlite:///{tmp_path / 'async.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    fake = fake_client(delay_s=0.3, is_async=True)
+    main.app.dependency_overrides[main.get_db] = get_db
+
+    # More concurrent requests than the default threadpool has workers (40)
+    n = 60
+
+    async def fire():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Warm the catalog so the unique food is learned once
+            await client.post("/log", json={"raw_text": "100g Rice", "date": "2026-01-15"})
+            t0 = time.perf_counter()
+            # Distinct texts, so every request misses the parse cache and calls the LLM
+            responses = await asyncio.gather(*(
+                client.post("/log", json={"raw_text": f"{110 + 10 * i}g Rice", "date": "2026-01-15"})
+                for i in range(n)))
+            return responses, time.perf_counter() - t0
+
+    try:
+        responses, elapsed = asyncio.run(fire())
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert all(r.status_code == 200 and "error" not in r.json()["macros"] for r in responses)
+    assert fake.max_in_flight == n
+    assert elapsed < 2.0, elapsed
+
+    db = SessionLocal()
+    try:
+        assert db.get(models.DailyTotals, "2026-01-15").calories == 130 + sum(13 * (11 + i) for i in range(n))
+    finally:
+        db.close()
+        engine.dispose()
+    print(f"✅ {n} logs with 300 ms LLM latency in {elapsed * 1000:.0f} ms.")
+
+def test_concurrent_logs_share_food_estimate(tmp_path, fake_client):
+    print("\n--- Test: Single-flight food learning ---")
+    engine = create_engine(f"sqlite:///{tmp_path / 'flight.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    fake = fake_client(delay_s=0.2, is_async=True)
+    main.app.dependency_overrides[main.get_db] = get_db
+
+    async def fire():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                client.post("/log", json={"raw_text": "100g Masoor Dal", "date": "2026-01-15"}),
+                client.post("/log", json={"raw_text": "200g masoor dal", "date": "2026-01-15"}))
+
+    try:
+        responses = asyncio.run(fire())
+    finally:
+        main.app.dependency_overrides.clear()
+
+    # Neither log fell into the error fallback
+    assert all(r.status_code == 200 and "error" not in r.json()["macros"] for r in responses)
+    assert fake.calls == 1  # both logs parse locally; one shared estimate
+    db = SessionLocal()
+    try:
+        assert db.query(models.FoodItem).count() == 1
+    finally:
+        db.close()
+        engine.dispose()
+    print("✅ Two concurrent logs, one Masoor Dal estimate, one catalog row.")
+
+def test_learned_food_upsert_keeps_existing_row(session_factory):
+    first, second = session_factory(), session_factory()
+    try:
+        stats = {"calories_per_100": 116, "protein_per_100": 9, "carbs_per_100": 20, "fats_per_100": 0}
+        services._upsert_learned_foods(first, ["Masoor Dal"], [stats])
+        first.commit()
+        # A second log that estimated the same food concurrently must not fail
+        learned = services._upsert_learned_foods(second, ["Masoor Dal"], [dict(stats, calories_per_100=999)])
+        second.commit()
+        assert learned["masoor dal"].calories_per_100 == 116
+        assert second.query(models.FoodItem).count() == 1
+    finally:
+        first.close()
+        second.close()
+
+def test_learned_food_spellings_share_one_row(db):
+    stats = {"calories_per_100": 116, "protein_per_100": 9, "carbs_per_100": 20, "fats_per_100": 0}
+    learned = services._upsert_learned_foods(db, ["Masoor Dal", "masoor  dal"],
+                                             [stats, dict(stats, calories_per_100=999)])
+    db.commit()
+    assert learned["masoor dal"].calories_per_100 == 116
+    # A later spelling of a stored food conflicts on name_normalized, not name
+    services._upsert_learned_foods(db, ["MASOOR DAL"], [dict(stats, calories_per_100=999)])
+    db.commit()
+    assert [item.name for item in db.query(models.FoodItem)] == ["Masoor Dal"]
+
+def test_migration_merges_duplicate_food_names(session_factory):
+    engine = session_factory.kw["bind"]
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_food_items_name_normalized"))
+        conn.execute(text("INSERT INTO food_items (id, name, name_normalized) VALUES "
+                          "(1, 'Masoor Dal', 'masoor dal'), (2, 'masoor dal', 'masoor dal'), (3, 'Roti', 'roti')"))
+        conn.execute(text("INSERT INTO entries (id, raw_text) VALUES (1, '100g masoor dal')"))
+        conn.execute(text("INSERT INTO entry_items (entry_id, position, name, food_item_id) "
+                          "VALUES (1, 0, 'masoor dal', 2)"))
+        conn.execute(text("INSERT INTO food_aliases (alias_normalized, food_item_id) VALUES ('masur dal', 2)"))
+    assert make_food_names_unique(engine) == 1
+    assert make_food_names_unique(engine) == 0
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM food_items ORDER BY id")).scalars().all() == [1, 3]
+        assert conn.execute(text("SELECT food_item_id FROM entry_items")).scalar() == 1
+        assert conn.execute(text("SELECT food_item_id FROM food_aliases")).scalar() == 1
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO food_items (name, name_normalized) VALUES ('MASOOR DAL', 'masoor dal')"))
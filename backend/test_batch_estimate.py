@@ -0,0 +1,55 @@
+import asyncio
+from backend import llm
+from backend.benchmarks import fake_llm
+
+def test_one_call_for_many_foods(fake_client):
+    print("\n--- Test: Batched macro estimation ---")
+    fake = fake_client(delay_s=0.05)
+    names = ["Arhar Dal", "Rice", "Roti", "Mystery Curry"]
+    results = llm.estimate_many(names)
+    assert [r["calories_per_100"] for r in results] == [120, 130, 240, 100]
+    assert fake.calls == 1
+    print("✅ 4 foods estimated in 1 call.")
+
+def test_batches_are_bounded(fake_client):
+    fake = fake_client()
+    results = llm.estimate_many([f"Food {i}" for i in range(10)], batch_size=4)
+    assert len(results) == 10 and fake.calls == 3
+
+def test_only_invalid_foods_are_retried(fake_client, monkeypatch):
+    fake = fake_client(is_async=True)
+    real_batch = fake_llm.fake_estimate_batch
+
+    def flaky_batch(food_names):
+        profiles = real_batch(food_names)
+        profiles["Rice"] = dict(profiles["Rice"], calories_per_100="lots")   # not a number
+        del profiles["Roti"]                                                   # left out
+        return profiles
+
+    monkeypatch.setattr(fake_llm, "fake_estimate_batch", flaky_batch)
+    results = asyncio.run(llm.aestimate_many(["Arhar Dal", "Rice", "Roti"]))
+    assert [r["calories_per_100"] for r in results] == [120, 130, 240]
+    assert fake.calls == 3  # one batch + a single retry for each bad food
+
+def test_invalid_retry_falls_back_for_that_food_only(fake_client, monkeypatch):
+    fake = fake_client()
+    real_estimate = fake_llm.fake_estimate
+
+    def broken_rice(food_name):
+        if food_name == "Rice":
+            return {"calories_per_100": 130, "protein_per_100": None}   # bad in the batch and the retry
+        return real_estimate(food_name)
+
+    monkeypatch.setattr(fake_llm, "fake_estimate", broken_rice)
+    results = llm.estimate_many(["Arhar Dal", "Rice", "Roti"])
+    assert [r["calories_per_100"] for r in results] == [120, 0, 240]
+    # The failed food gets the complete zero profile, never a partial reply
+    assert all(key in results[1] for key in llm.MACRO_KEYS) and results[1]["micros"] == {}
+    assert fake.calls == 2
+
+def test_validate_macro_profile():
+    assert llm.validate_macro_profile({"calories_per_100": 50, "protein_per_100": 1,
+                                       "carbs_per_100": 2, "fats_per_100": 0})["micros"] == {}
+    assert llm.validate_macro_profile({"calories_per_100": -1, "protein_per_100": 1,
+                                       "carbs_per_100": 2, "fats_per_100": 0}) is None
+    assert llm.validate_macro_profile(["not", "a", "profile"]) is None
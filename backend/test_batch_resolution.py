@@ -0,0 +1,37 @@
+from sqlalchemy import event
+from backend import services, models
+
+def test_one_commit_per_entry(client, session_factory, fake_llm):
+    print("\n--- Test: New foods and the entry share one commit ---")
+    commits = []
+    engine = session_factory.kw["bind"]
+
+    def record(conn):
+        commits.append(1)
+
+    event.listen(engine, "commit", record)
+    try:
+        res = client.post("/log", json={"raw_text": "100g Arhar Dal, 200g Rice, 50g Roti", "date": "2026-01-15"})
+    finally:
+        event.remove(engine, "commit", record)
+    assert res.status_code == 200
+    assert len(commits) == 1
+    assert fake_llm["estimate"] == ["Arhar Dal", "Rice", "Roti"]
+    print("✅ Three learned foods + entry + rollup committed together.")
+
+def test_batched_lookup_dedupes(db, fake_llm):
+    services.create_food_item(db, {"name": "Rice", "calories_per_100": 130, "protein_per_100": 3,
+                                   "carbs_per_100": 28, "fats_per_100": 0})
+    data = services.process_entry_text("100g Rice, 100g rice, 50g Roti, 50g ROTI", db)
+    # Roti learned once even though it appears twice; Rice never estimated
+    assert fake_llm["estimate"] == ["Roti"]
+    assert db.query(models.FoodItem).count() == 2
+    assert data["total_macros"]["calories"] == 130 * 2 + 120 * 2
+
+def test_failed_log_rolls_back_learned_foods(client, db, monkeypatch):
+    def broken(items, foods, time, db=None):
+        raise ValueError("boom")
+    monkeypatch.setattr(services, "build_entry_data", broken)
+    res = client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-15"})
+    assert res.json()["macros"]["error"] == "boom"
+    assert db.query(models.FoodItem).count() == 0
@@ -0,0 +1,15 @@
+from backend.benchmarks import suite
+
+def test_suite_times_every_metric_and_flags_regressions():
+    print("\n--- Test: Benchmark suite ---")
+    report = {"results": {"500": suite.run_scale(500, repeat=3, warmup=1)}}
+    assert set(report["results"]["500"]) == set(suite.THRESHOLDS)
+    assert suite.compare(report, report) == []
+
+    # A baseline 3x faster than this run: every metric above the noise floor regresses
+    baseline = {"results": {"500": {metric: {**stats, "median_ms": stats["median_ms"] / 3}
+                                    for metric, stats in report["results"]["500"].items()}}}
+    regressed = {r["metric"] for r in suite.compare(report, baseline, min_delta_ms=0)}
+    assert regressed == set(suite.THRESHOLDS)
+    assert suite.compare(report, baseline, thresholds=dict.fromkeys(suite.THRESHOLDS, 3.0), min_delta_ms=0) == []
+    print(f"✅ {report['results']['500']['read_dashboard']}")
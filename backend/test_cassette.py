@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from backend import cassette, llm
+from backend.benchmarks.fake_llm import FakeAnthropic, FakeAsyncAnthropic
+
+@pytest.fixture
+def no_traces(monkeypatch):
+    monkeypatch.setattr(llm, "log_trace", lambda *args, **kwargs: None)
+
+def test_record_then_replay_offline(tmp_path, monkeypatch, no_traces):
+    print("\n--- Test: LLM cassette record/replay ---")
+    path = str(tmp_path / "llm.jsonl")
+    live, alive = FakeAnthropic(), FakeAsyncAnthropic()
+    monkeypatch.setattr(llm, "client", cassette.CassetteClient(live, cassette.Cassette(path), "record"))
+    monkeypatch.setattr(llm, "async_client", cassette.AsyncCassetteClient(alive, cassette.Cassette(path), "record"))
+    parsed = llm.parse_food_text("100g Arhar Dal, 2 Roti")
+    estimated = asyncio.run(llm.aestimate_metric_macros("Arhar Dal"))
+    assert live.calls == 1 and alive.calls == 1
+
+    # A fresh replay client with no API behind it answers from the file
+    replay = cassette.Cassette(path)
+    assert len(replay) == 2
+    monkeypatch.setattr(llm, "client", cassette.CassetteClient(None, replay, "replay"))
+    monkeypatch.setattr(llm, "async_client", cassette.AsyncCassetteClient(None, replay, "replay"))
+    assert llm.parse_food_text("100g Arhar Dal, 2 Roti") == parsed
+    assert asyncio.run(llm.aestimate_metric_macros("Arhar Dal")) == estimated
+    assert replay.hits == 2
+    print(f"✅ Replayed {replay.hits} calls with no client behind the cassette.")
+
+def test_replay_miss_raises(tmp_path):
+    client = cassette.CassetteClient(None, cassette.Cassette(str(tmp_path / "empty.jsonl")), "replay")
+    with pytest.raises(cassette.CassetteMiss):
+        client.messages.create(model=llm.PARSE_MODEL, max_tokens=10, messages=[{"role": "user", "content": "hi"}])
+
+def test_key_covers_model_and_prompt():
+    messages = [{"role": "user", "content": "100g Rice"}]
+    key = cassette.request_key(llm.PARSE_MODEL, max_tokens=100, messages=messages)
+    assert key == cassette.request_key(llm.PARSE_MODEL, messages=messages, max_tokens=100)
+    assert key != cassette.request_key(llm.ESTIMATE_MODEL, max_tokens=100, messages=messages)
+    assert key != cassette.request_key(llm.PARSE_MODEL, max_tokens=100,
+                                       messages=[{"role": "user", "content": "200g Rice"}])
@@ -0,0 +1,40 @@
+from backend import services, models, catalog
+
+def test_cache_hits_skip_db(db, fake_llm):
+    print("\n--- Test: Catalog cache ---")
+    services.process_entry_text("100g Arhar Dal", db)
+    db.commit()
+    assert fake_llm["estimate"] == ["Arhar Dal"]
+    stored = db.query(models.FoodItem).one()
+    assert stored.name_normalized == "arhar dal"
+
+    # Same food, different spelling of case/whitespace: no LLM call, served from cache after one DB read
+    services.process_entry_text("200g arhar  DAL", db)
+    services.process_entry_text("50g ARHAR DAL", db)
+    assert fake_llm["estimate"] == ["Arhar Dal"]
+
+    stats = catalog.food_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    print(f"✅ Cache stats: {stats}")
+
+def test_create_invalidates(db):
+    cache = catalog.food_cache
+    cache.put("rice", catalog.FoodSnapshot(0, "Rice", 1, 1, 1, 1, {}, "g", "stale"))
+    services.create_food_item(db, {"name": "Rice", "calories_per_100": 130, "protein_per_100": 3,
+                                   "carbs_per_100": 28, "fats_per_100": 0}, source="manual")
+    food = services.get_food_item(db, "RICE")
+    assert food.source == "manual" and food.calories_per_100 == 130
+
+def test_lru_and_ttl():
+    cache = catalog.CatalogCache(max_size=2, ttl_s=60)
+    snap = catalog.FoodSnapshot(1, "A", 0, 0, 0, 0, {}, "g", "seed")
+    cache.put("a", snap)
+    cache.put("b", snap)
+    assert cache.get("a") is snap       # "a" becomes most recent
+    cache.put("c", snap)                 # evicts "b"
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = catalog.CatalogCache(ttl_s=0)
+    expired.put("a", snap)
+    assert expired.get("a") is None
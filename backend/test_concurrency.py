@@ -0,0 +1,38 @@
+import time
+from backend import llm, services, models
+
+def test_estimates_run_concurrently(fake_client):
+    print("\n--- Test: Concurrent macro estimation ---")
+    fake = fake_client(delay_s=0.2)
+
+    names = ["Arhar Dal", "Rice", "Roti", "Mystery Curry"]
+    t0 = time.perf_counter()
+    # One food per call, so the fan-out itself is what's measured
+    results = llm.estimate_many(names, max_workers=4, batch_size=1)
+    elapsed = time.perf_counter() - t0
+
+    # Results come back in input order
+    assert [r["calories_per_100"] for r in results] == [120, 130, 240, 100]
+    # Roughly one call's latency, not four
+    assert elapsed < 0.5, elapsed
+    assert fake.max_in_flight == 4
+    print(f"✅ 4 estimates in {elapsed * 1000:.0f} ms with 200 ms injected latency each.")
+
+def test_fan_out_is_bounded(fake_client):
+    fake = fake_client(delay_s=0.05)
+
+    llm.estimate_many([f"Food {i}" for i in range(9)], max_workers=3, batch_size=1)
+    assert fake.calls == 9
+    assert fake.max_in_flight == 3
+
+def test_process_entry_learns_in_parallel(db, fake_client, monkeypatch):
+    fake = fake_client(delay_s=0.2)
+    monkeypatch.setattr(llm, "parse_food_text", lambda text: {"items": [
+        {"name": n, "quantity": "100g"} for n in ("Arhar Dal", "Rice", "Roti")], "time": None})
+
+    t0 = time.perf_counter()
+    data = services.process_entry_text("dal, rice, roti", db)
+    assert time.perf_counter() - t0 < 0.5
+    assert [i["name"] for i in data["items"]] == ["Arhar Dal", "Rice", "Roti"]
+    assert data["total_macros"]["calories"] == 120 + 130 + 240
+    assert db.query(models.FoodItem).count() == 3
@@ -0,0 +1,66 @@
+from backend import services, models, main
+from backend.database import Base
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+
+def scratch_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def add_entry(db, ts, calories):
+    db.add(models.Entry(raw_text="x", ingested_at=ts, local_date=services.local_day(ts),
+                        macros={"calories": calories, "micros": {}},
+                        items=[models.EntryItem(name="x", calories=calories)]))
+
+def test_dashboard_day_range():
+    db = scratch_session()
+    try:
+        print("\n--- Test: Dashboard only reads the requested day ---")
+        add_entry(db, datetime(2026, 1, 14, 23, 59, 59), 100)  # day before
+        add_entry(db, datetime(2026, 1, 15, 0, 0, 0), 200)      # first instant of the day
+        add_entry(db, datetime(2026, 1, 15, 21, 30), 300)
+        add_entry(db, datetime(2026, 1, 16, 0, 0, 0), 400)      # next day (half-open end)
+        db.commit()
+
+        entries = services.get_entries_for_day(db, "2026-01-15")
+        assert [e.macros["calories"] for e in entries] == [200, 300]
+        # Selected by the stored local day, not by the ingested_at date
+        db.add(models.Entry(raw_text="late", ingested_at=datetime(2026, 1, 16, 0, 30), local_date="2026-01-15",
+                            macros={"calories": 50, "micros": {}}))
+        db.commit()
+        assert [e.raw_text for e in services.get_entries_for_day(db, "2026-01-16")] == ["x"]
+        assert len(services.get_entries_for_day(db, "2026-01-15")) == 3
+
+        dash = main.read_dashboard(date="2026-01-15", db=db)
+        assert dash["totals"]["calories"] == 500
+        print("✅ The local_date query returns exactly the day's entries.")
+    finally:
+        db.close()
+
+def test_local_day_converts_aware_timestamps(monkeypatch):
+    # Naive timestamps are already local wall-clock time
+    assert services.local_day(datetime(2026, 1, 15, 1, 0)) == "2026-01-15"
+    assert services.local_day(datetime(2026, 1, 15, 23, 59, 59)) == "2026-01-15"
+
+    monkeypatch.setattr(services, "LOCAL_TZ", ZoneInfo("Asia/Kolkata"))
+    assert services.local_day(datetime(2026, 1, 14, 18, 29, tzinfo=timezone.utc)) == "2026-01-14"
+    assert services.local_day(datetime(2026, 1, 14, 18, 30, tzinfo=timezone.utc)) == "2026-01-15"  # local midnight
+
+    # New York moves to UTC-4 on 2026-03-08, so local midnight moves from 05:00 to 04:00 UTC
+    monkeypatch.setattr(services, "LOCAL_TZ", ZoneInfo("America/New_York"))
+    assert services.local_day(datetime(2026, 3, 8, 4, 59, tzinfo=timezone.utc)) == "2026-03-07"
+    assert services.local_day(datetime(2026, 3, 8, 6, 30, tzinfo=timezone.utc)) == "2026-03-08"
+    assert services.local_day(datetime(2026, 3, 9, 3, 59, tzinfo=timezone.utc)) == "2026-03-08"
+    assert services.local_day(datetime(2026, 3, 9, 4, 0, tzinfo=timezone.utc)) == "2026-03-09"
+    # ...and back on 2026-11-01
+    assert services.local_day(datetime(2026, 11, 2, 4, 59, tzinfo=timezone.utc)) == "2026-11-01"
+    assert services.local_day(datetime(2026, 11, 2, 5, 0, tzinfo=timezone.utc)) == "2026-11-02"
+    # Other offsets convert the same way
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert services.local_day(datetime(2026, 3, 9, 9, 29, tzinfo=ist)) == "2026-03-08"
+
+if __name__ == "__main__":
+    test_dashboard_day_range()
@@ -0,0 +1,82 @@
+import json
+import pytest
+from sqlalchemy import text
+from backend import models, services
+from backend.migrate_add_entry_items import migrate_entry_items
+
+def test_log_stores_items_as_rows(client, db):
+    print("\n--- Test: Entry items in entry_items ---")
+    logged = client.post("/log", json={"raw_text": "200g Rice, 50g Roti", "date": "2026-01-15"}).json()
+    # The API shape is unchanged: items come back inside macros
+    assert [i["name"] for i in logged["macros"]["items"]] == ["Rice", "Roti"]
+    assert logged["macros"]["items"][0]["nutrients"]["calories"] == 260
+
+    rows = db.query(models.EntryItem).filter(models.EntryItem.entry_id == logged["id"]) \
+        .order_by(models.EntryItem.position).all()
+    assert [(r.name, r.weight_g, r.calories) for r in rows] == [("Rice", 200.0, 260), ("Roti", 50.0, 120)]
+    assert all(r.food_item_id is not None for r in rows)
+    stored = db.execute(text("SELECT macros FROM entries WHERE id = :id"), {"id": logged["id"]}).scalar()
+    assert "items" not in json.loads(stored)
+
+    dash = client.get("/dashboard", params={"date": "2026-01-15"}).json()
+    assert dash["entries"][0]["macros"]["items"] == logged["macros"]["items"]
+
+    assert client.delete(f"/log/{logged['id']}").status_code == 200
+    assert db.query(models.EntryItem).count() == 0
+    print(f"✅ {len(rows)} item rows written, returned in macros and deleted with the entry.")
+
+def test_migration_moves_items_out_of_the_blob(session_factory, db):
+    legacy = {"calories": 380, "protein": 10.0, "carbs": 79.0, "fats": 1.5, "water_ml": 0,
+              "food_name": "Rice, Roti", "micros": {"iron_mg": 1.0},
+              "items": [{"name": "Rice", "quantity": "200g", "weight_g": 200.0,
+                         "nutrients": {"calories": 260, "protein": 6.0, "carbs": 56.0, "fats": 0.0},
+                         "micros": {"potassium_mg": 70.0}},
+                        {"name": "Roti", "quantity": "50g", "weight_g": 50.0,
+                         "nutrients": {"calories": 120, "protein": 4.0, "carbs": 23.0, "fats": 1.5, "fiber": 2.0},
+                         "micros": {"fiber_g": 2.0, "iron_mg": 1.0}}]}
+    db.add(models.FoodItem(name="Rice", name_normalized="rice", calories_per_100=130))
+    db.add(models.Entry(raw_text="200g Rice, 50g Roti", local_date="2026-01-15", macros=legacy))
+    db.commit()
+
+    engine = session_factory.kw["bind"]
+    assert migrate_entry_items(engine, batch_size=1) == 1
+    assert migrate_entry_items(engine) == 0   # idempotent
+
+    db.expire_all()
+    entry = db.query(models.Entry).one()
+    assert "items" not in entry.macros
+    rows = entry.items
+    assert [r.food_item_id is not None for r in rows] == [True, False]
+    # Read back exactly as stored before, plus the resolved food ids
+    restored = [{k: v for k, v in item.items() if k != "food_item_id"} for item in entry.macros_with_items["items"]]
+    assert restored == legacy["items"]
+
+def test_day_sums_run_in_sql(client, db):
+    client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-15"})
+    client.post("/log", json={"raw_text": "200g Rice, 50g Roti", "date": "2026-01-15"})
+    rice_id = client.post("/log", json={"raw_text": "100g Rice", "date": "2026-01-16"}).json()["id"]
+    days = services.sum_day_totals(db, "2026-01-15", "2026-01-16")
+    assert (days["2026-01-15"]["entry_count"], days["2026-01-15"]["calories"]) == (2, 500)
+    assert round(days["2026-01-15"]["micros"]["potassium_mg"], 2) == 370
+    assert days["2026-01-16"]["calories"] == 130
+    assert services.sum_day_totals(db, "2026-01-16", "2026-01-16", exclude_id=rice_id) == {}
+    # An entry without items (the error fallback) counts, with zero totals
+    db.add(models.Entry(raw_text="lost", local_date="2026-01-16", macros={"error": "boom", "calories": 0}))
+    db.commit()
+    day = services.sum_day_totals(db, "2026-01-16", "2026-01-16")["2026-01-16"]
+    assert (day["entry_count"], day["calories"]) == (2, 130)
+
+def test_unmigrated_entries_fail_loudly(client, session_factory, db):
+    legacy = {"calories": 260, "micros": {}, "items": [
+        {"name": "Rice", "quantity": "200g", "weight_g": 200.0, "nutrients": {"calories": 260}, "micros": {}}]}
+    db.add(models.Entry(raw_text="200g Rice", local_date="2026-01-15", macros=legacy))
+    db.commit()
+    # Its totals would read as zero from entry_items, so the dashboard refuses
+    res = client.get("/dashboard", params={"date": "2026-01-15"})
+    assert res.status_code == 503 and "migrate_add_entry_items" in res.json()["detail"]
+    with pytest.raises(services.PendingMigrationError):
+        services.rebuild_daily_totals(db)
+    db.rollback()
+
+    migrate_entry_items(session_factory.kw["bind"])
+    assert client.get("/dashboard", params={"date": "2026-01-15"}).json()["totals"]["calories"] == 260
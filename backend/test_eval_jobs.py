@@ -0,0 +1,61 @@
+import threading
+import time
+import pytest
+from backend import main
+from backend.benchmarks.fake_llm import FakeAnthropic, fake_parse
+from backend.evals import eval_jobs, run_evals
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch, fake_llm):
+    monkeypatch.setattr(run_evals, "parse_food_text", fake_parse)
+    runner = eval_jobs.EvalRunner(runs_dir=str(tmp_path), concurrency=4)
+    monkeypatch.setattr(main, "eval_runner", runner)
+    return runner
+
+def _wait_finished(client, run_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        run = client.get(f"/evals/runs/{run_id}").json()
+        if run["status"] in eval_jobs.FINISHED:
+            return run
+        time.sleep(0.02)
+    raise AssertionError(f"eval run {run_id} still {run['status']}")
+
+def test_run_in_background_with_bounded_concurrency(client, runner, monkeypatch, tmp_path):
+    print("\n--- Test: Background eval run ---")
+    judge = FakeAnthropic(delay_s=0.02)
+    monkeypatch.setattr(run_evals, "client", judge)
+    res = client.post("/evals/run")
+    assert res.status_code == 202 and res.json()["status"] in ("queued", "running")
+
+    run = _wait_finished(client, res.json()["id"])
+    total = run["progress"]["parse"]["total"]
+    assert run["status"] == "completed"
+    assert run["progress"]["judge"] == {"done": total, "total": total}
+    assert run["results"]["judge"]["passed"] == total
+    assert run["results"]["macros"]["total"] == len(run_evals.MACRO_TEST_CASES)
+    assert 1 < judge.max_in_flight <= 4
+
+    # Saved to disk: still readable after a restart
+    restarted = eval_jobs.EvalRunner(runs_dir=str(tmp_path))
+    assert restarted.get(run["id"]) == run
+    assert [r["id"] for r in client.get("/evals/runs").json()] == [run["id"]]
+    assert client.get("/evals/runs/19990101-000000-abcdef").status_code == 404
+    print(f"✅ {total} examples judged, at most {judge.max_in_flight} calls in flight.")
+
+def test_cancel_skips_queued_examples(client, runner, monkeypatch):
+    release = threading.Event()
+
+    class BlockedJudge(FakeAnthropic):
+        def create(self, **kwargs):
+            release.wait(5)
+            return super().create(**kwargs)
+    monkeypatch.setattr(run_evals, "client", BlockedJudge())
+
+    run_id = client.post("/evals/run").json()["id"]
+    cancelled = client.post(f"/evals/runs/{run_id}/cancel").json()
+    assert cancelled["id"] == run_id
+    release.set()
+    run = _wait_finished(client, run_id)
+    assert run["status"] == "cancelled"
+    assert run["progress"]["judge"]["done"] < run["progress"]["judge"]["total"]
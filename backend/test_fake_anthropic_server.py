@@ -0,0 +1,90 @@
+import asyncio
+import random
+import threading
+import time
+import anthropic
+import httpx
+import pytest
+import uvicorn
+from backend import cassette, llm, main
+from backend.benchmarks import fake_anthropic_server as fake_server
+from backend.benchmarks.common import scratch_db, drop_db
+from backend.benchmarks.load_log import LoadGenerator, parse_mix
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Run a fake server app on a free local port; HELIOS_LLM_BASE_URL points at it."""
+    servers = []
+
+    def start(app):
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.01)
+        servers.append(server)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        monkeypatch.setenv("HELIOS_LLM_BASE_URL", f"http://127.0.0.1:{port}")
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        return app
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+def test_sdk_round_trip(serve, monkeypatch):
+    print("\n--- Test: Fake Anthropic server ---")
+    app = serve(fake_server.create_app())
+    # The real SDK, over HTTP, configured the way llm.py builds its client
+    monkeypatch.setattr(llm, "async_client", cassette.make_async_client(mode="live"))
+    monkeypatch.setattr(llm, "log_trace", lambda *args, **kwargs: None)
+
+    async def calls():
+        return await llm.aparse_food_text("100g Arhar Dal, 2 Roti"), await llm.aestimate_metric_macros("Rice")
+    parsed, estimated = asyncio.run(calls())
+    assert [item["name"] for item in parsed["items"]] == ["Arhar Dal", "Roti"]
+    assert estimated["calories_per_100"] == 130
+    assert app.state.stats.calls == {"parse": 1, "estimate": 1}
+    print(f"✅ Served {app.state.stats.to_dict()}")
+
+def test_injected_errors_use_api_error_bodies(serve):
+    app = serve(fake_server.create_app(fake_server.FakeServerConfig(errors={529: 1.0}, error_latency_ms=0)))
+    client = cassette.make_client(mode="live").with_options(max_retries=0)
+    with pytest.raises(anthropic.APIStatusError) as excinfo:
+        client.messages.create(model=llm.PARSE_MODEL, max_tokens=10,
+                              messages=[{"role": "user", "content": llm.build_parse_prompt("2 Roti")}])
+    assert excinfo.value.status_code == 529
+    assert excinfo.value.body["error"]["type"] == "overloaded_error"
+    assert app.state.stats.errors == {529: 1}
+
+def test_latency_profile_matches_median_and_p95():
+    profile = fake_server.LatencyProfile(100, 400)
+    rng = random.Random(0)
+    samples = sorted(profile.sample_s(rng) * 1000 for _ in range(20000))
+    assert samples[10000] == pytest.approx(100, rel=0.05)
+    assert samples[19000] == pytest.approx(400, rel=0.1)
+
+@pytest.fixture
+def file_db(tmp_path):
+    """A file database, like the real server's, so concurrent requests get their own connections."""
+    engine, SessionLocal, path = scratch_db(str(tmp_path / "load.db"))
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+    main.app.dependency_overrides[main.get_db] = get_db
+    yield
+    main.app.dependency_overrides.clear()
+    drop_db(engine, path)
+
+def test_load_generator_reports_per_endpoint(file_db, fake_llm):
+    generator = LoadGenerator("http://helios", rps=200, duration_s=0.2, mix=parse_mix("log=2,dashboard=1,preview=1"),
+                              transport=httpx.ASGITransport(app=main.app))
+    report = asyncio.run(generator.run())
+    assert report["arrivals"] == 40 and report["sqlite_lock_errors"] == 0
+    assert sum(e["requests"] for e in report["endpoints"].values()) == 40
+    assert all(e["ok"] == e["requests"] for e in report["endpoints"].values())
+    assert report["endpoints"]["log"]["p99_ms"] is not None
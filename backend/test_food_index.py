@@ -0,0 +1,68 @@
+from sqlalchemy import text
+from backend import models, services, llm, food_index
+from backend.migrate_drop_fuzzy_aliases import drop_fuzzy_aliases
+
+def test_spelling_variants_reuse_catalog_food(db, fake_llm, monkeypatch):
+    print("\n--- Test: Fuzzy food-name matching ---")
+    services.process_entry_text("100g Arhar Dal", db)
+    db.commit()
+
+    traces = []
+    monkeypatch.setattr(llm, "log_trace", lambda *args, **kwargs: traces.append(kwargs))
+    data = services.process_entry_text("100g Arhar Daal, 200g arhar dal cooked", db)
+    db.commit()
+
+    assert fake_llm["estimate"] == ["Arhar Dal"]
+    assert db.query(models.FoodItem).count() == 1
+    assert data["total_macros"]["calories"] == 120 * 3
+    # Only the descriptor variant is saved: a misspelling is matched afresh each time
+    aliases = {a.alias_normalized: a for a in db.query(models.FoodAlias)}
+    assert set(aliases) == {"arhar dal cooked"}
+    assert aliases["arhar dal cooked"].source == "normalized"
+
+    hits = [t["output_data"] for t in traces if t.get("model") == "DATABASE_CACHE"]
+    assert [h["matched_name"] for h in hits] == ["Arhar Dal", "Arhar Dal"]
+    # "cooked" is a descriptor, so that variant compares as an exact name
+    assert food_index.MATCH_THRESHOLD <= hits[0]["match_score"] < 1 and hits[1]["match_score"] == 1.0
+    print(f"✅ Variants matched with scores {[h['match_score'] for h in hits]}.")
+
+def test_manual_alias(client, fake_llm):
+    client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-15"})
+    assert client.post("/catalog/aliases", json={"alias": "Toor Dal", "food_name": "Arhar Dal"}).status_code == 200
+    assert client.post("/catalog/aliases", json={"alias": "Toor Dal", "food_name": "Nope"}).status_code == 404
+    assert client.post("/catalog/aliases", json={"alias": "arhar dal", "food_name": "Arhar Dal"}).status_code == 400
+
+    res = client.post("/log", json={"raw_text": "200g Toor Dal", "date": "2026-01-15"})
+    assert res.json()["macros"]["calories"] == 240
+    assert fake_llm["estimate"] == ["Arhar Dal"]
+
+def test_index_threshold():
+    index = food_index.FoodNameIndex()
+    for food_id, name in enumerate(["paneer tikka", "roti", "masoor dal", "chicken curry"], start=1):
+        index.add(food_id, name)
+    assert index.best_match("rotis").food_id == 2
+    assert index.best_match("chiken curry").food_id == 4
+    assert index.best_match("chicken tikka") is None
+    assert index.best_match("moong dal") is None
+
+def test_longer_dish_names_are_other_foods():
+    index = food_index.FoodNameIndex()
+    for food_id, name in enumerate(["moong dal", "peanut butter", "chicken curry", "paneer tikka"], start=1):
+        index.add(food_id, name)
+    for query, catalog_name in [("moong dal halwa", "moong dal"), ("peanut butter toast", "peanut butter"),
+                                ("chicken curry rice", "chicken curry"), ("paneer tikka masala", "paneer tikka")]:
+        # Close enough by trigrams alone, but each query names a food the catalog name lacks
+        assert food_index.similarity(query, catalog_name) >= food_index.MATCH_THRESHOLD
+        assert index.best_match(query) is None, query
+    assert index.best_match("peanut butters").food_id == 2
+    assert index.best_match("panner tikka").food_id == 4
+
+def test_migration_drops_fuzzy_aliases(db, session_factory):
+    db.add(models.FoodItem(id=1, name="Moong Dal", name_normalized="moong dal", calories_per_100=100))
+    db.execute(text("INSERT INTO food_aliases (alias_normalized, food_item_id, score, source) VALUES "
+                    "('moong dal halwa', 1, 0.77, 'fuzzy'), ('moong dals', 1, 0.9, 'fuzzy'), "
+                    "('mung dal', 1, 1.0, 'manual')"))
+    db.commit()
+    assert drop_fuzzy_aliases(session_factory.kw["bind"]) == 1
+    assert {(a.alias_normalized, a.source) for a in db.query(models.FoodAlias)} == {
+        ("moong dals", "normalized"), ("mung dal", "manual")}
@@ -0,0 +1,64 @@
+import json
+import pytest
+from sqlalchemy import text
+from backend import database, models, services, import_foods
+
+USDA_CSV = """Description,Energy (kcal),Protein,"Carbohydrate, by difference",Total lipid (fat),"Fiber, total dietary",Sodium
+Rice,130,2.7,28.2,0.3,0.4,1
+Roti,264,8.7,48,5.1,Tr,
+Arhar Dal,999,1,1,1,,
+Mystery Paste,,1,1,1,,
+Rice,131,2.7,28.2,0.3,0.4,1
+"""
+
+def test_import_is_streamed_and_idempotent(db, session_factory, fake_llm, tmp_path):
+    print("\n--- Test: Bulk food import ---")
+    services.process_entry_text("100g Arhar Dal", db)
+    db.commit()
+    path = tmp_path / "usda.csv"
+    path.write_text(USDA_CSV)
+    engine = session_factory.kw["bind"]
+
+    stats = import_foods.import_foods(str(path), engine=engine, batch_size=2)
+    assert stats == {"read": 5, "inserted": 2, "skipped": 2, "invalid": 1}
+    roti = db.query(models.FoodItem).filter_by(name="Roti").one()
+    assert (roti.source, roti.calories_per_100, roti.protein_per_100) == ("seed", 264, 9)
+    assert roti.micros == {"fiber_g": 0.0}
+    # The learned Arhar Dal row is kept as it was
+    assert db.query(models.FoodItem).filter_by(name="Arhar Dal").one().calories_per_100 == 120
+
+    assert import_foods.import_foods(str(path), engine=engine)["inserted"] == 0
+    assert db.query(models.FoodItem).count() == 3
+
+    data = services.process_entry_text("200g rice, 1 roti", db)
+    assert fake_llm["estimate"] == ["Arhar Dal"]
+    assert data["total_macros"]["calories"] == 260 + 132
+    print(f"✅ Seeded foods used without estimate calls: {stats}")
+
+def test_json_lines_with_ifct_codes(session_factory, db, tmp_path):
+    path = tmp_path / "ifct.jsonl"
+    rows = [{"name": "Curd", "ENERC_KCAL": 60, "PROTCNT": 3.1, "CHOAVLDF": 3, "FATCE": 4, "CA": 149, "unit": "ml"},
+            {"name": "Ghee", "ENERC_KCAL": 900, "PROTCNT": 0, "CHOAVLDF": 0, "FATCE": 99.8}]
+    path.write_text("\n".join(json.dumps(row) for row in rows))
+    stats = import_foods.import_foods(str(path), engine=session_factory.kw["bind"])
+    assert stats["inserted"] == 2
+    curd = db.query(models.FoodItem).filter_by(name="Curd").one()
+    assert (curd.default_unit, curd.micros) == ("ml", {"calcium_mg": 149.0})
+
+def test_failed_import_rolls_back_on_wal_engine(tmp_path):
+    write_engine, read_engine = database.make_engines(tmp_path / "wal.db", "wal")
+    try:
+        database.Base.metadata.create_all(bind=write_engine)
+        path = tmp_path / "broken.jsonl"
+        good = [{"name": name, "ENERC_KCAL": 100, "PROTCNT": 1, "CHOAVLDF": 1, "FATCE": 1} for name in ("Curd", "Ghee")]
+        path.write_text("\n".join(json.dumps(row) for row in good) + "\n{not json\n")
+        with pytest.raises(json.JSONDecodeError):
+            import_foods.import_foods(str(path), engine=write_engine, batch_size=1)
+        with read_engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM food_items")).scalar() == 0
+
+        path.write_text("\n".join(json.dumps(row) for row in good))
+        assert import_foods.import_foods(str(path), engine=write_engine, batch_size=1)["inserted"] == 2
+    finally:
+        write_engine.dispose()
+        read_engine.dispose()
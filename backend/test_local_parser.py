@@ -0,0 +1,34 @@
+from backend import services
+from backend.init_db import seed_portion_units
+from backend.local_parser import parse_food_text_local
+
+def test_structured_logs_parse_locally(db):
+    print("\n--- Test: Local parser fast path ---")
+    seed_portion_units(db)
+    result = parse_food_text_local("2 katori rice, 3 roti, 100g Arhar Dal at 8 pm", db)
+    assert result["confidence"] == "high" and result["time"] == "20:00"
+    assert [(i["name"], i["quantity"]) for i in result["items"]] == [
+        ("Rice", "2 katori"), ("Roti", "3 pieces"), ("Arhar Dal", "100 g")]
+    # Quantities use resolve_weight's vocabulary, so they resolve the same way
+    assert [services.resolve_weight(i["quantity"], db) for i in result["items"]] == [300, 150, 100]
+
+    result = parse_food_text_local("Breakfast: a bowl of oats, 2 slices of toast", db)
+    # A meal label isn't a time, as with the LLM parser
+    assert result["confidence"] == "medium" and result["time"] is None
+    assert [(i["name"], i["quantity"]) for i in result["items"]] == [("Oats", "1 bowl"), ("Toast", "2 slices")]
+    print("✅ Structured logs parsed without the LLM.")
+
+def test_unstructured_logs_fall_back(db):
+    seed_portion_units(db)
+    for text in ("coffee and a bagel",                              # no quantities
+                 "i ate 2 sandwiches made from sourdough bread",     # prose
+                 "2 handfuls of nuts",                               # unknown unit
+                 "1 cup", "2 katori", "100g",                        # a unit but no food
+                 "mac and cheese"):
+        assert parse_food_text_local(text, db) == {"items": [], "time": None, "confidence": "low"}
+
+def test_parse_log_skips_llm_when_confident(db, fake_llm):
+    seed_portion_units(db)
+    assert services.parse_log(db, "2 katori rice at 1 pm")["time"] == "13:00"
+    services.parse_log(db, "some leftover pasta")
+    assert fake_llm["parse"] == ["some leftover pasta"]
@@ -0,0 +1,47 @@
+import json
+import numpy as np
+from sqlalchemy import text
+from backend import models, nutrients, services, catalog
+from backend.migrate_add_micros_packed import add_micros_packed_column
+
+def test_vectors_fold_aliases_and_pack():
+    vec = nutrients.to_vector({"fiber": 1.5, "fiber_g": 0.5, "Potassium": 300, "lycopene_mg": 2, "iron_mg": "n/a"})
+    assert vec.shape == (nutrients.SIZE,)
+    assert nutrients.to_dict(vec) == {"fiber_g": 2.0, "potassium_mg": 300.0}
+    # Key case doesn't matter, for registry keys as for aliases
+    assert nutrients.canonical({"Potassium_mg": 70, "Fiber_G": 1}) == {"fiber_g": 1.0, "potassium_mg": 70.0}
+
+    blob = nutrients.pack({"fiber_g": 3.2, "vitamin_a_iu": 150})
+    assert len(blob) == 4 * nutrients.SIZE
+    assert nutrients.to_dict(nutrients.unpack(blob), 2) == {"fiber_g": 3.2, "vitamin_a_iu": 150.0}
+    # A profile packed when the registry was shorter reads the newer nutrients as 0
+    assert nutrients.to_dict(nutrients.unpack(blob[:8]), 2) == {"fiber_g": 3.2}
+
+def test_entry_micros_are_scaled_vectors(db, fake_llm):
+    print("\n--- Test: Micros scale as nutrient vectors ---")
+    services.create_food_item(db, {"name": "Rice", "calories_per_100": 130, "protein_per_100": 3, "carbs_per_100": 28,
+                                   "fats_per_100": 0, "micros": {"fiber": 0.4, "potassium_mg": 35}}, source="manual")
+    stored = db.query(models.FoodItem).one()
+    assert stored.micros == {"fiber": 0.4, "potassium_mg": 35}
+    assert np.allclose(nutrients.unpack(stored.micros_packed), nutrients.to_vector(stored.micros))
+
+    data = services.process_entry_text("200g Rice, 50g Rice", db)
+    assert data["items"][0]["micros"] == {"fiber_g": 0.8, "potassium_mg": 70.0}
+    assert data["items"][0]["nutrients"]["fiber"] == 0.8
+    assert data["micros"] == {"fiber_g": 1.0, "potassium_mg": 87.5}
+    assert data["total_macros"]["potassium_mg"] == 87.5
+    print(f"✅ Entry micros: {data['micros']}")
+
+def test_migration_packs_existing_foods(db, session_factory):
+    engine = session_factory.kw["bind"]
+    db.execute(text("INSERT INTO food_items (name, name_normalized, calories_per_100, micros) VALUES "
+                    "('Curd', 'curd', 60, :micros), ('Ghee', 'ghee', 900, NULL)"),
+               {"micros": json.dumps({"calcium": 149})})
+    db.commit()
+    assert add_micros_packed_column(engine, batch_size=1) == 2
+    assert add_micros_packed_column(engine) == 0
+
+    curd = services.get_food_item(db, "Curd")
+    assert isinstance(curd, catalog.FoodSnapshot)
+    assert nutrients.to_dict(curd.micros_vector) == {"calcium_mg": 149.0}
+    assert not services.get_food_item(db, "Ghee").micros_vector.any()
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from backend import models, services, parse_cache
+
+def test_repeat_logs_skip_parse(db, fake_llm, llm_parser):
+    print("\n--- Test: Persistent parse cache ---")
+    first = services.parse_log(db, "2 Eggs, 1 Toast at 8am")
+    assert first["time"] is None            # the fake parser never extracts times
+    # Same meal, different case/spacing and time: one LLM parse, own time each
+    again = services.parse_log(db, "2 eggs ,  1 toast @ 9:30 pm")
+    untimed = services.parse_log(db, "2 Eggs, 1 Toast")
+    assert fake_llm["parse"] == ["2 Eggs, 1 Toast at 8am"]
+    assert [item["name"] for item in again["items"]] == [item["name"] for item in first["items"]]
+    assert again["time"] == "21:30"
+    assert untimed["time"] is None
+
+    stats = parse_cache.get_stats(db)
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["size"] == 1
+    print(f"✅ Parse cache stats: {stats}")
+
+def test_low_confidence_not_cached(db, fake_llm, llm_parser, monkeypatch):
+    monkeypatch.setattr(services.llm, "parse_food_text",
+                        lambda raw_text: {"items": [{"name": raw_text, "quantity": "1 serving"}],
+                                          "time": None, "confidence": "low"})
+    services.parse_log(db, "mystery plate")
+    assert db.query(models.ParseCacheEntry).count() == 0
+
+def test_expiry_and_eviction(db, fake_llm, llm_parser, monkeypatch):
+    services.parse_log(db, "100g Rice")
+    row = db.query(models.ParseCacheEntry).one()
+    row.created_at = datetime.utcnow() - timedelta(days=parse_cache.PARSE_CACHE_TTL_DAYS + 1)
+    db.commit()
+    services.parse_log(db, "100g Rice")
+    assert fake_llm["parse"] == ["100g Rice", "100g Rice"]
+    assert parse_cache.get_stats(db)["expirations"] == 1
+
+    monkeypatch.setattr(parse_cache, "PARSE_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(parse_cache, "EVICT_EVERY", 1)
+    for text in ("100g Dal", "100g Roti", "100g Curd"):
+        services.parse_log(db, text)
+    db.expire_all()
+    assert {row.normalized_text for row in db.query(models.ParseCacheEntry)} == {"100g roti", "100g curd"}
@@ -0,0 +1,39 @@
+from sqlalchemy import event
+from backend import services, portions
+from backend.init_db import seed_portion_units
+
+def test_resolve_weight_without_db_queries(db):
+    print("\n--- Test: Preloaded portion units ---")
+    seed_portion_units(db)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        assert services.resolve_weight("2 katori", db) == 300
+        assert services.resolve_weight("1.5 Bowls", db) == 375
+        assert services.resolve_weight("2 tbsp", db) == 30
+        assert services.resolve_weight("3 pcs", db) == 150
+        assert services.resolve_weight("250 ml", db) == 250
+        assert services.resolve_weight("2 eggs", db) == 100   # unknown unit: 50g each
+        assert services.resolve_weight("some", db) == 100.0   # no number
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+    assert statements == []
+    print("✅ Quantities resolve from the in-memory index with zero SQL.")
+
+def test_index_reloads_on_new_unit(db):
+    seed_portion_units(db)
+    assert services.resolve_weight("1 thali", db) == 50
+    services.create_portion_unit(db, {"name": "thali", "weight_in_grams": 450})
+    assert services.resolve_weight("1 thali", db) == 450
+    assert portions.get_index().units["thali"] == 450
+
+def test_defaults_without_db():
+    # Nothing preloaded and no session: built-in units, not an AttributeError
+    assert services.resolve_weight("2 katori") == 300
+    assert services.resolve_weight("1 cup") == 240
+    assert portions.get_index() is portions.DEFAULT_INDEX
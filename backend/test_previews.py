@@ -0,0 +1,37 @@
+from backend import previews
+
+def test_log_redeems_preview_token(client, fake_llm, llm_parser):
+    print("\n--- Test: /log reuses the /preview_log result ---")
+    preview = client.post("/preview_log", json={"raw_text": "100g Arhar Dal, 200g Rice"}).json()
+    assert preview["preview_token"] and preview["expires_in"] == previews.preview_store.ttl_s
+
+    res = client.post("/log", json={"raw_text": "100g Arhar Dal, 200g Rice", "date": "2026-01-15",
+                                    "preview_token": preview["preview_token"]})
+    assert res.status_code == 200
+    assert res.json()["macros"]["calories"] == preview["total_macros"]["calories"] == 120 + 260
+    # One parse and one estimate per food, all paid for by the preview
+    assert len(fake_llm["parse"]) == 1
+    assert fake_llm["estimate"] == ["Arhar Dal", "Rice"]
+    print("✅ Confirmed log committed without touching the LLM.")
+
+def test_log_with_edited_items_skips_parse(client, fake_llm, llm_parser):
+    client.post("/preview_log", json={"raw_text": "100g Arhar Dal"})
+    res = client.post("/log", json={"raw_text": "200g Arhar Dal at 8 pm", "date": "2026-01-15",
+                                    "items": [{"name": "Arhar Dal", "quantity": "200g"}]})
+    body = res.json()
+    assert body["macros"]["calories"] == 240
+    assert body["ingested_at"].startswith("2026-01-15T20:00")
+    assert fake_llm["parse"] == ["100g Arhar Dal"]
+    assert fake_llm["estimate"] == ["Arhar Dal"]
+
+def test_tokens_are_single_use_and_bound_to_text():
+    store = previews.PreviewStore()
+    token = store.put("100g Rice", {"items": []})
+    assert store.pop(token, "200g Rice") is None       # edited after previewing
+    token = store.put("100g Rice", {"items": []})
+    assert store.pop(token, "100g Rice") == {"items": []}
+    assert store.pop(token, "100g Rice") is None
+
+    expired = previews.PreviewStore(ttl_s=0)
+    assert expired.pop(expired.put("100g Rice", {}), "100g Rice") is None
+    assert expired.stats()["expired"] == 1
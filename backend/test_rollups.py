@@ -0,0 +1,82 @@
+from backend import services, models
+
+def test_rollup_tracks_create_and_delete(client, db):
+    print("\n--- Test: Daily rollup follows /log and DELETE /log ---")
+    first = client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-15"}).json()
+    client.post("/log", json={"raw_text": "200g Rice, 50g Roti", "date": "2026-01-15"})
+
+    totals = db.get(models.DailyTotals, "2026-01-15")
+    assert totals.entry_count == 2
+    assert totals.calories == 120 + 260 + 120
+    assert round(totals.micros["potassium_mg"], 2) == 300 + 70
+
+    dash = client.get("/dashboard", params={"date": "2026-01-15"}).json()
+    assert dash["totals"]["calories"] == 500
+    assert dash["totals"]["micros"]["iron_mg"] == 2.5
+
+    assert client.delete(f"/log/{first['id']}").status_code == 200
+    dash = client.get("/dashboard", params={"date": "2026-01-15"}).json()
+    assert dash["totals"]["calories"] == 380
+    assert dash["totals"]["micros"]["potassium_mg"] == 70
+    print("✅ Rollup adds and subtracts entry deltas, micros included.")
+
+def test_rebuild_repairs_drift(client, db):
+    client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-15"})
+    client.post("/log", json={"raw_text": "100g Rice", "date": "2026-01-16"})
+
+    # Corrupt one day's rollup, then rebuild from entries
+    db.get(models.DailyTotals, "2026-01-15").calories = 9999
+    db.commit()
+    assert services.rebuild_daily_totals(db) == 2
+    db.expire_all()
+    assert db.get(models.DailyTotals, "2026-01-15").calories == 120
+    assert db.get(models.DailyTotals, "2026-01-16").calories == 130
+
+def test_rollup_seeds_from_existing_entries(db):
+    # A day logged before rollups existed has entries but no rollup row
+    db.add(models.Entry(raw_text="old", local_date="2026-01-10", macros={"calories": 300, "micros": {}},
+                        items=[models.EntryItem(name="old", calories=300)]))
+    db.commit()
+    new = models.Entry(raw_text="new", local_date="2026-01-10", macros={"calories": 200, "micros": {}},
+                       items=[models.EntryItem(name="new", calories=200)])
+    db.add(new)
+    services.apply_entry_to_totals(db, new)
+    db.commit()
+    assert db.get(models.DailyTotals, "2026-01-10").calories == 500
+
+def test_range_buckets(client):
+    print("\n--- Test: /dashboard/range buckets ---")
+    client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-04"})  # Sunday
+    client.post("/log", json={"raw_text": "100g Rice", "date": "2026-01-05"})       # Monday
+    client.post("/log", json={"raw_text": "100g Rice", "date": "2026-02-02"})
+
+    days = client.get("/dashboard/range", params={"start": "2026-01-03", "end": "2026-01-06"}).json()
+    assert [b["totals"]["calories"] for b in days["buckets"]] == [0, 120, 130, 0]
+
+    weeks = client.get("/dashboard/range", params={"start": "2026-01-01", "end": "2026-01-11",
+                                                   "bucket": "week"}).json()["buckets"]
+    assert [(b["start"], b["end"]) for b in weeks] == [("2026-01-01", "2026-01-04"), ("2026-01-05", "2026-01-11")]
+    assert [b["totals"]["calories"] for b in weeks] == [120, 130]
+
+    months = client.get("/dashboard/range", params={"start": "2026-01-01", "end": "2026-02-28",
+                                                    "bucket": "month"}).json()["buckets"]
+    assert [b["totals"]["calories"] for b in months] == [250, 130]
+    assert months[0]["days_logged"] == 2
+    assert months[0]["totals"]["micros"]["potassium_mg"] == 335
+
+    assert client.get("/dashboard/range", params={"start": "2026-01-02", "end": "2026-01-01"}).status_code == 400
+    assert client.get("/dashboard/range", params={"start": "2026-01-01", "end": "2026-01-02",
+                                                  "bucket": "year"}).status_code == 400
+    print("✅ Range endpoint rolls daily totals into day/week/month buckets.")
+
+def test_range_backfills_days_without_rollups(client, db):
+    client.post("/log", json={"raw_text": "100g Arhar Dal", "date": "2026-01-04"})
+    client.post("/log", json={"raw_text": "100g Rice", "date": "2026-01-05"})
+    # Days logged before rollups existed have entries but no rollup row
+    db.query(models.DailyTotals).delete()
+    db.commit()
+
+    weeks = client.get("/dashboard/range", params={"start": "2026-01-01", "end": "2026-01-11",
+                                                   "bucket": "week"}).json()["buckets"]
+    assert [b["totals"]["calories"] for b in weeks] == [120, 130]
+    assert sorted(t.date for t in db.query(models.DailyTotals)) == ["2026-01-04", "2026-01-05"]
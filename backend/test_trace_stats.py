@@ -0,0 +1,79 @@
+import random
+from backend import llm, tracing, trace_stats
+from backend.benchmarks import fake_llm
+
+log_trace = llm.log_trace  # the client fixture stubs llm.log_trace out
+
+def test_sketch_quantiles_within_accuracy():
+    rng = random.Random(5)
+    values = [rng.lognormvariate(6, 1) for _ in range(20_000)]
+    halves = trace_stats.QuantileSketch(), trace_stats.QuantileSketch()
+    for i, value in enumerate(values):
+        halves[i % 2].add(value)
+    sketch = halves[0]
+    sketch.merge(halves[1])
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.02 * exact
+
+def _log_session():
+    for i in range(10):
+        log_trace("estimate_metric_macros", {"food_name": f"food {i}"}, {}, 100 * (i + 1), llm.ESTIMATE_MODEL,
+                  error="timeout" if i == 9 else None)
+    log_trace("estimate_batch", {"food_names": ["a", "b", "c", "d"]}, {}, 2000, llm.ESTIMATE_MODEL)
+    for _ in range(30):
+        log_trace("estimate_metric_macros", {"food_name": "Rice"}, {}, 0, "DATABASE_CACHE")
+    log_trace("parse_food_text", {"raw_text": "100g Rice"}, {}, 900, llm.PARSE_MODEL)
+    log_trace("parse_food_text", {"raw_text": "100g Rice"}, {}, 0, "PARSE_CACHE")
+
+def test_stats_endpoint(client, tmp_path, monkeypatch):
+    print("\n--- Test: /evals/stats ---")
+    paths = {"path": str(tmp_path / "llm_logs.jsonl"), "store_path": str(tmp_path / "llm_traces.db")}
+    monkeypatch.setattr(llm, "trace_writer", tracing.TraceWriter(**paths))
+    monkeypatch.setattr(trace_stats, "collector", trace_stats.TraceStats())
+    llm.trace_writer.add_observer(trace_stats.collector)
+    _log_session()
+
+    stats = client.get("/evals/stats", params={"hours": 1}).json()
+    assert stats["cache"]["catalog"] == {"hits": 30, "misses": 14, "hit_ratio": round(30 / 44, 4)}
+    assert stats["cache"]["parse"]["hit_ratio"] == 0.5
+    assert stats["llm_calls"] == 12 and stats["errors"] == 1
+    assert stats["error_rate"] == round(1 / 12, 4)
+    assert sum(hour["calls"] for hour in stats["calls_per_hour"]) == 12
+    estimate = next(row for row in stats["latency"]
+                    if (row["function"], row["model"]) == ("estimate_metric_macros", llm.ESTIMATE_MODEL))
+    assert estimate["count"] == 10
+    # Lower nearest rank of 100..1000 ms, to within the sketch accuracy
+    assert abs(estimate["p50_ms"] - 500) <= 10 and abs(estimate["p99_ms"] - 900) <= 18
+    assert client.get("/evals/stats", params={"hours": 0}).status_code == 400
+    llm.trace_writer.close()
+
+    # A restarted server rebuilds the same aggregates from the trace store
+    monkeypatch.setattr(llm, "trace_writer", tracing.TraceWriter(**paths))
+    monkeypatch.setattr(trace_stats, "collector", trace_stats.TraceStats())
+    llm.trace_writer.add_observer(trace_stats.collector)
+    assert client.get("/evals/stats", params={"hours": 1}).json() == stats
+    print(f"✅ Catalog hit ratio {stats['cache']['catalog']['hit_ratio']}, p95 by function: "
+          f"{[(row['function'], row['p95_ms']) for row in stats['latency']]}")
+
+def test_retried_foods_count_as_one_miss(fake_client, tmp_path, monkeypatch):
+    fake_client()
+    monkeypatch.setattr(llm, "log_trace", log_trace)
+    monkeypatch.setattr(llm, "trace_writer", tracing.TraceWriter(str(tmp_path / "llm_logs.jsonl"),
+                                                                 store_path=str(tmp_path / "llm_traces.db")))
+    collector = trace_stats.TraceStats()
+    llm.trace_writer.add_observer(collector)
+    real_batch = fake_llm.fake_estimate_batch
+    monkeypatch.setattr(fake_llm, "fake_estimate_batch",
+                        lambda names: {name: p for name, p in real_batch(names).items() if name != "Rice"})
+
+    llm.estimate_many(["Arhar Dal", "Rice", "Roti"])   # one batch call, then a retry for Rice
+    llm.trace_writer.flush()
+    assert collector.summary(1)["cache"]["catalog"]["misses"] == 3
+    assert collector.summary(1)["llm_calls"] == 2
+    # The same from the trace store after a restart
+    reloaded = trace_stats.TraceStats()
+    reloaded.load(llm.trace_writer.get_store())
+    assert reloaded.summary(1)["cache"]["catalog"]["misses"] == 3
+    llm.trace_writer.close()
@@ -0,0 +1,47 @@
+import pytest
+from backend import llm, tracing
+
+log_trace = llm.log_trace  # the client fixture stubs llm.log_trace out
+
+def _log_traces(n):
+    for i in range(n):
+        log_trace(func_name="parse_food_text" if i % 2 else "estimate_metric_macros",
+                      input_data={"i": i}, output_data={}, latency_ms=i, model=llm.PARSE_MODEL,
+                      error="timeout" if i % 5 == 0 else None)
+
+def _pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        res = client.get("/evals/logs", params={**params, **({"cursor": cursor} if cursor else {})})
+        pages.append([trace["input"]["i"] for trace in res.json()])
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_paginated_filtered_logs(client, tmp_path, monkeypatch, indexed):
+    print(f"\n--- Test: /evals/logs pages ({'trace store' if indexed else 'reverse tail'}) ---")
+    writer = tracing.TraceWriter(str(tmp_path / "llm_logs.jsonl"),
+                                 store_path=str(tmp_path / "llm_traces.db") if indexed else None)
+    monkeypatch.setattr(llm, "trace_writer", writer)
+    _log_traces(25)
+
+    assert _pages(client, limit=10) == [list(range(24, 14, -1)), list(range(14, 4, -1)), [4, 3, 2, 1, 0]]
+    assert _pages(client, limit=3, error="true", function="estimate_metric_macros") == [[20, 10, 0]]
+    assert _pages(client, limit=2, function="parse_food_text", error="true") == [[15, 5]]
+    assert (writer.get_store() is not None) == indexed
+    writer.close()
+    print("✅ Newest-first pages with cursors and filters.")
+
+def test_new_store_indexes_existing_log(client, tmp_path, monkeypatch):
+    log_file = str(tmp_path / "llm_logs.jsonl")
+    monkeypatch.setattr(llm, "trace_writer", tracing.TraceWriter(log_file))
+    _log_traces(5)
+    llm.trace_writer.close()
+
+    writer = tracing.TraceWriter(log_file, store_path=str(tmp_path / "llm_traces.db"))
+    monkeypatch.setattr(llm, "trace_writer", writer)
+    _log_traces(2)
+    assert _pages(client) == [[1, 0, 4, 3, 2, 1, 0]]
+    assert writer.get_store().count() == 7
+    writer.close()
@@ -0,0 +1,58 @@
+import glob
+import gzip
+import json
+import threading
+from backend import tracing
+
+def test_batches_are_group_committed(tmp_path):
+    print("\n--- Test: Background trace writer ---")
+    writer = tracing.TraceWriter(str(tmp_path / "llm_logs.jsonl"))
+    for i in range(1000):
+        assert writer.submit({"function": "estimate_metric_macros", "i": i})
+    assert writer.flush()
+    with open(writer.path) as f:
+        assert [json.loads(line)["i"] for line in f] == list(range(1000))
+    stats = writer.stats()
+    assert stats["written"] == 1000 and stats["dropped"] == 0
+    assert stats["batches"] < 10           # one fsync per batch, not per trace
+    writer.close()
+    print(f"✅ 1000 traces in {stats['batches']} batches.")
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    writer = tracing.TraceWriter(str(tmp_path / "llm_logs.jsonl"), max_queue=2)
+    writing, release = threading.Event(), threading.Event()
+    write_batch = writer._write_batch
+
+    def slow_disk(batch):
+        writing.set()
+        release.wait(5)
+        write_batch(batch)
+    monkeypatch.setattr(writer, "_write_batch", slow_disk)
+    monkeypatch.setattr(tracing, "FLUSH_INTERVAL_S", 0)
+
+    writer.submit({"i": 0})
+    assert writing.wait(5)                 # the writer holds trace 0
+    results = [writer.submit({"i": i}) for i in range(1, 5)]
+    assert results == [True, True, False, False]
+    release.set()
+    assert writer.flush()
+    with open(writer.path) as f:
+        assert len(f.readlines()) == 3
+    assert writer.stats()["dropped"] == 2
+    writer.close()
+
+def test_rotation_compresses_and_prunes(tmp_path):
+    path = str(tmp_path / "llm_logs.jsonl")
+    writer = tracing.TraceWriter(path, max_bytes=100, keep=2)
+    for i in range(5):
+        for j in range(10):
+            writer.submit({"batch": i, "j": j})
+        writer.flush()
+    writer.close()
+
+    archives = sorted(glob.glob(str(tmp_path / "llm_logs.*.jsonl.gz")))
+    assert len(archives) == 2 and writer.stats()["rotations"] == 4
+    with gzip.open(archives[-1], "rt") as f:
+        assert [json.loads(line)["batch"] for line in f] == [3] * 10
+    with open(path) as f:
+        assert [json.loads(line)["batch"] for line in f] == [4] * 10
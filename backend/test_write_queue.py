@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from backend import database, main, models, writer
+from backend.benchmarks.load_log import LoadGenerator, parse_mix
+
+# Requests per second the WAL setup must take without a single lock error
+TARGET_RPS = 100
+
+@pytest.fixture
+def wal_db(tmp_path):
+    """The production storage mode on a scratch file: query-only read pool, writes through a WriteQueue."""
+    write_engine, read_engine = database.make_engines(tmp_path / "wal.db", "wal")
+    database.Base.metadata.create_all(bind=write_engine)
+    write_queue = writer.register(write_engine, read_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+    def get_db():
+        db = ReadSession()
+        try:
+            yield db
+        finally:
+            db.close()
+    main.app.dependency_overrides[main.get_db] = get_db
+    yield write_queue, ReadSession
+    main.app.dependency_overrides.clear()
+    write_queue.close()
+    writer.unregister(read_engine)
+    write_engine.dispose()
+    read_engine.dispose()
+
+def test_no_lock_errors_at_target_rate(wal_db, fake_llm):
+    print("\n--- Test: WAL + serialized writer under concurrent load ---")
+    write_queue, ReadSession = wal_db
+    generator = LoadGenerator("http://helios", rps=TARGET_RPS, duration_s=1.0,
+                              mix=parse_mix("log=3,dashboard=1,preview=1"), new_food_rate=0.2,
+                              transport=httpx.ASGITransport(app=main.app))
+    report = asyncio.run(generator.run())
+    assert report["sqlite_lock_errors"] == 0
+    assert all(e["ok"] == e["requests"] for e in report["endpoints"].values()), report["endpoints"]
+
+    logged = report["endpoints"]["log"]["ok"]
+    with ReadSession() as db:
+        assert db.query(models.Entry).count() == logged
+        # Every rollup delta landed with its entry
+        assert sum(t.entry_count for t in db.query(models.DailyTotals)) == logged
+    stats = write_queue.stats()
+    assert stats["failed"] == 0 and stats["committed"] == stats["submitted"]
+    print(f"✅ {report['achieved_rps']} req/s, 0 lock errors; writer: {stats}")
+
+def test_group_commit_isolates_failed_jobs(wal_db):
+    write_queue, ReadSession = wal_db
+    started, release = threading.Event(), threading.Event()
+
+    def hold(session):
+        started.set()
+        return release.wait(5)
+    # Hold the writer so the next jobs queue up behind it and commit as one group
+    first = write_queue.submit(hold)
+    started.wait(5)
+
+    def add_goal(day):
+        return lambda session: session.add(models.DailyGoal(date=f"2026-01-{day:02d}"))
+
+    def broken(session):
+        session.add(models.DailyGoal(date="2026-02-01"))
+        raise ValueError("boom")
+
+    futures = [write_queue.submit(add_goal(day)) for day in range(1, 6)]
+    failing = write_queue.submit(broken)
+    release.set()
+    assert first.result(5) is True
+    for future in futures:
+        future.result(5)
+    with pytest.raises(ValueError):
+        failing.result(5)
+
+    assert write_queue.stats()["max_batch"] == 6
+    with ReadSession() as db:
+        assert sorted(goal.date for goal in db.query(models.DailyGoal)) == [f"2026-01-{d:02d}" for d in range(1, 6)]
+
+def test_dead_writer_fails_pending_writes(wal_db, monkeypatch):
+    write_queue, _ = wal_db
+    write_queue.run(lambda session: None)  # start the thread before breaking its commit
+
+    def crash(batch):
+        raise SystemError("writer crashed")
+    monkeypatch.setattr(write_queue, "_commit_batch", crash)
+    futures = [write_queue.submit(lambda session: None) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="writer thread died"):
+            future.result(5)
+    assert write_queue.stats()["failed"] == 3
+
+def test_read_pool_is_query_only(wal_db):
+    _, ReadSession = wal_db
+    with ReadSession() as db:
+        assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        with pytest.raises(OperationalError, match="readonly"):
+            db.execute(text("INSERT INTO daily_goals (date) VALUES ('2026-01-01')"))
+
+def test_vacuum_runs_outside_begin_immediate(tmp_path):
+    write_engine, read_engine = database.make_engines(tmp_path / "wal.db", "wal")
+    try:
+        database.Base.metadata.create_all(bind=write_engine)
+        with write_engine.begin() as conn:
+            conn.execute(models.DailyGoal.__table__.insert(), [{"date": f"day-{d}"} for d in range(5000)])
+            conn.execute(text("DELETE FROM daily_goals"))
+        with write_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA freelist_count")).scalar() > 0
+        database.vacuum(write_engine)
+        with write_engine.begin() as conn:
+            assert conn.execute(text("PRAGMA freelist_count")).scalar() == 0
+            # The connection is back to its manual BEGIN IMMEDIATE transactions
+            conn.execute(text("INSERT INTO daily_goals (date) VALUES ('2026-02-01')"))
+        with read_engine.connect() as conn:
+            assert conn.execute(text("SELECT date FROM daily_goals")).scalars().all() == ["2026-02-01"]
+    finally:
+        write_engine.dispose()
+        read_engine.dispose()
@@ -0,0 +1,164 @@
+"""
+Running latency, cache and error analytics over the LLM traces, for /evals/stats.
+
+Traces are folded in as the trace writer writes them, into one window per
+hour: call, error and cache-hit counters plus a latency sketch per
+(function, model). A summary merges the windows it covers, so /evals/stats
+never rescans llm_logs.jsonl. On startup the windows are rebuilt once from
+the trace store.
+
+The sketch keeps counts in logarithmic buckets (as in DDSketch), so every
+quantile is within SKETCH_ACCURACY relative error, and sketches for
+different hours merge exactly by adding counts.
+"""
+import math
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+SKETCH_ACCURACY = 0.01
+STATS_RETENTION_HOURS = int(os.environ.get("HELIOS_TRACE_STATS_HOURS", str(7 * 24)))
+# Traces that stand for work the LLM didn't have to do
+CACHE_MODELS = {"DATABASE_CACHE": "catalog", "PARSE_CACHE": "parse", "LOCAL_PARSER": "parse"}
+
+class QuantileSketch:
+    """Mergeable streaming quantiles with bounded relative error."""
+
+    def __init__(self, accuracy: float = SKETCH_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = defaultdict(int)   # i -> count of values in (gamma^(i-1), gamma^i]
+        self.zeros = 0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        self.buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        for i, n in other.buckets.items():
+            self.buckets[i] += n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                # Bucket midpoint: within `accuracy` of every value in it
+                return min(2 * self.gamma ** i / (self.gamma + 1), self.max)
+        return self.max
+
+class HourWindow:
+    def __init__(self):
+        self.latency = defaultdict(QuantileSketch)   # (function, model) -> sketch
+        self.calls = 0        # LLM calls
+        self.errors = 0
+        self.cache_hits = defaultdict(int)          # 'catalog' / 'parse' -> hits
+        self.cache_misses = defaultdict(int)        # ... -> foods estimated / logs parsed by the LLM
+
+class TraceStats:
+    """Thread-safe hourly aggregates, fed by TraceWriter (see tracing.TraceWriter.add_observer)."""
+
+    def __init__(self, retention_hours: int = STATS_RETENTION_HOURS):
+        self.retention_hours = retention_hours
+        self._windows = {}                 # 'YYYY-MM-DDTHH' -> HourWindow
+        self._lock = threading.Lock()
+
+    def observe_many(self, traces):
+        with self._lock:
+            for trace in traces:
+                self._observe(trace)
+            self._expire()
+
+    def load(self, store):
+        """Rebuild the windows from the trace store (once, when it is opened)."""
+        since = (datetime.now() - timedelta(hours=self.retention_hours)).strftime("%Y-%m-%dT%H")
+        with self._lock:
+            self._windows.clear()
+            for trace in store.iter_summaries(since=since):
+                self._observe(trace)
+
+    def _observe(self, trace):
+        timestamp = trace.get("timestamp") or datetime.now().isoformat()
+        window = self._windows.get(timestamp[:13])
+        if window is None:
+            window = self._windows[timestamp[:13]] = HourWindow()
+        function, model = trace.get("function"), trace.get("model")
+        window.latency[(function, model)].add(trace.get("latency_ms") or 0)
+        cache = CACHE_MODELS.get(model)
+        if cache is not None:
+            window.cache_hits[cache] += 1
+            return
+        window.calls += 1
+        window.errors += bool(trace.get("error"))
+        if function == "parse_food_text":
+            window.cache_misses["parse"] += 1
+        elif function == "estimate_metric_macros":
+            # A retry is a food its batch call already counted
+            if not (trace.get("input") or {}).get("retry"):
+                window.cache_misses["catalog"] += 1
+        elif function == "estimate_batch":
+            window.cache_misses["catalog"] += len((trace.get("input") or {}).get("food_names") or ()) or 1
+
+    def _expire(self):
+        cutoff = (datetime.now() - timedelta(hours=self.retention_hours)).strftime("%Y-%m-%dT%H")
+        for hour in [hour for hour in self._windows if hour < cutoff]:
+            del self._windows[hour]
+
+    def summary(self, hours: int = 24) -> dict:
+        """Latency percentiles, cache hit ratios, error rate and calls per hour over the last `hours`."""
+        since = (datetime.now() - timedelta(hours=hours - 1)).strftime("%Y-%m-%dT%H")
+        latency = defaultdict(QuantileSketch)
+        hits, misses = defaultdict(int), defaultdict(int)
+        calls = errors = 0
+        per_hour = []
+        with self._lock:
+            for hour in sorted(h for h in self._windows if h >= since):
+                window = self._windows[hour]
+                for key, sketch in window.latency.items():
+                    latency[key].merge(sketch)
+                for cache, n in window.cache_hits.items():
+                    hits[cache] += n
+                for cache, n in window.cache_misses.items():
+                    misses[cache] += n
+                calls += window.calls
+                errors += window.errors
+                per_hour.append({"hour": f"{hour}:00", "calls": window.calls, "errors": window.errors,
+                                 "cache_hits": sum(window.cache_hits.values())})
+        return {
+            "window_hours": hours,
+            "latency": [
+                {"function": function, "model": model, "count": sketch.count,
+                 **{f"p{int(q * 100)}_ms": _round(sketch.quantile(q)) for q in (0.5, 0.95, 0.99)}}
+                for (function, model), sketch in sorted(latency.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1])))
+            ],
+            "cache": {cache: {"hits": hits[cache], "misses": misses[cache],
+                              "hit_ratio": _ratio(hits[cache], hits[cache] + misses[cache])}
+                      for cache in ("catalog", "parse")},
+            "llm_calls": calls,
+            "errors": errors,
+            "error_rate": _ratio(errors, calls),
+            "calls_per_hour": per_hour
+        }
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+def _ratio(n, total):
+    return round(n / total, 4) if total else None
+
+collector = TraceStats()
@@ -0,0 +1,217 @@
+"""
+Queryable index of the LLM traces, for /evals/logs.
+
+llm_logs.jsonl stays the append-only record; the trace writer also inserts
+every batch into a small SQLite database (HELIOS_TRACE_DB, default
+llm_traces.db next to the log) indexed by timestamp, function, model and
+error, so the evals page reads one indexed page instead of the whole file.
+Pages are newest first; the cursor is the id of the last trace returned.
+
+When the store can't be opened (or HELIOS_TRACE_DB is set to ""), tail()
+reads the JSONL file backwards from the end instead, with a byte offset as
+the cursor.
+
+Rebuild the index from the log and its rotated archives with:
+
+    python -m backend.trace_store --reindex
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import sqlite3
+import threading
+
+TRACE_DB = os.environ.get("HELIOS_TRACE_DB", os.path.join(os.path.dirname(__file__), "llm_traces.db"))
+MAX_PAGE_SIZE = 500
+TAIL_BLOCK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    function TEXT,
+    model TEXT,
+    error TEXT,
+    latency_ms REAL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_traces_timestamp ON traces (timestamp);
+CREATE INDEX IF NOT EXISTS ix_traces_function ON traces (function, id);
+CREATE INDEX IF NOT EXISTS ix_traces_model ON traces (model, id);
+CREATE INDEX IF NOT EXISTS ix_traces_error ON traces (id) WHERE error IS NOT NULL;
+"""
+
+class TraceStore:
+    """SQLite trace index. insert_many is called from the trace writer thread only."""
+
+    def __init__(self, path: str = TRACE_DB):
+        self.path = path
+        self._write_conn = self._connect()
+        self._write_conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        # WAL: readers on the evals page never wait for the writer thread
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def insert_many(self, traces):
+        rows = [(t.get("timestamp"), t.get("function"), t.get("model"), t.get("error"), t.get("latency_ms"),
+                 json.dumps(t, default=str)) for t in traces]
+        with self._lock, self._write_conn:
+            self._write_conn.executemany(
+                "INSERT INTO traces (timestamp, function, model, error, latency_ms, body) VALUES (?, ?, ?, ?, ?, ?)",
+                rows)
+
+    def query(self, limit: int = 50, cursor: int = None, function: str = None, model: str = None,
+              error: bool = None, since: str = None, until: str = None):
+        """
+        Newest-first page of traces matching the filters, older than cursor.
+        Returns (traces, next_cursor); next_cursor is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        for column, value in (("function", function), ("model", model)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if error is not None:
+            clauses.append("error IS NOT NULL" if error else "error IS NULL")
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            rows = conn.execute(f"SELECT id, body FROM traces {where} ORDER BY id DESC LIMIT ?",
+                                (*params, limit + 1)).fetchall()
+        finally:
+            conn.close()
+        traces = [json.loads(body) for _, body in rows[:limit]]
+        return traces, (rows[limit - 1][0] if len(rows) > limit else None)
+
+    def iter_summaries(self, since: str = None):
+        """Yield the traces at or after since, oldest first, without their output (for trace_stats)."""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            rows = conn.execute(
+                "SELECT timestamp, function, model, error, latency_ms, "
+                "CASE WHEN function = 'estimate_batch' THEN body END, "
+                "CASE WHEN function = 'estimate_metric_macros' THEN json_extract(body, '$.input.retry') END "
+                "FROM traces WHERE timestamp >= ? ORDER BY id", (since or "",))
+            for timestamp, function, model, error, latency_ms, body, retry in rows:
+                trace_input = json.loads(body).get("input") if body else None
+                if retry:
+                    trace_input = {"retry": True}
+                yield {"timestamp": timestamp, "function": function, "model": model, "error": error,
+                       "latency_ms": latency_ms, "input": trace_input}
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._write_conn.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
+
+    def reindex(self, log_file: str) -> int:
+        """Replace the index with the traces in log_file and its gzipped archives."""
+        base, ext = os.path.splitext(log_file)
+        paths = sorted(glob.glob(f"{glob.escape(base)}.*{ext}.gz")) + [log_file]
+        with self._lock, self._write_conn:
+            self._write_conn.execute("DELETE FROM traces")
+        total = 0
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with (gzip.open(path, "rt") if path.endswith(".gz") else open(path)) as f:
+                batch = []
+                for line in f:
+                    try:
+                        batch.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+                    if len(batch) >= 10_000:
+                        self.insert_many(batch)
+                        total += len(batch)
+                        batch.clear()
+                self.insert_many(batch)
+                total += len(batch)
+        return total
+
+def open_store(path: str = TRACE_DB):
+    """The trace store at path, or None when disabled or it can't be opened."""
+    if not path:
+        return None
+    try:
+        return TraceStore(path)
+    except sqlite3.Error as e:
+        print(f"Trace store unavailable, falling back to the log file: {e}")
+        return None
+
+def _reverse_lines(f, end: int):
+    """Yield (offset, line) for the lines before byte offset end, newest first."""
+    pos, carry = end, b""
+    while pos > 0:
+        start = max(0, pos - TAIL_BLOCK_SIZE)
+        f.seek(start)
+        lines = (f.read(pos - start) + carry).split(b"\n")
+        # The first piece may be the end of a line that starts in an earlier block
+        carry = lines.pop(0) if start > 0 else b""
+        offset = start + (len(carry) + 1 if start > 0 else 0)
+        offsets = []
+        for line in lines:
+            offsets.append(offset)
+            offset += len(line) + 1
+        for line_start, line in zip(reversed(offsets), reversed(lines)):
+            if line.strip():
+                yield line_start, line
+        pos = start
+
+def tail(log_file: str, limit: int = 50, cursor: int = None, function: str = None, model: str = None,
+         error: bool = None, since: str = None, until: str = None):
+    """
+    Newest-first page of traces read backwards from the end of log_file (no
+    index needed). The cursor is the byte offset of the last trace returned.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    traces, next_cursor = [], None
+    if not os.path.exists(log_file):
+        return traces, next_cursor
+    with open(log_file, "rb") as f:
+        end = f.seek(0, os.SEEK_END) if cursor is None else cursor
+        for offset, line in _reverse_lines(f, end):
+            try:
+                trace = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if (function is not None and trace.get("function") != function) \
+                    or (model is not None and trace.get("model") != model) \
+                    or (error is not None and bool(trace.get("error")) != error) \
+                    or (since is not None and (trace.get("timestamp") or "") < since) \
+                    or (until is not None and (trace.get("timestamp") or "") >= until):
+                continue
+            if len(traces) == limit:
+                next_cursor = last_offset
+                break
+            traces.append(trace)
+            last_offset = offset
+    return traces, next_cursor
+
+if __name__ == "__main__":
+    from backend.llm import LOG_FILE
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reindex", action="store_true", help="rebuild the trace index from the JSONL logs")
+    args = parser.parse_args()
+    store = TraceStore()
+    if args.reindex:
+        print(f"Indexed {store.reindex(LOG_FILE)} traces from {LOG_FILE}.")
+    print(f"{store.count()} traces in {store.path}.")
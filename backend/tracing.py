@@ -0,0 +1,247 @@
+"""
+Background writer for the LLM trace log (llm_logs.jsonl).
+
+log_trace runs inside requests, once per LLM call and once per catalog cache
+hit, so it must not wait on the disk. Traces go into a bounded queue and a
+daemon thread writes them in batches: one write, one flush and one fsync per
+batch (group commit). When the queue is full new traces are dropped and
+counted rather than blocking the request.
+
+The log rotates once it passes HELIOS_TRACE_MAX_BYTES or has been written to
+for HELIOS_TRACE_ROTATE_S; rotated files are gzipped next to it and only the
+newest HELIOS_TRACE_KEEP are kept. Pending traces are flushed at interpreter
+exit and on app shutdown. Each batch is also indexed in the trace store
+(trace_store.TraceStore) that backs /evals/logs.
+"""
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from . import trace_store
+
+TRACE_QUEUE_SIZE = int(os.environ.get("HELIOS_TRACE_QUEUE_SIZE", "10000"))
+TRACE_MAX_BYTES = int(os.environ.get("HELIOS_TRACE_MAX_BYTES", str(20 * 1024 * 1024)))
+TRACE_ROTATE_S = float(os.environ.get("HELIOS_TRACE_ROTATE_S", str(24 * 3600)))
+TRACE_KEEP = int(os.environ.get("HELIOS_TRACE_KEEP", "10"))
+BATCH_SIZE = 512
+# How long the writer waits for more traces before writing a partial batch
+FLUSH_INTERVAL_S = 0.2
+
+_STOP = object()
+
+class TraceWriter:
+    """Thread-safe, non-blocking JSONL appender with group commit and rotation."""
+
+    def __init__(self, path: str, max_queue: int = TRACE_QUEUE_SIZE, max_bytes: int = TRACE_MAX_BYTES,
+                 rotate_s: float = TRACE_ROTATE_S, keep: int = TRACE_KEEP, store_path: str = None):
+        self.path = path
+        self.store_path = store_path
+        self.max_bytes = max_bytes
+        self.rotate_s = rotate_s
+        self.keep = keep
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._thread = None
+        self._opened_at = None
+        self._store = None
+        self._store_opened = False
+        self._store_lock = threading.Lock()
+        self._observers = []
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0                   # taken off the queue, but their batch failed to write
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+        self.store_errors = 0
+
+    def submit(self, trace: dict) -> bool:
+        """Queue a trace for writing. Returns False (and counts it) if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every trace queued so far is on disk. False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._done:
+            target = self.submitted
+            while self.written + self.failed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._alive():
+                    return False
+                self._done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Flush and stop the writer thread (a later submit restarts it)."""
+        if not self._alive():
+            return
+        self.flush(timeout)
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def add_observer(self, observer):
+        """
+        Feed every written batch to observer.observe_many(traces); when the
+        store is opened, observer.load(store) first catches it up on history.
+        """
+        self._observers.append(observer)
+
+    def get_store(self):
+        """
+        The trace store, opened on first use (None without a store_path or if
+        it can't be opened). A new, empty store is first filled from the log.
+        """
+        with self._store_lock:
+            if not self._store_opened:
+                self._store_opened = True
+                self._store = trace_store.open_store(self.store_path) if self.store_path else None
+                if self._store is not None and not self._store.count() and os.path.exists(self.path):
+                    self._store.reindex(self.path)
+                if self._store is not None:
+                    for observer in self._observers:
+                        observer.load(self._store)
+            return self._store
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "rotations": self.rotations,
+                "errors": self.errors,
+                "store_errors": self.store_errors
+            }
+
+    # ── writer thread ──────────────────────────────
+
+    def _alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_started(self):
+        if self._alive():
+            return
+        with self._lock:
+            if not self._alive():
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            if trace is _STOP:
+                return
+            batch = [trace]
+            stop = False
+            deadline = time.monotonic() + FLUSH_INTERVAL_S
+            while len(batch) < BATCH_SIZE:
+                try:
+                    trace = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if trace is _STOP:
+                    stop = True
+                    break
+                batch.append(trace)
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        # Before the write, so a first-time reindex doesn't pick up this batch twice
+        store = self.get_store()
+        try:
+            self._maybe_rotate()
+            data = "".join(json.dumps(trace, default=str) + "\n" for trace in batch)
+            with open(self.path, "a") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if self._opened_at is None:
+                self._opened_at = time.monotonic()
+            ok = True
+        except Exception as e:
+            print(f"Logging failed: {e}")
+            ok = False
+        if ok and store is not None:
+            try:
+                store.insert_many(batch)
+            except Exception as e:
+                print(f"Trace indexing failed: {e}")
+                with self._lock:
+                    self.store_errors += 1
+        if ok:
+            for observer in self._observers:
+                try:
+                    observer.observe_many(batch)
+                except Exception as e:
+                    print(f"Trace observer failed: {e}")
+        with self._done:
+            if ok:
+                self.written += len(batch)
+                self.batches += 1
+            else:
+                self.failed += len(batch)
+                self.errors += 1
+            self._done.notify_all()
+
+    def _maybe_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        too_old = self._opened_at is not None and time.monotonic() - self._opened_at >= self.rotate_s
+        if size < self.max_bytes and not (too_old and size):
+            return
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{ext}"
+        os.replace(self.path, rotated)
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        self._opened_at = None
+        with self._lock:
+            self.rotations += 1
+        archives = sorted(glob.glob(f"{glob.escape(base)}.*{ext}.gz"))
+        for old in archives[:max(0, len(archives) - self.keep)]:
+            os.remove(old)
+
+_writers = []
+
+def get_writer(path: str, store_path: str = None) -> TraceWriter:
+    """The process-wide writer for path, flushed at interpreter exit."""
+    for writer in _writers:
+        if writer.path == path:
+            return writer
+    writer = TraceWriter(path, store_path=store_path)
+    _writers.append(writer)
+    return writer
+
+def close_all(timeout: float = 5.0):
+    for writer in _writers:
+        writer.close(timeout)
+
+atexit.register(close_all)
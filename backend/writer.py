@@ -0,0 +1,217 @@
+"""
+Single-writer queue for the SQLite database.
+
+SQLite allows one writer at a time, and a request whose read transaction
+later tries to write can fail at once with "database is locked" instead of
+waiting. In WAL mode (database.STORAGE_MODE) requests therefore read through
+a query-only connection pool, and every write is a job, fn(session), run by
+one daemon thread on the write engine. The thread takes whatever jobs are
+queued (up to WRITE_BATCH_SIZE), runs each in its own SAVEPOINT so a failing
+job only rolls back itself, and commits the group once (group commit): under
+load many requests share one BEGIN IMMEDIATE ... COMMIT. If the thread dies,
+it fails every pending future, and callers wait at most WRITE_TIMEOUT_S.
+
+Call sites use write() / write_apart() with the request's session. When no
+queue is registered for that session's engine (simple mode, tests, scripts),
+the job runs directly in that session, as before the queue existed.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from sqlalchemy.orm import Session, sessionmaker
+
+WRITE_BATCH_SIZE = int(os.environ.get("HELIOS_WRITE_BATCH_SIZE", "64"))
+# Longest a request waits for its write; generous, since a group waits on busy_timeout at most
+WRITE_TIMEOUT_S = float(os.environ.get("HELIOS_WRITE_TIMEOUT_S", "30"))
+
+_STOP = object()
+
+class WriteQueue:
+    """Runs write jobs on one thread, committing the jobs queued together in one transaction."""
+
+    def __init__(self, session_factory: sessionmaker, max_batch: int = WRITE_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.submitted = 0
+        self.committed = 0
+        self.failed = 0                   # jobs that raised, or whose group's commit failed
+        self.batches = 0
+        self.max_batch_seen = 0
+
+    def submit(self, fn) -> Future:
+        """Queue fn(session); the future resolves to its return value once its group has committed."""
+        future = Future()
+        self._ensure_started()
+        with self._lock:
+            self.submitted += 1
+        self._queue.put((fn, future))
+        return future
+
+    def run(self, fn, timeout: float = WRITE_TIMEOUT_S):
+        """
+        submit() and wait for the commit. Re-raises the job's (or the commit's)
+        exception, or TimeoutError when the writer doesn't get to it in time.
+        """
+        return self.submit(fn).result(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Let queued jobs finish and stop the thread (a later submit restarts it)."""
+        if not self._alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "submitted": self.submitted,
+                "committed": self.committed,
+                "failed": self.failed,
+                "batches": self.batches,
+                "max_batch": self.max_batch_seen
+            }
+
+    # ── writer thread ──────────────────────────────
+
+    def _alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_started(self):
+        if self._alive():
+            return
+        with self._lock:
+            if not self._alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    return
+                # No waiting for stragglers: jobs that queued while the last group
+                # was committing form the next group
+                batch = [job]
+                stop = False
+                while len(batch) < self.max_batch:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stop = True
+                        break
+                    batch.append(job)
+                self._commit_batch(batch)
+                batch = []
+                if stop:
+                    return
+        except BaseException as e:
+            self._fail_pending(batch, e)
+            raise
+
+    def _fail_pending(self, batch, error):
+        """The thread is dying: fail its group and everything queued, so no caller waits forever."""
+        jobs = list(batch)
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP:
+                jobs.append(job)
+        failed = 0
+        for _, future in jobs:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Database writer thread died: {error!r}"))
+                failed += 1
+        with self._lock:
+            self.failed += failed
+
+    def _commit_batch(self, batch):
+        done = []
+        failed = 0
+        session = self.session_factory()
+        try:
+            for fn, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with session.begin_nested():
+                        result = fn(session)
+                except Exception as e:
+                    future.set_exception(e)
+                    failed += 1
+                else:
+                    done.append((future, result))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            for future, _ in done:
+                future.set_exception(e)
+            failed += len(done)
+            done = []
+        finally:
+            session.close()
+        with self._lock:
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.committed += len(done)
+            self.failed += failed
+        for future, result in done:
+            future.set_result(result)
+
+# engine -> the WriteQueue its sessions' writes go through
+_queues = {}
+
+def register(write_engine, *read_engines) -> WriteQueue:
+    """
+    Route the writes of sessions bound to read_engines through a new queue on
+    write_engine. Returns the queue. Sessions on write_engine itself (scripts)
+    keep writing directly: queueing behind their own write lock would deadlock.
+    """
+    write_queue = WriteQueue(sessionmaker(bind=write_engine, autoflush=False, expire_on_commit=False))
+    for engine in read_engines:
+        _queues[engine] = write_queue
+    return write_queue
+
+def unregister(*engines):
+    for engine in engines:
+        _queues.pop(engine, None)
+
+def queue_for(db: Session):
+    return _queues.get(db.get_bind())
+
+def write(db: Session, fn, commit: bool = True):
+    """
+    Run the write fn(session) and return its result once committed. With a
+    queue, db's own transaction is then ended so its next read sees the
+    write. Without one, fn runs in db itself; commit=False leaves it in db's
+    transaction for the caller's next commit.
+    """
+    write_queue = queue_for(db)
+    if write_queue is None:
+        result = fn(db)
+        if commit:
+            db.commit()
+        return result
+    result = write_queue.run(fn)
+    db.commit()
+    return result
+
+def write_apart(db: Session, fn):
+    """Like write(), but without a queue fn gets its own short session and transaction, not db's."""
+    write_queue = queue_for(db)
+    if write_queue is not None:
+        return write_queue.run(fn)
+    with Session(bind=db.get_bind()) as session:
+        result = fn(session)
+        session.commit()
+        return result
@@ -291,7 +291,11 @@ export const VibeLog = () => {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     raw_text: logTextFinal,
-                    date: useHealthStore.getState().date
+                    date: useHealthStore.getState().date,
+                    // Reviewed items were already resolved by /preview_log, so the backend skips the parse
+                    items: items.length > 0
+                        ? items.map(item => ({ name: item.name, quantity: item.quantity, note: item.note }))
+                        : undefined
                 })
             });
 
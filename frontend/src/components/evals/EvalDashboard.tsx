@@ -192,20 +192,40 @@ function LogsView() {
 }
 
 function RunEvalsView() {
-    const [running, setRunning] = useState(false);
-    const [results, setResults] = useState<any>(null);
+    const [run, setRun] = useState<any>(null);
+    const running = run !== null && (run.status === 'queued' || run.status === 'running');
+    const results = run?.results;
+
+    // Poll the background run until it finishes
+    useEffect(() => {
+        if (!running) return;
+        const interval = setInterval(async () => {
+            try {
+                const res = await axios.get(`${API_URL}/evals/runs/${run.id}`);
+                setRun(res.data);
+            } catch (e) {
+                console.error("Failed to fetch eval run:", e);
+            }
+        }, 1000);
+        return () => clearInterval(interval);
+    }, [running, run?.id]);
 
     const runEvals = async () => {
-        setRunning(true);
-        setResults(null);
         try {
             const res = await axios.post(`${API_URL}/evals/run`);
-            setResults(res.data);
+            setRun(res.data);
         } catch (e) {
             console.error(e);
             alert("Failed to run evals");
-        } finally {
-            setRunning(false);
+        }
+    };
+
+    const cancelRun = async () => {
+        try {
+            const res = await axios.post(`${API_URL}/evals/runs/${run.id}/cancel`);
+            setRun(res.data);
+        } catch (e) {
+            console.error(e);
         }
     };
 
@@ -217,6 +237,21 @@ function RunEvalsView() {
                         <Database className="w-4 h-4 text-cyan-500" />
                         Dataset: dataset_food_parsing.json
                     </h3>
+                    {running && (
+                        <div className="flex items-center gap-3 text-xs text-neutral-400 font-mono">
+                            <span>
+                                Parsed {run.progress.parse.done}/{run.progress.parse.total} •
+                                Judged {run.progress.judge.done}/{run.progress.judge.total} •
+                                Macros {run.progress.macros.done}/{run.progress.macros.total}
+                            </span>
+                            <button onClick={cancelRun} className="text-red-400 hover:text-red-300">
+                                Cancel
+                            </button>
+                        </div>
+                    )}
+                    {run?.status === 'cancelled' && (
+                        <span className="text-xs text-yellow-400 font-mono">Run cancelled (partial results)</span>
+                    )}
                     <button
                         onClick={runEvals}
                         disabled={running}